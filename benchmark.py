@@ -0,0 +1,243 @@
+import json
+import os
+import platform
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# the stages timed for every synthetic dataset, in pipeline order
+STAGES = ["preprocess_log", "discover_petri_nets", "generate_P", "generate_F", "calculate_ks_entropy", "structural_metrics", "log_split"]
+
+# the parameters of the synthetic datasets and their defaults
+DEFAULT_PARAMETERS = {
+    "n_users": 200,
+    "n_posts": 400,
+    "trace_length": 6,
+    "coordinated_fraction": 0.2,
+    "seed": 0,
+}
+
+
+def generate_retweet_dataframe(n_users, n_posts, trace_length, coordinated_fraction, seed=0):
+    """
+    This function generates a synthetic retweet dataset in the format of the Spain and Thailand datasets, where
+    each retweeted post is a case and each user retweeting it is an activity. A fraction of the users are
+    coordinated: they retweet campaign posts in bursts, following a few shared retweet orders within seconds of
+    each other. The other users retweet organic posts, choosing users by popularity with delays of minutes.
+
+    Inputs:
+    n_users: the number of users
+    n_posts: the number of retweeted posts, half of them organic and half of them campaign posts
+    trace_length: the mean number of retweets of a post
+    coordinated_fraction: the fraction of the users that are coordinated
+    seed: the seed of the generator
+
+    Outputs:
+    df: a DataFrame with the columns post_time (ms), accountid, reposted_postid, is_control (True for the organic,
+    uncoordinated retweets) and is_repost (False for a tenth of the rows, which are not retweets)
+    """
+    rng = np.random.default_rng(seed)
+
+    n_coordinated = max(2, int(round(n_users * coordinated_fraction)))
+    n_organic = max(2, n_users - n_coordinated)
+    coordinated_users = np.array(["c" + str(i) for i in range(n_coordinated)])
+    organic_users = np.array(["o" + str(i) for i in range(n_organic)])
+
+    # organic users are chosen with a Zipf-like popularity
+    popularity = 1 / np.arange(1, n_organic + 1)
+    popularity /= popularity.sum()
+
+    # the campaign posts follow a few scripted retweet orders
+    scripts = [rng.permutation(n_coordinated) for _ in range(3)]
+
+    start = 1577836800000  # 2020-01-01 in ms
+
+    times = []
+    users = []
+    posts = []
+    is_control = []
+
+    for post in range(n_posts):
+        length = max(2, rng.poisson(trace_length))
+        post_start = start + int(rng.integers(0, 30 * 24 * 3600 * 1000))
+
+        if post % 2 == 0:
+            post_users = rng.choice(organic_users, size=length, p=popularity)
+            delays = rng.exponential(5 * 60 * 1000, size=length)
+            control = True
+        else:
+            script = scripts[rng.integers(len(scripts))]
+            post_users = coordinated_users[script[np.arange(length) % n_coordinated]]
+            delays = rng.exponential(3 * 1000, size=length)
+            control = False
+
+        times.append(post_start + np.cumsum(delays).astype(np.int64))
+        users.append(post_users)
+        posts.append(np.full(length, post, dtype=np.int64))
+        is_control.append(np.full(length, control))
+
+    df = pd.DataFrame({
+        "post_time": np.concatenate(times),
+        "accountid": np.concatenate(users),
+        "reposted_postid": np.concatenate(posts),
+        "is_control": np.concatenate(is_control),
+    })
+    df["is_repost"] = rng.random(len(df)) >= 0.1
+
+    # the raw datasets are not ordered by time
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def time_stage(timings, stage, function, *args, **kwargs):
+    """
+    Runs a function, appends its duration in seconds to timings[stage] and returns its result
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    timings.setdefault(stage, []).append(time.perf_counter() - start)
+    return result
+
+
+def run_benchmark(parameters, repeats=1, work_dir=None):
+    """
+    This function times every stage of the workflow on a synthetic dataset: building the event log, discovering
+    the Petri net, estimating P and F, the KS entropy, the structural measures and the behaviour split. Only the
+    uncoordinated log is used, as it is the one that is split.
+
+    Inputs:
+    parameters: a dictionary with the parameters of generate_retweet_dataframe
+    repeats: the number of times each stage is timed
+    work_dir: the folder the event logs and Petri nets are written to, a temporary folder by default
+
+    Outputs:
+    result: a dictionary with the parameters, the size of the log and Petri net, and the median and all durations
+    of each stage in seconds
+    """
+    import pm4py
+    from generate_logs_spain_thailand import preprocess_df, preprocess_log
+    from generate_petri_nets import discover_petri_nets, tree_path_for
+    from free_choice_SPN import generate_P, generate_F
+    from calculate_ks_entropy import calculate_ks_entropy
+    from calculate_structural_metrics import calculate_structural_metrics
+    from split_logs_behaviours import log_split
+    from log_cache import load_columnar_log
+
+    df = generate_retweet_dataframe(**parameters)
+
+    timings = {}
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        log_path = os.path.join(tmp_dir, "benchmark.xes")
+        pn_path = os.path.join(tmp_dir, "benchmark.pnml")
+
+        for _ in range(repeats):
+            # the logs keep every trace with at least 2 events
+            uncoordinated_df, coordinated_df = preprocess_df(df.copy())
+            log_length = int((uncoordinated_df["case:concept:name"].value_counts() >= 2).sum())
+            log = time_stage(timings, "preprocess_log", preprocess_log, uncoordinated_df, log_length)
+        pm4py.write_xes(log, log_path)
+
+        for _ in range(repeats):
+            net, im, fm = time_stage(timings, "discover_petri_nets", discover_petri_nets, log_path, tree_path=tree_path_for(pn_path))
+        pm4py.write_pnml(net, im, fm, pn_path)
+
+        # P and F are estimated from the cached columnar log, as in the analysis scripts. The behaviour split uses
+        # the full event log, as split_logs_behaviours.py writes the split logs out
+        columnar_log = load_columnar_log(log_path)
+
+        for _ in range(repeats):
+            time_stage(timings, "generate_P", generate_P, columnar_log, net, im, fm)
+            time_stage(timings, "generate_F", generate_F, net, columnar_log)
+            time_stage(timings, "calculate_ks_entropy", calculate_ks_entropy, pn_path, log_path, use_cache=False)
+            time_stage(timings, "structural_metrics", calculate_structural_metrics, [pn_path], log_paths=[log_path])
+            time_stage(timings, "log_split", log_split, log, net)
+
+        sizes = {
+            "rows": len(df),
+            "traces": len(log),
+            "events": sum(len(trace) for trace in log),
+            "places": len(net.places),
+            "transitions": len(net.transitions),
+            "arcs": len(net.arcs),
+        }
+
+    return {
+        "parameters": parameters,
+        "sizes": sizes,
+        "seconds": {stage: float(np.median(timings[stage])) for stage in STAGES},
+        "all_seconds": timings,
+    }
+
+
+def run_sweep(sweep, values, base_parameters=None, repeats=1, work_dir=None):
+    """
+    This function runs the benchmark once for every value of one parameter, keeping the others fixed.
+
+    Inputs:
+    sweep: the name of the parameter to vary
+    values: the values of the parameter
+    base_parameters: the values of the other parameters, DEFAULT_PARAMETERS by default
+    repeats: the number of times each stage is timed
+    work_dir: the folder the temporary files are written to
+
+    Outputs:
+    results: a list with the result of run_benchmark for every value
+    """
+    if base_parameters is None:
+        base_parameters = DEFAULT_PARAMETERS
+
+    results = []
+    for value in values:
+        parameters = dict(base_parameters)
+        parameters[sweep] = value
+        print("benchmarking", sweep, "=", value)
+        results.append(run_benchmark(parameters, repeats=repeats, work_dir=work_dir))
+
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Time the stages of the workflow on synthetic retweet logs of increasing size.")
+    parser.add_argument("--sweep", type=str, default="n_posts", choices=["n_users", "n_posts", "trace_length", "coordinated_fraction"], help="Parameter to vary")
+    parser.add_argument("--values", type=float, nargs="+", default=[100, 200, 400, 800], help="Values of the swept parameter")
+    parser.add_argument("--n-users", type=int, default=DEFAULT_PARAMETERS["n_users"], help="Number of users")
+    parser.add_argument("--n-posts", type=int, default=DEFAULT_PARAMETERS["n_posts"], help="Number of retweeted posts")
+    parser.add_argument("--trace-length", type=int, default=DEFAULT_PARAMETERS["trace_length"], help="Mean number of retweets per post")
+    parser.add_argument("--coordinated-fraction", type=float, default=DEFAULT_PARAMETERS["coordinated_fraction"], help="Fraction of coordinated users")
+    parser.add_argument("--seed", type=int, default=DEFAULT_PARAMETERS["seed"], help="Seed of the synthetic datasets")
+    parser.add_argument("--repeats", type=int, default=1, help="Number of times each stage is timed")
+    parser.add_argument("--output", type=str, default="benchmark_results.json", help="JSON file the results are written to")
+    args = parser.parse_args()
+
+    base_parameters = {
+        "n_users": args.n_users,
+        "n_posts": args.n_posts,
+        "trace_length": args.trace_length,
+        "coordinated_fraction": args.coordinated_fraction,
+        "seed": args.seed,
+    }
+
+    # every parameter except the coordinated fraction is a count
+    values = args.values if args.sweep == "coordinated_fraction" else [int(value) for value in args.values]
+
+    results = run_sweep(args.sweep, values, base_parameters=base_parameters, repeats=args.repeats)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "sweep": args.sweep,
+        "repeats": args.repeats,
+        "results": results,
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for result in results:
+        print(args.sweep, "=", result["parameters"][args.sweep], {stage: round(seconds, 3) for stage, seconds in result["seconds"].items()})
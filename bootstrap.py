@@ -0,0 +1,283 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pm4py.objects.log.obj import EventLog, Trace, Event
+from pm4py.algo.conformance.tokenreplay import algorithm as token_replay
+
+from calculate_ks_entropy import count_replayed_place_activations, ks_entropy
+from free_choice_SPN import normalise_P, generate_F
+from petri_net_index import PetriNetIndex
+
+
+class BootstrapData:
+
+    """
+    The read-only inputs of a bootstrap over the traces of an event log. Everything that does not depend on the
+    resample is computed once: the token replay of each variant, the place activations of each variant and the
+    delays of F with the trace they were measured in. A resample is then just a vector of trace weights
+
+    Inputs:
+    net: the Petri net discovered from the event log
+    im: the initial marking
+    fm: the final marking
+    log: the event log as a ColumnarLog
+    fused: whether the place activations come from the token replay (as in calculate_ks_entropy with fused=True)
+    instead of the event labels
+
+    Attributes:
+    index: a PetriNetIndex of net
+    names: the transition names, in the column order of the matrices
+    places: the places counted from the event labels, in the column order of place_counts
+    variant_of_trace: an array with the variant index of each trace
+    firings: an array (variants x transitions) with the activations of each perfectly fitting variant, zero for
+    the others
+    place_counts: an array (variants x places) with the place activations of each variant
+    delay_transitions: an array with the transition (column) of each delay of F
+    delay_cases: an array with the trace of each delay of F
+    delays: an array with the delays of F in seconds
+    """
+
+    def __init__(self, net, im, fm, log, fused=False):
+        self.net = net
+        self.fused = fused
+        self.index = PetriNetIndex(net)
+        self.n_traces = len(log)
+
+        self.names = [t.name for t in net.transitions]
+        name_positions = {name: i for i, name in enumerate(self.names)}
+
+        # group the traces by variant
+        variant_ids = {}
+        self.variant_of_trace = np.empty(len(log), dtype=np.int64)
+        for i, labels in enumerate(log.traces()):
+            self.variant_of_trace[i] = variant_ids.setdefault(labels, len(variant_ids))
+        variants = list(variant_ids.keys())
+
+        # replay every variant once
+        variant_log = EventLog()
+        for labels in variants:
+            variant_log.append(Trace([Event({'concept:name': label}) for label in labels]))
+        parameters = {token_replay.Variants.TOKEN_REPLAY.value.Parameters.SHOW_PROGRESS_BAR: False}
+        fitness = token_replay.apply(variant_log, net, im, fm, parameters=parameters)
+
+        self.firings = np.zeros((len(variants), len(self.names)), dtype=np.int64)
+        for v, result in enumerate(fitness):
+            if result['trace_fitness'] == 1.0:
+                for transition in result['activated_transitions']:
+                    self.firings[v, name_positions[transition.name]] += 1
+
+        # count the single input place of the transition of each event, as count_place_activations does
+        self.places = []
+        place_positions = {}
+        rows = []
+        for labels in variants:
+            row = {}
+            for label in labels:
+                place = self.index.single_input_place(label)
+                if place is not None:
+                    if place not in place_positions:
+                        place_positions[place] = len(self.places)
+                        self.places.append(place)
+                    row[place_positions[place]] = row.get(place_positions[place], 0) + 1
+            rows.append(row)
+
+        self.place_counts = np.zeros((len(variants), len(self.places)), dtype=np.int64)
+        for v, row in enumerate(rows):
+            for position, count in row.items():
+                self.place_counts[v, position] = count
+
+        # the delays of F with the trace of each delay
+        F, F_cases = generate_F(net, log, index=self.index, return_cases=True)
+        self.delay_transitions = np.concatenate([np.full(len(F[name]), i, dtype=np.int64) for i, name in enumerate(self.names)] + [np.empty(0, dtype=np.int64)])
+        self.delay_cases = np.concatenate([np.asarray(F_cases[name], dtype=np.int64) for name in self.names] + [np.empty(0, dtype=np.int64)])
+        self.delays = np.concatenate([np.asarray(F[name], dtype=np.float64) for name in self.names] + [np.empty(0)])
+
+    def statistics(self, weights):
+        """
+        This function computes the statistics of a weighted resample of the traces.
+
+        Inputs:
+        weights: an array with the number of times each trace is drawn
+
+        Outputs:
+        ks: the KS entropy of the resample
+        mean_times: an array with the mean waiting time of each transition in the units of transition_mean_times,
+        NaN for the transitions left out because their delays sum to 0
+        """
+        variant_weights = np.bincount(self.variant_of_trace, weights=weights, minlength=len(self.firings))
+
+        # the transition and place counts of the resample are the weighted sums of the variant counts
+        freq = dict(zip(self.names, (variant_weights @ self.firings).tolist()))
+
+        if self.fused:
+            freq_of_places = count_replayed_place_activations(freq, self.net, self.index)
+        else:
+            place_totals = variant_weights @ self.place_counts
+            freq_of_places = {place: count for place, count in zip(self.places, place_totals.tolist()) if count > 0}
+
+        P = normalise_P(dict(freq), self.net, self.index)
+        ks = ks_entropy(freq_of_places, P, self.net, self.index)
+
+        # weighted per-transition means, with the same sum > 0 rule as transition_mean_times
+        delay_weights = weights[self.delay_cases]
+        totals = np.bincount(self.delay_transitions, weights=delay_weights * self.delays / 1000, minlength=len(self.names))
+        counts = np.bincount(self.delay_transitions, weights=delay_weights, minlength=len(self.names))
+
+        mean_times = np.full(len(self.names), np.nan)
+        nonzero = totals > 0
+        mean_times[nonzero] = totals[nonzero] / counts[nonzero]
+
+        return ks, mean_times
+
+
+def resample_statistics(data, seeds):
+    """
+    This function computes the statistics of one resample per seed.
+
+    Inputs:
+    data: a BootstrapData
+    seeds: a list of numpy SeedSequences, one per resample
+
+    Outputs:
+    ks_values: an array with the KS entropy of each resample
+    mean_times: an array (resamples x transitions) with the mean waiting times of each resample
+    """
+    ks_values = np.empty(len(seeds))
+    mean_times = np.empty((len(seeds), len(data.names)))
+
+    uniform = np.full(data.n_traces, 1 / data.n_traces)
+
+    for i, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        # drawing n traces with replacement is a multinomial draw of the number of copies of each trace
+        weights = rng.multinomial(data.n_traces, uniform).astype(np.float64)
+        ks_values[i], mean_times[i] = data.statistics(weights)
+
+    return ks_values, mean_times
+
+
+# the bootstrap inputs of the worker processes of bootstrap, set once per worker by init_bootstrap_worker
+worker_data = None
+
+
+def init_bootstrap_worker(data):
+    """
+    Stores the bootstrap inputs in a worker process so they are only sent to it once
+    """
+    global worker_data
+    worker_data = data
+
+
+def worker_resample_statistics(seeds):
+    """
+    Computes the statistics of a chunk of resamples on the inputs stored by init_bootstrap_worker
+    """
+    return resample_statistics(worker_data, seeds)
+
+
+def bootstrap(pn_file_path, log_file_path, resamples=1000, workers=1, seed=0, confidence=0.95, fused=False):
+    """
+    This function estimates percentile bootstrap intervals of the KS entropy and the mean waiting times of a Petri
+    net by resampling the traces of its event log with replacement. The seed of each resample is spawned from a
+    single SeedSequence, so the results do not depend on the number of workers.
+
+    Inputs:
+    pn_file_path: the path to the Petri net
+    log_file_path: the path to the event log
+    resamples: the number of bootstrap resamples
+    workers: the number of processes to spread the resamples over
+    seed: the seed of the resamples
+    confidence: the confidence level of the intervals
+    fused: whether the place activations of the KS entropy come from the token replay
+
+    Outputs:
+    results: a dictionary with the point estimate and the interval of the KS entropy ("ks_entropy"), of the average
+    wait time in seconds ("average_wait") and of the mean waiting time of each transition ("mean_waiting_times")
+    """
+    import pm4py
+    from log_cache import load_columnar_log
+
+    net, im, fm = pm4py.read_pnml(pn_file_path)
+    log = load_columnar_log(log_file_path)
+
+    data = BootstrapData(net, im, fm, log, fused=fused)
+
+    seeds = np.random.SeedSequence(seed).spawn(resamples)
+
+    if workers <= 1:
+        ks_values, mean_times = resample_statistics(data, seeds)
+    else:
+        n_chunks = min(resamples, workers * 4)
+        chunks = [seeds[i * resamples // n_chunks:(i + 1) * resamples // n_chunks] for i in range(n_chunks)]
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_bootstrap_worker, initargs=(data,)) as executor:
+            results = list(executor.map(worker_resample_statistics, chunks))
+
+        ks_values = np.concatenate([ks for ks, _ in results])
+        mean_times = np.concatenate([times for _, times in results])
+
+    # the point estimates are the statistics of the log itself, where every trace has weight 1
+    ks, point_mean_times = data.statistics(np.ones(data.n_traces))
+
+    # the average wait time printed by calculate_mean_waiting_time.py, per resample
+    average_waits = np.nanmean(mean_times, axis=1) * 1000
+
+    percentiles = [100 * (1 - confidence) / 2, 100 * (1 + confidence) / 2]
+
+    def interval(values):
+        return [float(v) for v in np.nanpercentile(values, percentiles)]
+
+    transition_intervals = {}
+    for i, name in enumerate(data.names):
+        if np.isnan(point_mean_times[i]):
+            continue
+        transition_intervals[name] = {"estimate": float(point_mean_times[i]), "interval": interval(mean_times[:, i])}
+
+    return {
+        "resamples": resamples,
+        "confidence": confidence,
+        "ks_entropy": {"estimate": float(ks), "interval": interval(ks_values)},
+        "average_wait": {"estimate": float(np.nanmean(point_mean_times) * 1000), "interval": interval(average_waits)},
+        "mean_waiting_times": transition_intervals,
+    }
+
+
+if __name__ == "__main__":
+    from load_config import load_config
+    import os
+    import json
+    import argparse
+
+    config = load_config()
+
+    parser = argparse.ArgumentParser(description="Bootstrap confidence intervals of the KS entropy and mean waiting times.")
+    parser.add_argument("--country", type=str, required=True, choices=["brazil", "uae", "spain", "honduras", "thailand", "thailand_split", "spain_split", "brazil_2_split"], help="Name of the country to bootstrap")
+    parser.add_argument("--resamples", type=int, default=1000, help="Number of bootstrap resamples")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes used for the resamples")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the resamples")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the intervals")
+    parser.add_argument("--fused", action="store_true", help="Take the place activations of the KS entropy from the token replay")
+    parser.add_argument("--output", type=str, default=None, help="JSON file the results are written to")
+    args = parser.parse_args()
+
+    # Construct dataset path
+
+    if args.country == "brazil":
+        uncoordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_2")
+        coordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_1")
+    else:
+        uncoordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_uncoordinated")
+        coordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_coordinated")
+
+    results = {}
+    for behaviour, data_path in [("uncoordinated", uncoordinated_data), ("coordinated", coordinated_data)]:
+        results[behaviour] = bootstrap(data_path + ".pnml", data_path + ".xes", resamples=args.resamples, workers=args.workers,
+                                       seed=args.seed, confidence=args.confidence, fused=args.fused)
+
+        print("KS entropy of", args.country, "(" + behaviour + "):", results[behaviour]["ks_entropy"]["estimate"],
+              str(int(args.confidence*100)) + "% interval", results[behaviour]["ks_entropy"]["interval"])
+        print("Average wait time in", args.country, behaviour + ":", results[behaviour]["average_wait"]["estimate"],
+              str(int(args.confidence*100)) + "% interval", results[behaviour]["average_wait"]["interval"])
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
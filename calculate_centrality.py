@@ -1,22 +1,213 @@
-def calculate_centrality(file_path):
+import numpy as np
+
+
+def calculate_centrality(file_path, approximate=False, samples=None, epsilon=None, seed=0, confidence=0.95):
+
+    """
+    This function calculates the average closeness, betweenness and eigenvector centrality of a Petri net.
+
+    Inputs:
+    file_path: the path to a Petri net
+    approximate: whether to estimate closeness and betweenness from a sample of pivot nodes instead of all nodes
+    samples: the number of pivots used when approximate is True
+    epsilon: the target error of the approximate averages, used to choose the number of pivots if samples is not given
+    seed: the seed used to sample the pivots
+    confidence: the confidence level of the reported intervals
+
+    Outputs:
+    average_cc: the average closeness centrality
+    average_between: the average betweenness centrality
+    average_eigen: the average eigenvector centrality
+    intervals: (only if approximate is True) a dictionary with the confidence intervals of the closeness and
+    betweenness estimates and the number of pivots used
+    """
 
     import pm4py
-    import networkx as nx
-    from pm4py.objects.petri_net.utils.networkx_graph import create_networkx_directed_graph
+    from net_graph import NetGraph
 
     net, im, fm = pm4py.read_pnml(file_path)
 
-    G, id = create_networkx_directed_graph(net)
+    graph = NetGraph.from_net(net)
+
+    return graph_centrality(graph, approximate=approximate, samples=samples, epsilon=epsilon, seed=seed, confidence=confidence)
+
+
+def graph_centrality(graph, approximate=False, samples=None, epsilon=None, seed=0, confidence=0.95):
+
+    """
+    This function calculates the average centralities of calculate_centrality from the NetGraph of a Petri net.
+    """
+
+    if approximate:
+        average_cc, average_between, intervals = approximate_centrality(graph, samples=samples, epsilon=epsilon, seed=seed, confidence=confidence)
+        average_eigen = average_eigenvector_centrality(graph)
+        return average_cc, average_between, average_eigen, intervals
+
+    G = networkx_graph(graph)
+
+    average_cc = average_closeness_centrality(G)
+    average_between = average_betweenness_centrality(G)
+    average_eigen = average_eigenvector_centrality(graph)
+
+    return average_cc, average_between, average_eigen
+
+
+def networkx_graph(graph):
+
+    """
+    Returns a networkx DiGraph with the nodes and edges of a NetGraph, using the node indices as nodes
+    """
+
+    import networkx as nx
+
+    G = nx.DiGraph()
+    G.add_nodes_from(range(graph.n_nodes))
+    G.add_edges_from(zip(np.repeat(np.arange(graph.n_nodes), np.diff(graph.indptr)).tolist(), graph.indices.tolist()))
+
+    return G
+
+
+def average_closeness_centrality(G):
+
+    """
+    Returns the exact average closeness centrality of the nodes of a networkx graph
+    """
+
+    import networkx as nx
+
     cc = nx.closeness_centrality(G)
+    return sum(cc.values())/len(cc)
+
+
+def average_betweenness_centrality(G):
+
+    """
+    Returns the exact average betweenness centrality of the nodes of a networkx graph
+    """
+
+    import networkx as nx
 
-    eigen = nx.eigenvector_centrality(G, max_iter=1000)
     between = nx.betweenness_centrality(G)
-    average_cc = sum(cc.values())/len(cc)
-    average_between = sum(between.values())/len(between)
-    average_eigen = sum(eigen.values())/len(eigen)
+    return sum(between.values())/len(between)
 
-    return average_cc, average_between, average_eigen
 
+def eigenvector_centrality(graph, max_iter=100, tol=1e-06):
+
+    """
+    This function calculates the eigenvector centrality of each node with a sparse power iteration. It follows the
+    iteration of networkx.eigenvector_centrality (repeated multiplication by A^T + I, starting from a uniform
+    vector), so it returns the same values.
+
+    Inputs:
+    graph: a NetGraph
+    max_iter: the maximum number of iterations
+    tol: the convergence tolerance, applied per node
+
+    Outputs:
+    x: an array with the eigenvector centrality of each node
+    """
+
+    import networkx as nx
+    from scipy.sparse import csr_matrix
+
+    n = graph.n_nodes
+    if n == 0:
+        raise nx.NetworkXPointlessConcept("cannot compute centrality for the null graph")
+
+    A = csr_matrix((np.ones(graph.n_edges), graph.indices, graph.indptr), shape=(n, n))
+    AT = A.T.tocsr()
+
+    x = np.full(n, 1.0 / n)
+
+    for _ in range(max_iter):
+        xlast = x
+        x = xlast + AT @ xlast
+        norm = np.linalg.norm(x) or 1
+        x = x / norm
+        if np.abs(x - xlast).sum() < n * tol:
+            return x
+
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+def average_eigenvector_centrality(graph, max_iter=1000):
+
+    """
+    Returns the average eigenvector centrality of the nodes of a NetGraph
+    """
+
+    return float(np.mean(eigenvector_centrality(graph, max_iter=max_iter)))
+
+
+def approximate_centrality(graph, samples=None, epsilon=None, seed=0, confidence=0.95):
+
+    """
+    This function estimates the average closeness and betweenness centrality of a graph from a random sample of
+    pivot nodes. Each pivot costs two breadth-first searches instead of the O(V*E) of exact betweenness.
+
+    The average closeness is the mean, over the pivots, of their closeness (computed exactly as networkx does,
+    from the distances of the nodes reaching them). The average normalised betweenness equals the mean over all
+    source nodes s of sum_t (d(s, t) - 1) / ((n - 1)(n - 2)), since every shortest path from s to t has d(s, t) - 1
+    inner nodes, so it is estimated by the mean of this quantity over the pivots. Both per-pivot values lie in
+    [0, 1], so the number of pivots for a target error epsilon is given by Hoeffding's inequality.
+
+    Inputs:
+    graph: a NetGraph
+    samples: the number of pivots
+    epsilon: the target error, used if samples is not given (defaults to 0.01)
+    seed: the seed used to sample the pivots
+    confidence: the confidence level of the reported intervals
+
+    Outputs:
+    average_cc: the estimated average closeness centrality
+    average_between: the estimated average betweenness centrality
+    intervals: a dictionary with the normal-approximation confidence intervals of both estimates, the number of
+    pivots and the confidence level
+    """
+
+    from scipy.stats import norm
+    from net_graph import bfs_distances
+
+    n = graph.n_nodes
+
+    if samples is None:
+        if epsilon is None:
+            epsilon = 0.01
+        samples = int(np.ceil(np.log(2 / (1 - confidence)) / (2 * epsilon ** 2)))
+    samples = max(1, min(samples, n))
+
+    rng = np.random.default_rng(seed)
+    pivots = rng.choice(n, size=samples, replace=False)
+
+    reverse_graph = graph.reverse()
+    dist = np.empty(n, dtype=np.int64)
+
+    closeness = np.zeros(samples)
+    betweenness = np.zeros(samples)
+    between_scale = 1 / ((n - 1) * (n - 2)) if n > 2 else 0.0
+
+    for i, pivot in enumerate(pivots):
+        # closeness uses the distances from the other nodes to the pivot
+        bfs_distances(reverse_graph, pivot, dist)
+        reached = dist[dist > 0]
+        if reached.sum() > 0 and n > 1:
+            closeness[i] = (len(reached) / reached.sum()) * (len(reached) / (n - 1))
+
+        # betweenness contribution of the shortest paths starting at the pivot
+        bfs_distances(graph, pivot, dist)
+        reached = dist[dist > 0]
+        betweenness[i] = (reached - 1).sum() * between_scale
+
+    # normal approximation with a finite population correction, which is 0 when every node is a pivot
+    z = norm.ppf((1 + confidence) / 2)
+    correction = np.sqrt((n - samples) / (n - 1)) if n > 1 else 0.0
+
+    intervals = {"samples": samples, "confidence": confidence}
+    for name, values in (("closeness", closeness), ("betweenness", betweenness)):
+        half_width = z * (values.std(ddof=1) if samples > 1 else 0.0) / np.sqrt(samples) * correction
+        intervals[name] = (float(values.mean() - half_width), float(values.mean() + half_width))
+
+    return float(closeness.mean()), float(betweenness.mean()), intervals
 
 
 if __name__ == "__main__":
@@ -28,6 +219,10 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--country", type=str, required=True, choices=["brazil", "uae", "spain", "honduras", "thailand", "thailand_split", "spain_split", "brazil_2_split"], help="Name of the country to calculate Petri net diameter for")
+    parser.add_argument("--approximate", action="store_true", help="Estimate closeness and betweenness from sampled pivot nodes")
+    parser.add_argument("--samples", type=int, default=None, help="Number of pivot nodes for the approximate mode")
+    parser.add_argument("--epsilon", type=float, default=None, help="Target error for the approximate mode, used if --samples is not given")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for sampling the pivot nodes")
     args = parser.parse_args()
 
     if args.country == "brazil":
@@ -37,8 +232,18 @@ if __name__ == "__main__":
         uncoordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_uncoordinated.pnml")
         coordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_coordinated.pnml")
 
-    average_cc_c, average_between_c, average_eigen_c = calculate_centrality(coordinated_data)
-    average_cc_u, average_between_u, average_eigen_u = calculate_centrality(uncoordinated_data)
+    if args.approximate:
+        average_cc_c, average_between_c, average_eigen_c, intervals_c = calculate_centrality(coordinated_data, approximate=True, samples=args.samples, epsilon=args.epsilon, seed=args.seed)
+        average_cc_u, average_between_u, average_eigen_u, intervals_u = calculate_centrality(uncoordinated_data, approximate=True, samples=args.samples, epsilon=args.epsilon, seed=args.seed)
+
+        print("Approximate closeness and betweenness centrality using", intervals_c["samples"], "(coordinated) and", intervals_u["samples"], "(uncoordinated) pivots")
+        print(str(int(intervals_c["confidence"]*100)) + "% confidence interval of closeness centrality of", args.country, "(coordinated):", intervals_c["closeness"])
+        print(str(int(intervals_c["confidence"]*100)) + "% confidence interval of betweenness centrality of", args.country, "(coordinated):", intervals_c["betweenness"])
+        print(str(int(intervals_u["confidence"]*100)) + "% confidence interval of closeness centrality of", args.country, "(uncoordinated):", intervals_u["closeness"])
+        print(str(int(intervals_u["confidence"]*100)) + "% confidence interval of betweenness centrality of", args.country, "(uncoordinated):", intervals_u["betweenness"])
+    else:
+        average_cc_c, average_between_c, average_eigen_c = calculate_centrality(coordinated_data)
+        average_cc_u, average_between_u, average_eigen_u = calculate_centrality(uncoordinated_data)
 
 
     print("Average closeness centrality of", args.country, "(coordinated):", average_cc_c)
@@ -1,3 +1,5 @@
+import os
+
 
 def get_operators(tree):
 
@@ -13,28 +15,28 @@ def get_operators(tree):
     # initialise the list to contain the operators
     operators = []
 
-    # Recursively traverses the tree starting from the given node.
-    # For each node with a defined operator, appends the operator to the `operators` list
-    # and continues the traversal on its children.
-    def recurse(node):
+    # Traverses the tree from the given node with an explicit stack, visiting the nodes in the same (pre-)order as
+    # a recursive traversal. For each node with a defined operator, appends the operator to the `operators` list
+    # and continues the traversal on its children. Deep trees do not hit the recursion limit.
+    stack = [tree]
+    while stack:
+        node = stack.pop()
         if node.operator is not None:
             operators.append(node.operator)
-            for child in node.children:
-                recurse(child)
-    recurse(tree)
+            stack.extend(reversed(node.children))
     return operators
 
 
-def find_gate_count(file_path):
+def discover_process_tree(file_path):
     """
-    This function discovers a process tree from an event log and then finds the number of XOR and AND gates in this process tree.
+    This function discovers a process tree from an event log with the inductive miner (IMf, noise threshold 0.2),
+    the same way the Petri nets are discovered in generate_petri_nets.py.
 
     Inputs:
     file_path: the path to an event log
 
     Outputs:
-    xor_count: the number of XOR gates in the discovered process tree
-    and_count: the number of AND gates in the discovered process tree
+    tree: the discovered process tree
     """
     from pm4py.algo.discovery.inductive import algorithm as inductive_miner
     from pm4py.objects.log.importer.xes.importer import apply as xes_importer
@@ -47,8 +49,72 @@ def find_gate_count(file_path):
         "noise_threshold": 0.2 
     }
 
-    tree = inductive_miner.apply(log, variant=inductive_miner.Variants.IMf, parameters=parameters)
+    return inductive_miner.apply(log, variant=inductive_miner.Variants.IMf, parameters=parameters)
+
+
+def load_process_tree(file_path, cache_dir=None):
+    """
+    This function loads the process tree of an event log. It uses the .ptml file saved next to the log when the
+    Petri net was discovered, as long as it is newer than the log. Otherwise the tree is discovered once and kept
+    in a cache keyed by the content hash of the log.
+
+    Inputs:
+    file_path: the path to an event log
+    cache_dir: the cache folder, by default the .spn_cache folder next to the event log
+
+    Outputs:
+    tree: the process tree
+    """
+    import pm4py
+    from pm4py.objects.process_tree.importer import importer as ptml_importer
+    from spn_cache import CACHE_VERSION, DEFAULT_MAX_BYTES, default_cache_dir, evict, file_hash, touch
+    from generate_petri_nets import tree_path_for
+
+    sidecar_path = tree_path_for(file_path)
+    if os.path.exists(sidecar_path) and os.path.getmtime(sidecar_path) >= os.path.getmtime(file_path):
+        return pm4py.read_ptml(sidecar_path)
+
+    if cache_dir is None:
+        cache_dir = default_cache_dir(file_path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    entry_path = os.path.join(cache_dir, "tree_" + str(CACHE_VERSION) + "_" + file_hash(file_path) + ".ptml")
+
+    try:
+        # read with the importer itself, which raises FileNotFoundError rather than a generic exception
+        tree = ptml_importer.apply(entry_path)
+    except FileNotFoundError:
+        # not cached yet, or evicted by another process
+        tree = None
+
+    if tree is not None:
+        touch(entry_path)
+        return tree
 
+    tree = discover_process_tree(file_path)
+
+    tmp_path = entry_path + "." + str(os.getpid()) + ".tmp.ptml"
+    pm4py.write_ptml(tree, tmp_path)
+    os.replace(tmp_path, entry_path)
+
+    evict(cache_dir, DEFAULT_MAX_BYTES)
+
+    return tree
+
+
+def find_gate_count(file_path):
+    """
+    This function loads the process tree of an event log and then finds the number of XOR and AND gates in this process tree.
+
+    Inputs:
+    file_path: the path to an event log
+
+    Outputs:
+    xor_count: the number of XOR gates in the discovered process tree
+    and_count: the number of AND gates in the discovered process tree
+    """
+
+    tree = load_process_tree(file_path)
 
     # find the operators in the process tree
 
@@ -70,6 +136,7 @@ def find_gate_count(file_path):
 
 if __name__ == "__main__":
     from load_config import load_config
+    from generate_petri_nets import dataset_stems
     import os
     import argparse
 
@@ -79,14 +146,10 @@ if __name__ == "__main__":
     parser.add_argument("--country", type=str, required=True, choices=["brazil", "uae", "spain", "honduras", "thailand", "thailand_split", "spain_split", "brazil_2_split"], help="Name of the country to calculate Petri net diameter for")
     args = parser.parse_args()
 
-    # Construct dataset path
-
-    if args.country == "brazil":
-        uncoordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_2.xes")
-        coordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_1.xes")
-    else:
-        uncoordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_uncoordinated.xes")
-        coordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_coordinated.xes")
+    # Construct dataset path, named as in generate_petri_nets.py so the process trees saved there are found
+    uncoordinated_stem, coordinated_stem = dataset_stems(config["project_root"], args.country.lower())
+    uncoordinated_data = uncoordinated_stem + ".xes"
+    coordinated_data = coordinated_stem + ".xes"
 
     u_xor_count, u_and_count = find_gate_count(uncoordinated_data)
     c_xor_count, c_and_count = find_gate_count(coordinated_data)
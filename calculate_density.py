@@ -10,14 +10,28 @@ def find_petri_net_density(file_path):
     """
 
     import pm4py
+    from net_graph import NetGraph
 
     net, im, fm = pm4py.read_pnml(file_path)
 
-    # calculate the total number of nodes
-    no_nodes = len(net.transitions) + len(net.places)
+    return petri_net_density(NetGraph.from_net(net))
 
-    # calculate the number of edges
-    no_edges = len(net.arcs)
+
+def petri_net_density(graph):
+    """
+    This function finds the density of a Petri net graph that is already built, using the density for a directed graph.
+
+    Inputs:
+    graph: the NetGraph of the Petri net
+
+    Outputs:
+    density: the density as a float
+    no_nodes: the number of places and transitions
+    """
+
+    # the nodes are the places and transitions, the edges are the arcs
+    no_nodes = graph.n_nodes
+    no_edges = graph.n_edges
 
     # calculate the density using the density of a directed graph
     density = no_edges/(no_nodes*(no_nodes - 1))
@@ -1,45 +1,55 @@
-def find_petri_net_diameter(file_path):
+def find_petri_net_diameter(file_path, workers=1, return_eccentricity=False):
 
     """
     This function finds the diameter of a Petri net using the longest shortest paths.
 
     Inputs:
     file_path: the file path to the Petri net
+    workers: the number of processes to spread the breadth-first searches over
+    return_eccentricity: whether to also return the eccentricity of each node
 
     Outputs:
     diameter: the diameter of the Petri net
+    eccentricity: a dictionary mapping each node name to its eccentricity (only if return_eccentricity is True)
     """
 
-    import networkx as nx
     import pm4py
+    from net_graph import NetGraph
 
     # read in the petri net path
     net, im, fm = pm4py.read_pnml(file_path)
 
-    # initialise a directed graph
-    G = nx.DiGraph()
+    # build a CSR adjacency with the places and transitions as nodes and the arcs as edges
+    graph = NetGraph.from_net(net)
 
-    # add the places from the net as nodes to G
-    for place in net.places:
-        G.add_node(place.name, type="place")
+    return petri_net_diameter(graph, workers=workers, return_eccentricity=return_eccentricity)
 
-    # add transitions from the net as nodes to G
-    for transition in net.transitions:
-        label = transition.label if transition.label else transition.name
-        G.add_node(transition.name, type="transition", label=label)
 
-    # add the arcs from the net as edges in G
-    for arc in net.arcs:
-        G.add_edge(arc.source.name, arc.target.name)
+def petri_net_diameter(graph, workers=1, return_eccentricity=False):
 
-    # find the shortest path length between all nodes in G
-    lengths = dict(nx.all_pairs_shortest_path_length(G))
+    """
+    This function finds the diameter of a Petri net graph by running a breadth-first search from every node and
+    keeping only the running maximum, so the all-pairs distances are never stored.
+
+    Inputs:
+    graph: the NetGraph of the Petri net
+    workers: the number of processes to spread the breadth-first searches over
+    return_eccentricity: whether to also return the eccentricity of each node
+
+    Outputs:
+    diameter: the diameter of the Petri net
+    eccentricity: a dictionary mapping each node name to its eccentricity (only if return_eccentricity is True)
+    """
+
+    from net_graph import eccentricities
+
+    # find the longest shortest path from each node
+    node_eccentricities = eccentricities(graph, workers=workers)
+
+    diameter = int(node_eccentricities.max()) if graph.n_nodes > 0 else 0
 
-    # find the longest shortest path
-    diameter = 0
-    for source in lengths:
-        for target in lengths[source]:
-            diameter = max(diameter, lengths[source][target])
+    if return_eccentricity:
+        return diameter, {name: int(e) for name, e in zip(graph.names, node_eccentricities)}
 
     return diameter
 
@@ -52,6 +62,7 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--country", type=str, required=True, choices=["brazil", "uae", "spain", "honduras", "thailand", "thailand_split", "spain_split", "brazil_2_split"], help="Name of the country to calculate Petri net diameter for")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes used for the breadth-first searches")
     args = parser.parse_args()
 
     # Construct dataset path
@@ -63,8 +74,8 @@ if __name__ == "__main__":
         uncoordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_uncoordinated.pnml")
         coordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_coordinated.pnml")
 
-    u_diameter = find_petri_net_diameter(uncoordinated_data)
-    c_diameter = find_petri_net_diameter(coordinated_data)
+    u_diameter = find_petri_net_diameter(uncoordinated_data, workers=args.workers)
+    c_diameter = find_petri_net_diameter(coordinated_data, workers=args.workers)
 
     print("Diameter of", args.country, "(uncoordinated): ", u_diameter)
     print("Diameter of", args.country, "(coordinated): ", c_diameter)
\ No newline at end of file
@@ -1,6 +1,8 @@
 import pm4py
-from free_choice_SPN import generate_P
-from pm4py.objects.log.importer.xes import importer as xes_importer
+from free_choice_SPN import generate_P, count_activated_transitions, normalise_P
+from petri_net_index import PetriNetIndex
+from log_cache import load_columnar_log
+from spn_cache import cached_parameters
 import numpy as np
 
 # Because a free-choice stochastic Petri net cannot be precisely represented as a Markov chain, its behavior can be approximated using a reachability graph. 
@@ -15,81 +17,119 @@ import numpy as np
 # (*) States with outgoing transitions of probability 1 make no contribution to the Kolmogorov–Sinai entropy, by definition.
 
 
-def get_preceding_places(petri_net, transition):
+def get_preceding_places(petri_net, transition, index=None):
     """
     Get the preceding places of a given transition in a Petri net.
 
     Parameters:
     - petri_net: The Petri net object.
     - transition: The transition object.
+    - index: A PetriNetIndex of the Petri net. If not given, the arcs are scanned.
 
     Returns:
     - List of preceding places.
     """
+    if index is not None:
+        return index.input_nodes(transition)
     preceding_places = [arc.source for arc in petri_net.arcs if arc.target == transition]
     return preceding_places
 
-def get_output_transitions(petri_net, place):
+def get_output_transitions(petri_net, place, index=None):
     """
     Get the output transitions of a given place in a Petri net.
 
     Parameters:
     - petri_net: The Petri net object.
     - place: The place object.
+    - index: A PetriNetIndex of the Petri net. If not given, the arcs are scanned.
 
     Returns:
     - List of output transitions.
     """
+    if index is not None:
+        return index.output_nodes(place)
     output_transitions = [arc.target for arc in petri_net.arcs if arc.source == place]
     return output_transitions
 
 
-def get_transition_by_name(transitions, name):
+def count_place_activations(log, index):
     """
-    Get a transition object by its name.
-    
+    Count how often each place enables the next firing transition in an event log, taking the single input place
+    of the transition of each event. Events whose transition has several input places, or whose label is not in
+    the net, are not counted.
+
     Parameters:
-    - transitions: List of Transition objects.
-    - name: The name of the transition to find.
+    - log: A ColumnarLog.
+    - index: A PetriNetIndex of the Petri net.
 
     Returns:
-    - The transition object if found, else None.
+    - Dictionary mapping each activated place to its number of activations.
     """
-    for transition in transitions:
-        if transition.label == name:
-            return transition
-    return None
+    places = []
+    place_positions = {}
 
-def calculate_ks_entropy(pn_file_path, log_file_path):
-    net, im, fm = pm4py.read_pnml(pn_file_path)
-    variant = xes_importer.Variants.ITERPARSE
-    parameters = {variant.value.Parameters.TIMESTAMP_SORT: True}
-    log = xes_importer.apply(log_file_path, variant=variant, parameters=parameters)
+    # map every activity code of the log to the position of its single input place, or -1
+    place_of_code = np.full(len(log.labels), -1, dtype=np.int64)
+    for code, label in enumerate(log.labels):
+        place = index.single_input_place(label)
+        if place is not None:
+            if place not in place_positions:
+                place_positions[place] = len(places)
+                places.append(place)
+            place_of_code[code] = place_positions[place]
+
+    event_places = place_of_code[np.asarray(log.activities)]
+    counts = np.bincount(event_places[event_places >= 0], minlength=len(places))
 
+    return {place: int(count) for place, count in zip(places, counts) if count > 0}
+
+
+def count_replayed_place_activations(freq, net, index):
+    """
+    Count how often each place enables the next firing transition from the transition firing counts of a token
+    replay. Every firing of a transition is attributed to one representative of its input places (the one with the
+    smallest name), so transitions after silent transitions and joins are counted too. In a free-choice net the
+    transitions of a choice share their input places, so a choice is counted once under a single place.
+
+    Parameters:
+    - freq: Dictionary mapping each transition name to its number of activations, as returned by
+    count_activated_transitions.
+    - net: The Petri net object.
+    - index: A PetriNetIndex of the Petri net.
+
+    Returns:
+    - Dictionary mapping each activated place to its number of activations.
+    """
     freq_of_places = {}
+    for transition in net.transitions:
+        count = freq.get(transition.name, 0)
+        places = get_preceding_places(net, transition, index)
+        if count > 0 and len(places) > 0:
+            place = min(places, key=lambda p: p.name)
+            freq_of_places[place] = freq_of_places.get(place, 0) + count
+    return freq_of_places
 
 
-    for trace in log:
-        for activity in trace:
-            name = activity["concept:name"]
-            transition = get_transition_by_name(net.transitions, name)
-            places = get_preceding_places(net,transition)
-            if len(places) == 1:
-                place = places[0]
-                if place not in freq_of_places:
-                    freq_of_places[place] = 1
-                else:
-                    freq_of_places[place] += 1
+def ks_entropy(freq_of_places, P, net, index=None):
+    """
+    Calculate the Kolmogorov-Sinai entropy from the place activation counts and the transition probabilities.
+
+    Parameters:
+    - freq_of_places: Dictionary mapping each activated place to its number of activations.
+    - P: Dictionary mapping each transition name to its probability, as returned by generate_P.
+    - net: The Petri net object.
+    - index: A PetriNetIndex of the Petri net.
 
+    Returns:
+    - The KS entropy.
+    """
     total = sum(freq_of_places.values())
 
     mu = {k: v / total for k, v in freq_of_places.items()}
 
-    P = generate_P(log, net, im, fm)
-
     ks = 0
     for place in mu:
-        transitions = get_output_transitions(net, place)
+        transitions = get_output_transitions(net, place, index)
         total_sum = 0
         for transition in transitions:
             if P[transition.name] > 0:
@@ -99,6 +139,68 @@ def calculate_ks_entropy(pn_file_path, log_file_path):
     return ks
 
 
+def calculate_ks_entropy(pn_file_path, log_file_path, workers=1, columnar=False, use_cache=True, fused=False, return_excluded=False):
+    """
+    Calculate the KS entropy of a Petri net discovered from an event log.
+
+    Parameters:
+    - pn_file_path: The path to the Petri net.
+    - log_file_path: The path to the event log.
+    - workers: The number of processes used to replay the event log.
+    - columnar: Whether the transition probabilities are replayed on the columnar log instead of a pm4py EventLog.
+    - use_cache: Whether to reuse the replay results cached for the same log and Petri net.
+    - fused: Whether to take both the place activations and the transition probabilities from a single token
+    replay of the log. Otherwise the place activations are counted from the event labels, which skips the
+    transitions with several input places, and the log is replayed for the transition probabilities only.
+    - return_excluded: Whether to also return the number of traces left out of the replay.
+
+    Returns:
+    - The KS entropy.
+    - The number of traces left out of the replay because they do not fit the Petri net perfectly, or None if fused
+    is False as they are not counted then (only if return_excluded is True).
+    """
+    net, im, fm = pm4py.read_pnml(pn_file_path)
+
+    index = PetriNetIndex(net)
+
+    log = load_columnar_log(log_file_path)
+
+    # the transitions are replayed on the columnar log, or on the pm4py EventLog built from it
+    replay_log = log if columnar else log.to_event_log()
+
+    if fused:
+        def replay():
+            freq, excluded = count_activated_transitions(replay_log, net, im, fm, workers=workers, return_excluded=True)
+            return {"freq": freq, "excluded": excluded}
+
+        if use_cache:
+            counts = cached_parameters("replay", log_file_path, pn_file_path, replay)
+        else:
+            counts = replay()
+
+        freq_of_places = count_replayed_place_activations(counts["freq"], net, index)
+        P = normalise_P(dict(counts["freq"]), net, index)
+
+        ks = ks_entropy(freq_of_places, P, net, index)
+
+        if return_excluded:
+            return ks, counts["excluded"]
+        return ks
+
+    freq_of_places = count_place_activations(log, index)
+
+    if use_cache:
+        P = cached_parameters("P", log_file_path, pn_file_path, lambda: generate_P(replay_log, net, im, fm, index=index, workers=workers))
+    else:
+        P = generate_P(replay_log, net, im, fm, index=index, workers=workers)
+
+    ks = ks_entropy(freq_of_places, P, net, index)
+
+    if return_excluded:
+        return ks, None
+    return ks
+
+
 if __name__ == "__main__":
     from load_config import load_config
     import os
@@ -108,6 +210,10 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--country", type=str, required=True, choices=["brazil", "uae", "spain", "honduras", "thailand", "thailand_split", "spain_split", "brazil_2_split"], help="Name of the country to calculate Petri net diameter for")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes used to replay the event logs")
+    parser.add_argument("--columnar", action="store_true", help="Use the columnar, integer-encoded event log representation")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute the transition probabilities instead of reusing cached ones")
+    parser.add_argument("--fused", action="store_true", help="Take the place activations and transition probabilities from a single replay of each event log")
     args = parser.parse_args()
 
     # Construct dataset path
@@ -119,8 +225,15 @@ if __name__ == "__main__":
         uncoordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_uncoordinated")
         coordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_coordinated")
 
-    ks_u = calculate_ks_entropy(uncoordinated_data + ".pnml", uncoordinated_data + ".xes")
-    ks_c = calculate_ks_entropy(coordinated_data + ".pnml", coordinated_data + ".xes")
+    if args.fused:
+        ks_u, excluded_u = calculate_ks_entropy(uncoordinated_data + ".pnml", uncoordinated_data + ".xes", workers=args.workers, columnar=args.columnar, use_cache=not args.no_cache, fused=True, return_excluded=True)
+        ks_c, excluded_c = calculate_ks_entropy(coordinated_data + ".pnml", coordinated_data + ".xes", workers=args.workers, columnar=args.columnar, use_cache=not args.no_cache, fused=True, return_excluded=True)
+
+        print("Traces excluded for imperfect fitness in", args.country, "(uncoordinated):", excluded_u)
+        print("Traces excluded for imperfect fitness in", args.country, "(coordinated):", excluded_c)
+    else:
+        ks_u = calculate_ks_entropy(uncoordinated_data + ".pnml", uncoordinated_data + ".xes", workers=args.workers, columnar=args.columnar, use_cache=not args.no_cache)
+        ks_c = calculate_ks_entropy(coordinated_data + ".pnml", coordinated_data + ".xes", workers=args.workers, columnar=args.columnar, use_cache=not args.no_cache)
 
     print("KS entropy of", args.country, "(uncoordinated):", ks_u)
     print("KS entropy of", args.country, "(coordinated): ", ks_c)
\ No newline at end of file
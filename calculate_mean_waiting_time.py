@@ -1,12 +1,13 @@
 import pm4py
 from free_choice_SPN import generate_F
-from pm4py.objects.log.importer.xes import importer as xes_importer
+from log_cache import load_columnar_log
+from spn_cache import cached_parameters
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.stats import ks_2samp
 
 
-def calculate_mean_waiting_times(c_input_file, u_input_file):
+def calculate_mean_waiting_times(c_input_file, u_input_file, use_cache=True):
 
     """
     This function calculates the mean waiting times for an uncoordinated and coordinated dataset using the event log and Petri net.
@@ -14,79 +15,89 @@ def calculate_mean_waiting_times(c_input_file, u_input_file):
     Inputs:
     c_input_file - the input path for the coordinated dataset
     u_input_file - the input path for the uncoordianted dataset
+    use_cache - whether to reuse the delays F cached for unchanged event logs and Petri nets
 
     Outputs:
     mean_timesc - the mean time differences for the coordinated data
     mean_timesu - the mean time differences for the uncoordinated data
     """
 
-    netc, initial_markingc, final_markingc = pm4py.read_pnml(c_input_file + ".pnml")
-    variant = xes_importer.Variants.ITERPARSE
-    parameters = {variant.value.Parameters.TIMESTAMP_SORT: True}
-    logc = xes_importer.apply(c_input_file + '.xes', variant=variant, parameters=parameters)
+    def compute_F(input_file):
+        net, initial_marking, final_marking = pm4py.read_pnml(input_file + ".pnml")
+        log = load_columnar_log(input_file + ".xes")
+        return generate_F(net, log)
 
-    netu, initial_markingu, final_markingu = pm4py.read_pnml(u_input_file + ".pnml")
-    logu = xes_importer.apply(u_input_file + ".xes", variant=variant, parameters=parameters)
+    if use_cache:
+        Fc = cached_parameters("F", c_input_file + ".xes", c_input_file + ".pnml", lambda: compute_F(c_input_file))
+        Fu = cached_parameters("F", u_input_file + ".xes", u_input_file + ".pnml", lambda: compute_F(u_input_file))
+    else:
+        Fc = compute_F(c_input_file)
+        Fu = compute_F(u_input_file)
 
-    Fc = generate_F(netc, logc)
-    Fu = generate_F(netu, logu)
 
+    mean_timesc = transition_mean_times(Fc)
+    mean_timesu = transition_mean_times(Fu)
 
-    mean_timesc = []
-    mean_timesu = []
+    return mean_timesc, mean_timesu
 
-    for f in Fc:
-        sum = 0
-        cnt = 0
-        for t in Fc[f]:
-            sum+=t/1000
-            cnt+=1
-        if sum > 0:
-            avg = sum/cnt
-            mean_timesc.append(avg)
-    mean_timesc = np.array(mean_timesc)
 
-    for f in Fu:
-        sum = 0
-        cnt = 0
-        for t in Fu[f]:
-            sum+=t/1000
-            cnt+=1
-        if sum > 0:
-            avg = sum/cnt
-            mean_timesu.append(avg)
 
-    mean_timesu = np.array(mean_timesu)
+def transition_mean_times(F):
 
-    return mean_timesc, mean_timesu
+    """
+    This function calculates the mean delay of each transition, in thousands of seconds, with NumPy reductions over
+    the delays of all transitions at once. Transitions whose delays sum to 0 are left out.
 
+    Inputs:
+    F - a dictionary mapping each transition name to its list of delays in seconds, as returned by generate_F
 
+    Outputs:
+    mean_times - an array with the mean delay of each remaining transition, in the order of F
+    """
 
-if __name__ == "__main__":
-    from load_config import load_config
-    import os
-    import argparse
+    lengths = np.array([len(times) for times in F.values()], dtype=np.int64)
+    delays = np.concatenate([np.asarray(times, dtype=np.float64) for times in F.values()] + [np.empty(0)]) / 1000
 
-    config = load_config()
+    # bincount adds the delays of each transition in order, like a running sum
+    totals = np.bincount(np.repeat(np.arange(len(lengths)), lengths), weights=delays, minlength=len(lengths))
+
+    nonzero = totals > 0
+
+    return totals[nonzero] / lengths[nonzero]
 
-    parser = argparse.ArgumentParser(description="Run script for each country.")
-    parser.add_argument("--country", type=str, required=True, choices = ["uae", "brazil", "honduras", "spain", "thailand", "thailand_split", "spain_split", "brazil_2_split"], help="Country name (lowercase)")
-    args = parser.parse_args()
 
-    if args.country == "brazil":
-        c_input_file = os.path.join(config['project_root'], "data", args.country + "_1")
-        u_input_file = os.path.join(config['project_root'], "data", args.country + "_2")
+def input_files(country, project_root):
+
+    """
+    Returns the paths (without extension) of the coordinated and uncoordinated event log and Petri net of a country
+    """
+
+    import os
+
+    if country == "brazil":
+        c_input_file = os.path.join(project_root, "data", country + "_1")
+        u_input_file = os.path.join(project_root, "data", country + "_2")
     else:
-        c_input_file = os.path.join(config['project_root'], "data", args.country + "_coordinated")
-        u_input_file = os.path.join(config['project_root'], "data", args.country + "_uncoordinated")
+        c_input_file = os.path.join(project_root, "data", country + "_coordinated")
+        u_input_file = os.path.join(project_root, "data", country + "_uncoordinated")
 
+    return c_input_file, u_input_file
 
 
+def plot_waiting_times(mean_timesc, mean_timesu, country, output_path=None):
 
-    mean_timesc, mean_timesu = calculate_mean_waiting_times(c_input_file, u_input_file)
+    """
+    This function plots the histograms of the mean waiting times of the coordinated and uncoordinated datasets.
 
-    num_bins1=round(max(mean_timesc)*6)
-    num_bins2=round(max(mean_timesu)*6)
+    Inputs:
+    mean_timesc - the mean time differences for the coordinated data
+    mean_timesu - the mean time differences for the uncoordinated data
+    country - the name of the country, used in the title
+    output_path - if given, the plot is saved to this image file instead of being shown
+    """
+
+    num_bins1=max(1, round(max(mean_timesc)*6))
+    num_bins2=max(1, round(max(mean_timesu)*6))
     # Create histogram bins
 
 
@@ -98,23 +109,113 @@ if __name__ == "__main__":
     # Labels and title
     plt.xlabel('Time in seconds')
     plt.ylabel('Density')
-    plt.title('User waiting times in ' + args.country.capitalize() + ' split model')
+    plt.title('User waiting times in ' + country.capitalize() + ' split model')
     plt.legend()
     plt.grid(axis='y', linestyle='--', alpha=0.7)
     plt.xlim(0, 15) 
     plt.ylim(0, 0.5) 
 
-    # Show the plot
-    plt.show()
+    if output_path is None:
+        # Show the plot
+        plt.show()
+    else:
+        plt.savefig(output_path)
+        plt.close()
+
+
+def run_batch_country(country, project_root, output_dir, use_cache=True):
+
+    """
+    This function runs the waiting time comparison of one country without a display. The mean waiting times, the
+    two-sample KS test and the histograms are written to the output folder as <country>_waiting_times.npz,
+    <country>_ks_2samp.json and <country>_waiting_times.png.
+
+    Inputs:
+    country - the name of the country
+    project_root - the project root folder, containing the data folder
+    output_dir - the folder the results are written to
+    use_cache - whether to reuse the delays F cached for unchanged event logs and Petri nets
+
+    Outputs:
+    results - a dictionary with the KS statistic, the p-value and the average wait times
+    """
+
+    import os
+    import json
+    import matplotlib
+
+    # render to files only, so no window has to be closed
+    matplotlib.use("Agg")
+
+    c_input_file, u_input_file = input_files(country, project_root)
+
+    mean_timesc, mean_timesu = calculate_mean_waiting_times(c_input_file, u_input_file, use_cache=use_cache)
+
+    np.savez(os.path.join(output_dir, country + "_waiting_times.npz"), coordinated=mean_timesc, uncoordinated=mean_timesu)
+
+    plot_waiting_times(mean_timesc, mean_timesu, country, output_path=os.path.join(output_dir, country + "_waiting_times.png"))
 
     ks_statistic, p_value = ks_2samp(mean_timesc, mean_timesu)
-    print(p_value)
 
-    if args.country == "brazil":
-        print("Average wait time in " + args.country + "_2_split_coordinated:", np.mean(mean_timesc)*1000)
-        print("Average wait time in " + args.country + "_2_split_uncoordinated:", np.mean(mean_timesu)*1000)
+    results = {
+        "country": country,
+        "ks_statistic": float(ks_statistic),
+        "p_value": float(p_value),
+        "average_wait_coordinated": float(np.mean(mean_timesc)*1000),
+        "average_wait_uncoordinated": float(np.mean(mean_timesu)*1000),
+    }
+
+    with open(os.path.join(output_dir, country + "_ks_2samp.json"), "w") as f:
+        json.dump(results, f, indent=2)
+
+    return results
+
+
+if __name__ == "__main__":
+    from load_config import load_config
+    import os
+    import argparse
+
+    config = load_config()
+
+    parser = argparse.ArgumentParser(description="Run script for each country.")
+    countries = ["uae", "brazil", "honduras", "spain", "thailand", "thailand_split", "spain_split", "brazil_2_split"]
+    country_group = parser.add_mutually_exclusive_group(required=True)
+    country_group.add_argument("--country", type=str, choices = countries, help="Country name (lowercase)")
+    country_group.add_argument("--countries", type=str, nargs="+", choices = countries, help="Country names to process without a display, writing the results to --output-dir")
+    parser.add_argument("--output-dir", type=str, default=None, help="Folder the results of --countries are written to (default: <project_root>/results)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of countries processed in parallel with --countries")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute the waiting time distributions instead of reusing cached ones")
+    args = parser.parse_args()
+
+    if args.countries is not None:
+        from concurrent.futures import ProcessPoolExecutor
+
+        output_dir = args.output_dir
+        if output_dir is None:
+            output_dir = os.path.join(config['project_root'], "results")
+        os.makedirs(output_dir, exist_ok=True)
+
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(run_batch_country, country, config['project_root'], output_dir, not args.no_cache) for country in args.countries]
+            for future in futures:
+                results = future.result()
+                print(results["country"] + ":", "KS statistic", results["ks_statistic"], "p-value", results["p_value"])
+                print("Average wait time in " + results["country"] + " coordinated:", results["average_wait_coordinated"])
+                print("Average wait time in " + results["country"] + " uncoordinated:", results["average_wait_uncoordinated"])
     else:
-        print("Average wait time in " + args.country + " coordinated:", np.mean(mean_timesc)*1000)
-        print("Average wait time in " + args.country + " uncoordinated:", np.mean(mean_timesu)*1000)
+        c_input_file, u_input_file = input_files(args.country, config['project_root'])
+
+        mean_timesc, mean_timesu = calculate_mean_waiting_times(c_input_file, u_input_file, use_cache=not args.no_cache)
+
+        plot_waiting_times(mean_timesc, mean_timesu, args.country)
 
+        ks_statistic, p_value = ks_2samp(mean_timesc, mean_timesu)
+        print(p_value)
 
+        if args.country == "brazil":
+            print("Average wait time in " + args.country + "_2_split_coordinated:", np.mean(mean_timesc)*1000)
+            print("Average wait time in " + args.country + "_2_split_uncoordinated:", np.mean(mean_timesu)*1000)
+        else:
+            print("Average wait time in " + args.country + " coordinated:", np.mean(mean_timesc)*1000)
+            print("Average wait time in " + args.country + " uncoordinated:", np.mean(mean_timesu)*1000)
@@ -0,0 +1,195 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# the structural measures that can be requested, in the order they are reported
+METRICS = ["density", "diameter", "closeness", "betweenness", "eigenvector", "gates"]
+
+
+def compute_metric(metric, graph, log_path=None, approximate=False, samples=None, epsilon=None, seed=0):
+
+    """
+    This function computes one structural measure of a Petri net from its NetGraph.
+
+    Inputs:
+    metric: the name of the measure, one of METRICS
+    graph: the NetGraph of the Petri net
+    log_path: the path to the event log the Petri net was discovered from, needed for the gate counts
+    approximate: whether to estimate closeness and betweenness from sampled pivot nodes
+    samples: the number of pivots used when approximate is True
+    epsilon: the target error used to choose the number of pivots if samples is not given
+    seed: the seed used to sample the pivots
+
+    Outputs:
+    values: a dictionary with the values of the measure
+    """
+
+    if metric == "density":
+        from calculate_density import petri_net_density
+        density, no_nodes = petri_net_density(graph)
+        return {"density": density, "nodes": no_nodes}
+
+    if metric == "diameter":
+        from calculate_diameter import petri_net_diameter
+        return {"diameter": petri_net_diameter(graph)}
+
+    if metric in ("closeness", "betweenness"):
+        import calculate_centrality
+
+        if approximate:
+            average_cc, average_between, intervals = calculate_centrality.approximate_centrality(graph, samples=samples, epsilon=epsilon, seed=seed)
+            value = average_cc if metric == "closeness" else average_between
+            return {metric: value, metric + "_interval": list(intervals[metric]), metric + "_samples": intervals["samples"]}
+
+        G = calculate_centrality.networkx_graph(graph)
+        if metric == "closeness":
+            return {"closeness": calculate_centrality.average_closeness_centrality(G)}
+        return {"betweenness": calculate_centrality.average_betweenness_centrality(G)}
+
+    if metric == "eigenvector":
+        import networkx as nx
+        from calculate_centrality import average_eigenvector_centrality
+
+        # the power iteration does not converge on every net, which should not lose the other measures
+        try:
+            return {"eigenvector": average_eigenvector_centrality(graph)}
+        except nx.PowerIterationFailedConvergence:
+            return {"eigenvector": None}
+
+    if metric == "gates":
+        from calculate_constructs import find_gate_count
+
+        if log_path is None or not os.path.exists(log_path):
+            return {"xor_gates": None, "and_gates": None}
+
+        xor_count, and_count = find_gate_count(log_path)
+        return {"xor_gates": xor_count, "and_gates": and_count}
+
+    raise ValueError(f"Unknown metric {metric}, expected one of {METRICS}")
+
+
+def timed_metric(metric, graph, log_path, options):
+
+    """
+    Computes one measure with compute_metric and returns it with its computation time in seconds
+    """
+
+    start = time.perf_counter()
+    values = compute_metric(metric, graph, log_path, **options)
+    return values, time.perf_counter() - start
+
+
+def calculate_structural_metrics(pn_paths, metrics=None, log_paths=None, workers=1, approximate=False, samples=None, epsilon=None, seed=0):
+
+    """
+    This function computes a set of structural measures for several Petri nets. Each Petri net is read once and
+    converted to a single NetGraph shared by all of its measures, and the independent measures of all nets are
+    evaluated concurrently.
+
+    Inputs:
+    pn_paths: a list of paths to Petri nets
+    metrics: a list of measures to compute from METRICS, by default all of them
+    log_paths: a list with the path to the event log of each Petri net (used for the gate counts), by default the
+    .xes file next to each Petri net
+    workers: the number of processes to spread the measures over
+    approximate: whether to estimate closeness and betweenness from sampled pivot nodes
+    samples: the number of pivots used when approximate is True
+    epsilon: the target error used to choose the number of pivots if samples is not given
+    seed: the seed used to sample the pivots
+
+    Outputs:
+    records: a list with one dictionary of results per Petri net, in the order of pn_paths
+    """
+
+    import pm4py
+    from net_graph import NetGraph
+
+    if metrics is None:
+        metrics = METRICS
+    if log_paths is None:
+        log_paths = [os.path.splitext(pn_path)[0] + ".xes" for pn_path in pn_paths]
+
+    options = {"approximate": approximate, "samples": samples, "epsilon": epsilon, "seed": seed}
+
+    records = []
+    tasks = []
+
+    for pn_path, log_path in zip(pn_paths, log_paths):
+        net, im, fm = pm4py.read_pnml(pn_path)
+        graph = NetGraph.from_net(net)
+
+        record = {"net": pn_path, "log": log_path, "seconds": {}}
+        records.append(record)
+        tasks.extend((record, metric, graph, log_path) for metric in metrics)
+
+    if workers <= 1:
+        results = [timed_metric(metric, graph, log_path, options) for _, metric, graph, log_path in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(timed_metric, metric, graph, log_path, options) for _, metric, graph, log_path in tasks]
+            results = [future.result() for future in futures]
+
+    for (record, metric, _, _), (values, seconds) in zip(tasks, results):
+        record.update(values)
+        record["seconds"][metric] = seconds
+
+    return records
+
+
+def write_records(records, output_path):
+
+    """
+    This function appends the results of calculate_structural_metrics to a JSON lines file, one line per Petri net.
+
+    Inputs:
+    records: the list of dictionaries returned by calculate_structural_metrics
+    output_path: the path to the JSON lines file
+    """
+
+    with open(output_path, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    from load_config import load_config
+    import argparse
+
+    config = load_config()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--country", type=str, required=True, choices=["brazil", "uae", "spain", "honduras", "thailand", "thailand_split", "spain_split", "brazil_2_split"], help="Name of the country to calculate the structural measures for")
+    parser.add_argument("--metrics", type=str, nargs="+", choices=METRICS, default=METRICS, help="Structural measures to calculate")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes used to calculate the measures")
+    parser.add_argument("--output", type=str, default=None, help="JSON lines file the results are appended to")
+    parser.add_argument("--approximate", action="store_true", help="Estimate closeness and betweenness from sampled pivot nodes")
+    parser.add_argument("--samples", type=int, default=None, help="Number of pivot nodes for the approximate mode")
+    parser.add_argument("--epsilon", type=float, default=None, help="Target error for the approximate mode, used if --samples is not given")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for sampling the pivot nodes")
+    args = parser.parse_args()
+
+    # Construct dataset path
+
+    if args.country == "brazil":
+        uncoordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_2.pnml")
+        coordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_1.pnml")
+    else:
+        uncoordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_uncoordinated.pnml")
+        coordinated_data = os.path.join(config["project_root"], "data", args.country.lower() + "_coordinated.pnml")
+
+    output_path = args.output
+    if output_path is None:
+        output_path = os.path.join(config["project_root"], "data", "structural_metrics.jsonl")
+
+    records = calculate_structural_metrics([uncoordinated_data, coordinated_data], metrics=args.metrics, workers=args.workers,
+                                           approximate=args.approximate, samples=args.samples, epsilon=args.epsilon, seed=args.seed)
+
+    for record, behaviour in zip(records, ["uncoordinated", "coordinated"]):
+        record["country"] = args.country
+        record["behaviour"] = behaviour
+        for key, value in record.items():
+            if key not in ("net", "log", "seconds", "country", "behaviour"):
+                print(key, "of", args.country, "(" + behaviour + "):", value)
+
+    write_records(records, output_path)
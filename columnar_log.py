@@ -0,0 +1,167 @@
+import numpy as np
+
+
+class ColumnarLog:
+
+    """
+    A compact columnar representation of an event log. The events of all traces are stored back to back in
+    integer arrays, with the activity labels encoded as codes into a label dictionary
+
+    Inputs:
+    case_ids: a list with the concept:name of each trace
+    case_offsets: an int64 array of length len(case_ids) + 1 where the events of trace i are
+    case_offsets[i]:case_offsets[i+1]
+    activities: an int32 array of activity codes, one per event
+    timestamps: an int64 array of event timestamps in nanoseconds since the epoch (UTC), one per event
+    labels: a list of activity labels, where labels[code] is the label of code
+
+    Attributes:
+    label_codes: a dictionary mapping each activity label to its code
+    """
+
+    def __init__(self, case_ids, case_offsets, activities, timestamps, labels):
+        self.case_ids = case_ids
+        self.case_offsets = case_offsets
+        self.activities = activities
+        self.timestamps = timestamps
+        self.labels = labels
+        self.label_codes = {label: code for code, label in enumerate(labels)}
+
+    @classmethod
+    def from_event_log(cls, log):
+        """
+        Builds a columnar log from a pm4py EventLog, keeping the order of its traces and events
+        """
+        import pandas as pd
+
+        case_ids = []
+        lengths = []
+        names = []
+        times = []
+
+        for trace in log:
+            case_ids.append(trace.attributes.get('concept:name'))
+            lengths.append(len(trace))
+            for event in trace:
+                names.append(event['concept:name'])
+                times.append(event['time:timestamp'])
+
+        case_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        case_offsets[1:] = np.cumsum(lengths)
+
+        # encode the labels in order of first occurrence
+        codes, uniques = pd.factorize(pd.Series(names, dtype=object), sort=False)
+        activities = codes.astype(np.int32)
+        labels = list(uniques)
+
+        timestamps = pd.to_datetime(pd.Series(times, dtype=object), utc=True).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+        return cls(case_ids, case_offsets, activities, timestamps, labels)
+
+    @classmethod
+    def from_xes(cls, file_path):
+        """
+        Reads an XES file with the ITERPARSE importer, sorting each trace by timestamp, and builds a columnar log
+        """
+        from pm4py.objects.log.importer.xes import importer as xes_importer
+
+        variant = xes_importer.Variants.ITERPARSE
+        parameters = {variant.value.Parameters.TIMESTAMP_SORT: True}
+        log = xes_importer.apply(file_path, variant=variant, parameters=parameters)
+
+        return cls.from_event_log(log)
+
+    def __len__(self):
+        return len(self.case_ids)
+
+    @property
+    def n_events(self):
+        return len(self.activities)
+
+    def case_lengths(self):
+        """
+        Returns an array with the number of events of each trace
+        """
+        return np.diff(self.case_offsets)
+
+    def case_index(self):
+        """
+        Returns an array with the index of the trace of each event
+        """
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.case_lengths())
+
+    def code_of(self, label):
+        """
+        Returns the code of an activity label, or -1 if the label does not occur in the log
+        """
+        return self.label_codes.get(label, -1)
+
+    def trace_labels(self, i):
+        """
+        Returns the activity labels of trace i as a tuple
+        """
+        codes = self.activities[self.case_offsets[i]:self.case_offsets[i + 1]]
+        return tuple(self.labels[code] for code in codes)
+
+    def traces(self):
+        """
+        Iterates over the activity labels of each trace
+        """
+        for i in range(len(self)):
+            yield self.trace_labels(i)
+
+    def variants(self):
+        """
+        Groups the traces by variant
+
+        Outputs:
+        variants: a list of (activity labels, count) pairs, one per distinct variant in order of first occurrence
+        """
+        variants = {}
+        for labels in self.traces():
+            variants[labels] = variants.get(labels, 0) + 1
+        return list(variants.items())
+
+    def select_cases(self, selection):
+        """
+        Returns a new columnar log containing the selected traces, in their current order
+
+        Inputs:
+        selection: a boolean mask over the traces, or an array of trace indices
+        """
+        selection = np.asarray(selection)
+        if selection.dtype == bool:
+            selection = np.flatnonzero(selection)
+
+        starts = self.case_offsets[selection]
+        lengths = self.case_offsets[selection + 1] - starts
+
+        case_offsets = np.zeros(len(selection) + 1, dtype=np.int64)
+        case_offsets[1:] = np.cumsum(lengths)
+
+        # positions of the events of the selected traces
+        positions = np.repeat(starts - case_offsets[:-1], lengths) + np.arange(case_offsets[-1])
+
+        return ColumnarLog([self.case_ids[i] for i in selection], case_offsets, self.activities[positions],
+                           self.timestamps[positions], self.labels)
+
+    def to_event_log(self):
+        """
+        Converts the columnar log back to a pm4py EventLog with UTC timestamps, for the functions replaying it.
+        Only the concept:name of the traces and the concept:name and time:timestamp of the events are restored
+        """
+        import pandas as pd
+        from pm4py.objects.log.obj import EventLog, Trace, Event
+
+        times = pd.to_datetime(self.timestamps, utc=True).to_pydatetime()
+        labels = self.labels
+
+        log = EventLog()
+        for i in range(len(self)):
+            start, end = self.case_offsets[i], self.case_offsets[i + 1]
+            trace = Trace(attributes={'concept:name': self.case_ids[i]})
+            for j in range(start, end):
+                trace.append(Event({'concept:name': labels[self.activities[j]], 'time:timestamp': times[j]}))
+            log.append(trace)
+
+        return log
@@ -0,0 +1,201 @@
+import os
+from abc import ABC, abstractmethod
+
+# the columns of the events produced by the adapters
+EVENT_COLUMNS = ['case:concept:name', 'concept:name', 'time:timestamp', 'group']
+
+
+def event_frame(df, case_column, activity_column, time_column, group):
+
+    """
+    This function selects the case, activity and timestamp columns of a DataFrame as events of a group.
+
+    Inputs:
+    df: a DataFrame with one event per row
+    case_column: the column with the case (retweeted post) of each event
+    activity_column: the column with the activity (user) of each event
+    time_column: the column with the time of each event
+    group: the group of the events, a single name or one name per row
+
+    Outputs:
+    events: a DataFrame with the columns of EVENT_COLUMNS, in the order of df
+    """
+
+    events = df.loc[:, [case_column, activity_column, time_column]]
+    events.columns = EVENT_COLUMNS[:3]
+    events['group'] = group
+
+    return events.reset_index(drop=True)
+
+
+class DatasetAdapter(ABC):
+
+    """
+    An adapter of a raw dataset to the event log engine of generate_event_logs.py. It lists the sources of a
+    country, parts of the dataset that can be read independently, and maps the records of each source to events
+    (case, activity, timestamp, group), where the group is the event log the event belongs to. A new dataset only
+    needs a subclass implementing sources and read_source, and an entry in ADAPTERS.
+
+    Inputs:
+    country: the name of the country
+    log_length: desired length of the event logs
+    trim_length: length to trim each trace to
+
+    Attributes:
+    groups: a dictionary with the file name (without extension) of the event log of each group
+    """
+
+    def __init__(self, country, log_length, trim_length=10):
+        self.country = country
+        self.log_length = log_length
+        self.trim_length = trim_length
+        self.groups = {"coordinated": country + "_coordinated", "uncoordinated": country + "_uncoordinated"}
+
+    @abstractmethod
+    def sources(self, project_root):
+        """
+        Returns the list of sources of the dataset, which are passed to read_source in the worker processes
+        """
+
+    @abstractmethod
+    def read_source(self, source):
+        """
+        Returns the events of a source as a DataFrame with the columns of EVENT_COLUMNS
+        """
+
+    def order_events(self, df):
+        """
+        Returns the events of one group in the order of its event log. They are sorted by time, and events at the
+        same time keep the order of the sources
+        """
+        return df.sort_values(by='time:timestamp', kind='stable')
+
+
+class JsonlinesAdapter(DatasetAdapter):
+
+    """
+    The adapter of the UAE and Honduras jsonlines datasets, with one source per file: the "bad" file holds the
+    coordinated events and the "good" file the uncoordinated ones.
+
+    Inputs:
+    country: uae or honduras
+    log_length: desired length of the event logs
+    trim_length: length to trim each trace to
+    stream: whether to read the files with read_events_streaming, keeping only the fields used
+    chunksize: number of lines read at a time when stream is True
+    assume_sorted: whether the files are sorted by time, so that read_events_streaming stops once each event log
+    is determined
+    """
+
+    def __init__(self, country, log_length, trim_length=10, stream=False, chunksize=100000, assume_sorted=False):
+        super().__init__(country, log_length, trim_length)
+        self.stream = stream
+        self.chunksize = chunksize
+        self.assume_sorted = assume_sorted
+
+    def sources(self, project_root):
+        return [(os.path.join(project_root, "data", self.country + "-bad-anonymized"), "coordinated"),
+                (os.path.join(project_root, "data", self.country + "-good-anonymized"), "uncoordinated")]
+
+    def read_source(self, source):
+        from generate_logs_uae_honduras import read_events, read_events_streaming
+
+        file_path, group = source
+
+        if self.stream:
+            df = read_events_streaming(file_path, self.trim_length, self.log_length, chunksize=self.chunksize, assume_sorted=self.assume_sorted)
+        else:
+            df = read_events(file_path)
+
+        return event_frame(df, 'retweet_tweetid', 'userid', 'tweet_time', group)
+
+
+class ParquetAdapter(DatasetAdapter):
+
+    """
+    The adapter of the Spain and Thailand parquet datasets. All files of a country are one source, read by a single
+    pyarrow dataset scan that is already parallel, and split into groups on is_control.
+    """
+
+    def sources(self, project_root):
+        folder_path = os.path.join(project_root, "data", "raw_data")
+        return [sorted(os.path.join(folder_path, filename) for filename in os.listdir(folder_path)
+                       if filename.lower().startswith(self.country) and filename.lower().endswith('.gzip.parquet'))]
+
+    def read_source(self, source):
+        import pandas as pd
+        from generate_logs_spain_thailand import scan_reposts
+
+        uncoordinated_df, coordinated_df = scan_reposts(source)
+
+        return pd.concat([event_frame(coordinated_df, 'case:concept:name', 'concept:name', 'time:timestamp', "coordinated"),
+                          event_frame(uncoordinated_df, 'case:concept:name', 'concept:name', 'time:timestamp', "uncoordinated")],
+                         ignore_index=True)
+
+
+class BrazilAdapter(DatasetAdapter):
+
+    """
+    The adapter of the Brazil CSV dataset, with one source per CSV file. The users with a bot score of >= 0.9 are
+    coordinated (brazil_1) and the users with a bot score of <= 0.1 uncoordinated (brazil_2), and only the earliest
+    retweet of each user of each retweeted tweet is kept.
+
+    Inputs:
+    country: brazil
+    log_length: desired length of the event logs
+    trim_length: length to trim each trace to
+    chunksize: number of rows of a CSV file read at a time
+    """
+
+    def __init__(self, country, log_length, trim_length=10, chunksize=100000):
+        super().__init__(country, log_length, trim_length)
+        self.chunksize = chunksize
+        self.groups = {"coordinated": country + "_1", "uncoordinated": country + "_2"}
+
+    def sources(self, project_root):
+        folder_path = os.path.join(project_root, "data", "brazil_elections-2018")
+        return [os.path.join(folder_path, filename) for filename in os.listdir(folder_path) if filename.endswith(".csv")]
+
+    def read_source(self, source):
+        import numpy as np
+        from generate_logs_brazil import read_brazil_csv, format_brazil_events
+
+        df = format_brazil_events(read_brazil_csv(source, chunksize=self.chunksize))
+
+        # read_brazil_csv only keeps the rows with a bot score of >= 0.9 or <= 0.1
+        group = np.where(df['botscore'] >= 0.9, "coordinated", "uncoordinated")
+
+        return event_frame(df, 'retweet_tweetid', 'userid', 'tweet_time', group)
+
+    def order_events(self, df):
+        from generate_logs_brazil import earliest_events
+
+        return earliest_events(super().order_events(df))
+
+
+# the adapter class and log length of each country
+ADAPTERS = {
+    "uae": (JsonlinesAdapter, 300),
+    "honduras": (JsonlinesAdapter, 400),
+    "spain": (ParquetAdapter, 3000),
+    "thailand": (ParquetAdapter, 1500),
+    "brazil": (BrazilAdapter, 200),
+}
+
+
+def get_adapter(country, **kwargs):
+
+    """
+    This function creates the adapter of a country from ADAPTERS.
+
+    Inputs:
+    country: the name of the country
+    kwargs: further arguments of the adapter class, such as stream for the jsonlines datasets
+
+    Outputs:
+    adapter: the DatasetAdapter of the country
+    """
+
+    adapter_class, log_length = ADAPTERS[country]
+
+    return adapter_class(country, log_length, **kwargs)
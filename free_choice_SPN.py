@@ -1,50 +1,245 @@
 import numpy as np
-from pm4py.objects.log.obj import EventLog
+from concurrent.futures import ProcessPoolExecutor
+from pm4py.objects.log.obj import EventLog, Trace, Event
 from pm4py.algo.conformance.tokenreplay import algorithm as token_replay
 from tqdm import tqdm
+from petri_net_index import PetriNetIndex
+from columnar_log import ColumnarLog
 
-def generate_P(log, net, im, fm):
+def group_variants(log):
 
     """
-    Generates the dictionary P containing probabilities of transitioning to some transition
+    Groups the traces of an event log by variant (their sequence of activity labels)
 
     Inputs:
     log: the event log
+
+    Outputs:
+    variants: a list of (trace, count) pairs, one per distinct variant in order of first occurrence,
+    where trace is the first trace of the log with that variant
+    """
+
+    variants = {}
+
+    for trace in log:
+        variant = tuple(event['concept:name'] for event in trace)
+        if variant in variants:
+            variants[variant][1] += 1
+        else:
+            variants[variant] = [trace, 1]
+
+    return [(trace, count) for trace, count in variants.values()]
+
+
+def label_variants(log, replay_variants=True):
+
+    """
+    Lists the traces of an event log or columnar log as activity label sequences for replay
+
+    Inputs:
+    log: the event log, or a ColumnarLog
+    replay_variants: if True, the traces are grouped by variant, otherwise each trace is listed with a count of 1
+
+    Outputs:
+    variants: a list of (activity labels, count) pairs
+    """
+
+    if isinstance(log, ColumnarLog):
+        if replay_variants:
+            return log.variants()
+        return [(labels, 1) for labels in log.traces()]
+
+    if replay_variants:
+        units = group_variants(log)
+    else:
+        units = [(trace, 1) for trace in log]
+
+    return [(tuple(event['concept:name'] for event in trace), count) for trace, count in units]
+
+
+def replay_label_variants(variants, net, im, fm, show_progress_bar=False, return_excluded=False):
+
+    """
+    Replays activity label sequences on a Petri net in a single token replay call
+
+    Inputs:
+    variants: a list of (activity labels, count) pairs
+    net: the Petri net
+    im: the initial marking
+    fm: the final marking
+    show_progress_bar: whether pm4py shows its replay progress bar
+    return_excluded: whether to also return the number of traces that were not counted
+
+    Outputs:
+    freq: a dictionary mapping transition names to the number of times they were activated by the perfectly
+    fitting variants, weighted by the variant counts
+    excluded: the number of traces whose variant does not fit the net perfectly (only if return_excluded is True)
+    """
+
+    variant_log = EventLog()
+    for labels, count in variants:
+        variant_log.append(Trace([Event({'concept:name': label}) for label in labels]))
+
+    parameters = {token_replay.Variants.TOKEN_REPLAY.value.Parameters.SHOW_PROGRESS_BAR: show_progress_bar}
+    fitness = token_replay.apply(variant_log, net, im, fm, parameters=parameters)
+
+    freq = {}
+    excluded = 0
+    for (labels, count), result in zip(variants, fitness):
+        if result['trace_fitness'] == 1.0:
+            for transition in result['activated_transitions']:
+                freq[transition.name] = freq.get(transition.name, 0) + count
+        else:
+            excluded += count
+
+    if return_excluded:
+        return freq, excluded
+
+    return freq
+
+
+# the Petri net replayed by the worker processes of generate_P, set once per worker by init_replay_worker
+replay_worker_net = None
+
+
+def init_replay_worker(net, im, fm):
+
+    """
+    Stores the Petri net and its markings in a replay worker process so they are only sent to it once
+    """
+
+    global replay_worker_net
+    replay_worker_net = (net, im, fm)
+
+
+def replay_variant_chunk(variants):
+
+    """
+    Replays a chunk of variants on the Petri net stored by init_replay_worker
+
+    Inputs:
+    variants: a list of (activity labels, count) pairs
+
+    Outputs:
+    freq: the activation counts returned by replay_label_variants
+    excluded: the number of traces of the chunk that do not fit the net perfectly
+    """
+
+    net, im, fm = replay_worker_net
+
+    return replay_label_variants(variants, net, im, fm, return_excluded=True)
+
+
+def count_activated_transitions(log, net, im, fm, replay_variants=True, workers=1, return_excluded=False):
+
+    """
+    Counts how often each transition is activated when the perfectly fitting traces of a log are replayed on a Petri net
+
+    Inputs:
+    log: the event log, or a ColumnarLog
     net: the Petri net discovered from the event log
     im: the initial marking
     fm: the final marking
+    replay_variants: if True, each distinct variant is replayed once in a single token replay call and its
+    activated transitions are weighted by the variant frequency. If False, each trace is replayed on its own
+    workers: the number of processes to replay with. If more than 1, the traces (or variants) are split into
+    chunks replayed in a process pool, and the counts are merged so that they are identical to a serial run
+    return_excluded: whether to also return the number of traces that were not counted
 
     Outputs:
-    P: the dictionary containing transition probabilities
+    freq: a dictionary mapping each transition name to its number of activations
+    excluded: the number of traces left out because they do not fit the net perfectly (only if return_excluded
+    is True)
     """
 
     keys = [t.name for t in net.transitions]
 
     # initialise the frequency dict
     freq = {key: 0 for key in keys}
+    excluded = 0
+
+    if workers > 1:
+        units = label_variants(log, replay_variants)
+
+        # split into a few chunks per worker to balance the load
+        n_chunks = min(len(units), workers * 4)
+        chunks = [units[i * len(units) // n_chunks:(i + 1) * len(units) // n_chunks] for i in range(n_chunks)]
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_replay_worker, initargs=(net, im, fm)) as executor:
+            # merge the chunk counts in chunk order
+            for chunk_freq, chunk_excluded in tqdm(executor.map(replay_variant_chunk, chunks), total=len(chunks)):
+                for name, count in chunk_freq.items():
+                    freq[name] += count
+                excluded += chunk_excluded
+    elif isinstance(log, ColumnarLog):
+        units = label_variants(log, replay_variants)
+        units_freq, excluded = replay_label_variants(units, net, im, fm, show_progress_bar=True, return_excluded=True)
+        for name, count in units_freq.items():
+            freq[name] += count
+    elif replay_variants:
+        variants = group_variants(log)
+
+        # replay one trace per variant in a single call
+        variant_log = EventLog()
+        for trace, count in variants:
+            variant_log.append(trace)
+        fitness = token_replay.apply(variant_log, net, im, fm)
+
+        for (trace, count), result in zip(variants, fitness):
+            if result['trace_fitness'] == 1.0:
+                # weight the activated transitions of the variant by its frequency in the log
+                for transition in result['activated_transitions']:
+                    freq[transition.name] += count
+            else:
+                excluded += count
+    else:
+        for trace in tqdm(log):
+            # find fitness of trace to petri net
+            trace_log = EventLog()
+            trace_log.append(trace)
+            fitness = token_replay.apply(trace_log, net, im, fm)
+
+            if fitness[0]['trace_fitness'] == 1.0:
+                # if trace is in net, get the activated transitions required to achieve this trace in net
+                activated_transitions = fitness[0]['activated_transitions']
+
+                # update frequencies
+                for transition in activated_transitions:
+                    label = transition.name
+                    freq[label] += 1
+            else:
+                excluded += 1
+
+    if return_excluded:
+        return freq, excluded
+
+    return freq
+
+
+def normalise_P(freq, net, index=None):
 
-    for trace in tqdm(log):
-        # find fitness of trace to petri net
-        trace_log = EventLog()
-        trace_log.append(trace)
-        fitness = token_replay.apply(trace_log, net, im, fm)
+    """
+    Turns transition activation counts into the probabilities of choosing each output transition of a place.
+    The counts are normalised in place
 
-        if fitness[0]['trace_fitness'] == 1.0:
-            # if trace is in net, get the activated transitions required to achieve this trace in net
-            activated_transitions = fitness[0]['activated_transitions']
+    Inputs:
+    freq: a dictionary mapping each transition name to its number of activations
+    net: the Petri net
+    index: a PetriNetIndex of net, built if not given
 
-            # update frequencies
-            for transition in activated_transitions:
-                label = transition.name
-                freq[label] += 1
-    
+    Outputs:
+    P: the dictionary containing transition probabilities
+    """
+
+    if index is None:
+        index = PetriNetIndex(net)
 
     places = [p for p in net.places]
 
     P = freq
 
     for place in places:
-        outgoing_transitions = [arc.target for arc in net.arcs if arc.source == place]
+        outgoing_transitions = index.output_nodes(place)
         
         # find number of output transitions per place
         total = 0
@@ -62,7 +257,32 @@ def generate_P(log, net, im, fm):
     return P
 
 
-def find_previous_transitions(net, current_transition, visited_transitions=None, visited_places=None):
+def generate_P(log, net, im, fm, replay_variants=True, index=None, workers=1):
+
+    """
+    Generates the dictionary P containing probabilities of transitioning to some transition
+
+    Inputs:
+    log: the event log, or a ColumnarLog
+    net: the Petri net discovered from the event log
+    im: the initial marking
+    fm: the final marking
+    replay_variants: if True, each distinct variant is replayed once in a single token replay call and its
+    activated transitions are weighted by the variant frequency. If False, each trace is replayed on its own
+    index: a PetriNetIndex of net, built if not given
+    workers: the number of processes to replay with. If more than 1, the traces (or variants) are split into
+    chunks replayed in a process pool, and the counts are merged so that P is identical to a serial run
+
+    Outputs:
+    P: the dictionary containing transition probabilities
+    """
+
+    freq = count_activated_transitions(log, net, im, fm, replay_variants=replay_variants, workers=workers)
+
+    return normalise_P(freq, net, index)
+
+
+def find_previous_transitions(net, current_transition, visited_transitions=None, visited_places=None, index=None):
 
     """
     Finds the previous possible non-silent transitions from some starting transition
@@ -70,10 +290,13 @@ def find_previous_transitions(net, current_transition, visited_transitions=None,
     Inputs:
     net: a Petri net
     current_transition: the transition to find all previous transitions from
+    index: a PetriNetIndex of net, built if not given
 
     Outputs:
     transition_list: a list of previous possible transitions
     """
+    if index is None:
+        index = PetriNetIndex(net)
     if visited_transitions is None:
         visited_transitions = set()
     if visited_places is None:
@@ -85,7 +308,7 @@ def find_previous_transitions(net, current_transition, visited_transitions=None,
     
     while len(transition_list) == 0:
         # find associated places for the current transition
-        places = [arc.source for arc in net.arcs if arc.target == current_transition]
+        places = index.input_nodes(current_transition)
 
         # break while loop if no more previous transitions
         if len(places) == 0 or places[0].name == 'source':
@@ -95,7 +318,7 @@ def find_previous_transitions(net, current_transition, visited_transitions=None,
         if len(places) > 1:
             synchronised_transitions = []
             for place in places:
-                input_transitions = [arc.source for arc in net.arcs if arc.target == place]
+                input_transitions = index.input_nodes(place)
 
                 for t in input_transitions:
                     visited_transitions.add(t)
@@ -105,7 +328,7 @@ def find_previous_transitions(net, current_transition, visited_transitions=None,
                     if t.label is not None:
                         synchronised_transitions.append(t)
                     else:
-                        synchronised_transitions.extend(find_previous_transitions(net, t, visited_transitions, visited_places))
+                        synchronised_transitions.extend(find_previous_transitions(net, t, visited_transitions, visited_places, index))
 
             flat_synchronised_transitions = [item for sublist in synchronised_transitions for item in (sublist if isinstance(sublist, list) else [sublist])]
 
@@ -120,7 +343,7 @@ def find_previous_transitions(net, current_transition, visited_transitions=None,
             
             visited_places.add(place)  # mark the place as visited
             
-            input_transitions = [arc.source for arc in net.arcs if arc.target == place]
+            input_transitions = index.input_nodes(place)
             
             for input_transition in input_transitions:
                 if input_transition in visited_transitions:
@@ -133,7 +356,7 @@ def find_previous_transitions(net, current_transition, visited_transitions=None,
                     found_transition = True
 
                 if input_transition.label is None:
-                    transition_list.extend(find_previous_transitions(net, input_transition, visited_transitions, visited_places))
+                    transition_list.extend(find_previous_transitions(net, input_transition, visited_transitions, visited_places, index))
 
         # if no transition was found, break the loop
         if not found_transition:
@@ -141,69 +364,203 @@ def find_previous_transitions(net, current_transition, visited_transitions=None,
     
     return transition_list
 
-def generate_F(net, log):
+def find_all_previous_transitions(net, index=None):
+
+    """
+    Finds the previous possible non-silent transitions of every visible transition in a Petri net. Each transition
+    gets its own walk of find_previous_transitions, so the result is exactly that of calling it on every transition
+    (including the order of the arcs where the walk depends on it), but all the walks share one PetriNetIndex
+    instead of scanning net.arcs for every place and transition they visit
+
+    Inputs:
+    net: a Petri net
+    index: a PetriNetIndex of net, built if not given
+
+    Outputs:
+    previous_transitions_dict: a dictionary mapping each visible transition to its list of previous possible
+    transitions, as returned by find_previous_transitions
+    """
+
+    if index is None:
+        index = PetriNetIndex(net)
+
+    previous_transitions_dict = {}
+
+    for transition in net.transitions:
+        if transition.label is not None:
+            previous_transitions_dict[transition] = find_previous_transitions(net, transition, index=index)
+
+    return previous_transitions_dict
+
+
+def build_columnar_delay_index(log, return_cases=False):
+
+    """
+    Collects the directly-follows delays of a columnar log with array operations
+
+    Inputs:
+    log: a ColumnarLog
+    return_cases: whether to also return the trace of each delay
+
+    Outputs:
+    directly_follows_delays: a dictionary mapping each (previous label, current label) pair to the list of delays
+    in seconds between directly-following events with those labels, in log order
+    directly_follows_cases: a dictionary with the same keys mapping to the index of the trace of each delay
+    (only if return_cases is True)
+    """
+
+    if log.n_events < 2:
+        if return_cases:
+            return {}, {}
+        return {}
+
+    # pairs of consecutive events that belong to the same trace
+    same_case = np.ones(log.n_events - 1, dtype=bool)
+    boundaries = log.case_offsets[1:-1] - 1
+    same_case[boundaries[(boundaries >= 0) & (boundaries < log.n_events - 1)]] = False
+
+    n_labels = len(log.labels)
+    pairs = log.activities[:-1][same_case].astype(np.int64) * n_labels + log.activities[1:][same_case]
+    delays = np.diff(log.timestamps)[same_case] / 1e9
+
+    # group the delays by pair, keeping log order within each pair
+    order = np.argsort(pairs, kind='stable')
+    unique_pairs, starts = np.unique(pairs[order], return_index=True)
+    grouped_delays = np.split(delays[order], starts[1:])
+
+    directly_follows_delays = {}
+    for pair, pair_delays in zip(unique_pairs, grouped_delays):
+        directly_follows_delays[(log.labels[pair // n_labels], log.labels[pair % n_labels])] = pair_delays.tolist()
+
+    if return_cases:
+        grouped_cases = np.split(log.case_index()[:-1][same_case][order], starts[1:])
+        directly_follows_cases = {}
+        for pair, pair_cases in zip(unique_pairs, grouped_cases):
+            directly_follows_cases[(log.labels[pair // n_labels], log.labels[pair % n_labels])] = pair_cases.tolist()
+        return directly_follows_delays, directly_follows_cases
+
+    return directly_follows_delays
+
+
+def columnar_synchronised_delays(log, key_label, t_list_names, return_cases=False):
+
+    """
+    Finds, for every trace containing the key event and any of the synchronised events at once, the minimum
+    non-negative delay between the last key event and a synchronised event
+
+    Inputs:
+    log: a ColumnarLog
+    key_label: the label of the transition the delays lead to
+    t_list_names: the labels of the synchronised previous transitions
+    return_cases: whether to also return the trace of each delay
+
+    Outputs:
+    delay_time: a list of delays in seconds, one per contributing trace in log order
+    delay_cases: a list with the index of the trace of each delay (only if return_cases is True)
+    """
+
+    key_code = log.code_of(key_label)
+    candidate_codes = [log.code_of(name) for name in t_list_names if log.code_of(name) >= 0]
+
+    if key_code < 0 or len(candidate_codes) == 0:
+        return ([], []) if return_cases else []
+
+    case_index = log.case_index()
+
+    # the last key event of each trace containing it
+    key_positions = np.flatnonzero(log.activities == key_code)
+    key_cases = case_index[key_positions]
+    is_last = np.ones(len(key_positions), dtype=bool)
+    is_last[:-1] = key_cases[1:] != key_cases[:-1]
+    key_positions = key_positions[is_last]
+    key_cases = key_cases[is_last]
+    key_timestamps = log.timestamps[key_positions]
+
+    candidate_positions = np.flatnonzero(np.isin(log.activities, candidate_codes))
+    if len(key_positions) == 0 or len(candidate_positions) == 0:
+        return ([], []) if return_cases else []
+    candidate_cases = case_index[candidate_positions]
+    candidate_timestamps = log.timestamps[candidate_positions]
+
+    # rank all timestamps so that (trace, timestamp) pairs can be sorted and searched as single integers
+    ranks = np.unique(np.concatenate([candidate_timestamps, key_timestamps]), return_inverse=True)[1]
+    n_ranks = ranks.max() + 1
+    candidate_keys = candidate_cases * n_ranks + ranks[:len(candidate_positions)]
+    key_keys = key_cases * n_ranks + ranks[len(candidate_positions):]
+
+    order = np.argsort(candidate_keys, kind='stable')
+    candidate_keys = candidate_keys[order]
+    candidate_cases = candidate_cases[order]
+    candidate_timestamps = candidate_timestamps[order]
+
+    # the latest synchronised event of the same trace at or before the last key event gives the minimum delay
+    found = np.searchsorted(candidate_keys, key_keys, side='right') - 1
+    valid = found >= 0
+    valid[valid] = candidate_cases[found[valid]] == key_cases[valid]
+
+    deltas = key_timestamps[valid] - candidate_timestamps[found[valid]]
+
+    if return_cases:
+        return (deltas / 1e9).tolist(), key_cases[valid].tolist()
+
+    return (deltas / 1e9).tolist()
+
+
+def generate_F(net, log, index=None, previous_transitions_dict=None, return_cases=False):
 
     """
     Finds a dictionary of pdfs associated with each transitions in the net
 
     Inputs:
     net: the Petri net
-    log: the event log the Petri net was discovered from
+    log: the event log the Petri net was discovered from, or a ColumnarLog of it
+    index: a PetriNetIndex of net, built if not given
+    previous_transitions_dict: the output of find_all_previous_transitions for net, computed if not given
+    return_cases: whether to also return the trace each delay was measured in
 
     Outputs:
     F: a dictionary containing pdfs for each key (transition in the Petri net)
+    F_cases: a dictionary mapping each transition name to the index of the trace of each of its delays in F
+    (only if return_cases is True)
     """
 
-    transitions = [t for t in net.transitions if t.label is not None]
-
-    previous_transitions_dict = {t: 0 for t in transitions}
+    if index is None:
+        index = PetriNetIndex(net)
 
     # generate a dictionary of previous possible transitions
-    for t in transitions:
-        previous_transitions_dict[t] = find_previous_transitions(net, t)
+    if previous_transitions_dict is None:
+        previous_transitions_dict = find_all_previous_transitions(net, index)
 
     
+    # encode the log once, then collect its directly-follows delays in a single pass
+    if not isinstance(log, ColumnarLog):
+        log = ColumnarLog.from_event_log(log)
+    directly_follows_delays, directly_follows_cases = build_columnar_delay_index(log, return_cases=True)
+
     # initialise time delay dict
     delay_time_dict = {k: 0 for k in previous_transitions_dict.keys()}
+    delay_cases_dict = {}
 
     for key in previous_transitions_dict.keys():
         delay_time = []
+        delay_cases = []
         for t_list in previous_transitions_dict[key]:
-            if len(t_list) == 1: # if only one possible transition, search log and add time delay
+            if len(t_list) == 1: # if only one possible transition, look up the directly-follows delays
                 transition = t_list[0]
-                
-                for trace in log:
-                    for i in range(1, len(trace)):
-                        curr_event = trace[i]
-                        prev_event = trace[i-1]
-
-                        if curr_event['concept:name'] == key.label and prev_event['concept:name'] == transition.label:
-                            delay_time.append((curr_event['time:timestamp'] - prev_event['time:timestamp']).total_seconds())
-
-            else: # if multiple possible transitions (synchronised events), search log and add the minimum time delay
-
-                t_list_names = [t.label for t in t_list]
-                for trace in log:
-                    trace_event_names = {event['concept:name'] for event in trace}
-                    timestamp_b = None
-                    timestamp_a = None
-
-                    if any(t_list_name in trace_event_names for t_list_name in t_list_names) and key.label in trace_event_names:
-                        for event in trace:
-                            if event['concept:name'] == key.label:
-                                timestamp_b = event['time:timestamp']
-                        delay_time_single = np.inf
-                        for event in trace:
-                            if event['concept:name'] in t_list_names:
-                                timestamp_a = event['time:timestamp']
-                                delta = (timestamp_b - timestamp_a).total_seconds()
-
-                                if delta < delay_time_single and delta >= 0:
-                                    delay_time_single = delta
-                        if delay_time_single != np.inf:
-                            delay_time.append(delay_time_single)
+
+                delay_time.extend(directly_follows_delays.get((transition.label, key.label), []))
+                delay_cases.extend(directly_follows_cases.get((transition.label, key.label), []))
+
+            else: # if multiple possible transitions (synchronised events), add the minimum time delay per trace
+
+                t_list_names = {t.label for t in t_list}
+
+                sync_delays, sync_cases = columnar_synchronised_delays(log, key.label, t_list_names, return_cases=True)
+                delay_time.extend(sync_delays)
+                delay_cases.extend(sync_cases)
         
         delay_time_dict[key] = delay_time
+        delay_cases_dict[key] = delay_cases
 
     name_keys = [t.name for t in net.transitions]
 
@@ -218,5 +575,11 @@ def generate_F(net, log):
     for label in label_time_differences.keys():
         times = label_time_differences[label]
         F[label] = times
+
+    if return_cases:
+        F_cases = {key: [] for key in name_keys}
+        for key in delay_cases_dict.keys():
+            F_cases[key.name] = delay_cases_dict[key]
+        return F, F_cases
     
     return F
\ No newline at end of file
@@ -0,0 +1,146 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from dataset_adapters import ADAPTERS, get_adapter
+
+
+def read_source_events(adapter, source):
+
+    """
+    Reads the events of one source of a dataset with its adapter
+    """
+
+    return adapter.read_source(source)
+
+
+def select_group_events(adapter, events, group):
+
+    """
+    This function selects the events of the event log of one group: the events of the group in the order given by
+    the adapter, trimmed and truncated to the traces that are kept.
+
+    Inputs:
+    adapter: the DatasetAdapter of the dataset
+    events: a DataFrame with the events of all sources of the dataset
+    group: the name of the group
+
+    Outputs:
+    short_df: the events of the event log, with the columns case:concept:name, concept:name and time:timestamp
+    """
+    from log_preprocessing import trim_event_dataframe
+
+    df = events[events['group'] == group].drop(columns='group')
+
+    return trim_event_dataframe(adapter.order_events(df), adapter.trim_length, adapter.log_length)
+
+
+def write_event_log(df, output_path):
+
+    """
+    This function converts the events of an event log to an EventLog and saves it as an XES file.
+
+    Inputs:
+    df: the events returned by select_group_events
+    output_path: the path to the XES file
+
+    Outputs:
+    output_path: the path to the XES file
+    n_traces: the number of traces of the event log
+    """
+    import pm4py
+    from log_preprocessing import convert_event_dataframe
+
+    log = convert_event_dataframe(df)
+
+    pm4py.write_xes(log, output_path)
+
+    return output_path, len(log)
+
+
+def generate_event_logs(adapters, project_root, workers=None):
+
+    """
+    This function generates the event logs of several datasets in one pool of processes. The sources of all datasets
+    are read concurrently, and as soon as all sources of a dataset are read, in whichever order the datasets finish,
+    the event log of each of its groups is converted and written by its own process while the other datasets are
+    still being read.
+
+    Inputs:
+    adapters: a list of DatasetAdapters, one per dataset
+    project_root: the project root folder, containing the data folder
+    workers: the number of processes, all cores by default
+
+    Outputs:
+    results: a list with the path and the number of traces of each event log that was written, in the order of
+    adapters. Datasets without any sources are reported and skipped
+    """
+    import pandas as pd
+
+    output_dir = os.path.join(project_root, "data")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        read_futures = [[executor.submit(read_source_events, adapter, source) for source in adapter.sources(project_root)] for adapter in adapters]
+
+        # the position of the adapter of each read future, and the number of sources of each adapter not read yet
+        pending = {future: i for i, futures in enumerate(read_futures) for future in futures}
+        remaining = [len(futures) for futures in read_futures]
+
+        write_futures = [[] for _ in adapters]
+
+        def write_logs(i):
+            adapter = adapters[i]
+
+            # e.g. the raw dataset is not downloaded. The other datasets are still written
+            if not read_futures[i]:
+                print("no sources found for", adapter.country + ", skipping its event logs")
+                return
+
+            # the events of the sources are concatenated in the order of the sources
+            events = pd.concat([future.result() for future in read_futures[i]], ignore_index=True)
+
+            for group, name in adapter.groups.items():
+                df = select_group_events(adapter, events, group)
+                write_futures[i].append(executor.submit(write_event_log, df, os.path.join(output_dir, name + ".xes")))
+
+        for i in range(len(adapters)):
+            if remaining[i] == 0:
+                write_logs(i)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                remaining[i] -= 1
+                if remaining[i] == 0:
+                    write_logs(i)
+
+        results = [future.result() for futures in write_futures for future in futures]
+
+    return results
+
+
+if __name__ == "__main__":
+    from load_config import load_config
+    import argparse
+
+    config = load_config()
+
+    parser = argparse.ArgumentParser(description="Generate the coordinated and uncoordinated event logs of several countries in parallel.")
+    parser.add_argument("--countries", type=str, nargs="+", choices=list(ADAPTERS), default=list(ADAPTERS), help="Countries to generate the event logs for")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes (default: all cores)")
+    parser.add_argument("--stream", action="store_true", help="Read the UAE and Honduras datasets in chunks, keeping only the fields used")
+    parser.add_argument("--assume-sorted", action="store_true", help="With --stream, stop reading each UAE and Honduras file once its event log is determined. Only correct if the whole files are sorted by time")
+    parser.add_argument("--chunksize", type=int, default=100000, help="Number of lines or rows read at a time from the jsonlines and CSV files")
+    args = parser.parse_args()
+
+    adapters = []
+    for country in args.countries:
+        if country in ("uae", "honduras"):
+            adapters.append(get_adapter(country, stream=args.stream, chunksize=args.chunksize, assume_sorted=args.assume_sorted))
+        elif country == "brazil":
+            adapters.append(get_adapter(country, chunksize=args.chunksize))
+        else:
+            adapters.append(get_adapter(country))
+
+    for output_path, n_traces in generate_event_logs(adapters, config["project_root"], workers=args.workers):
+        print("wrote", n_traces, "traces to", output_path)
@@ -1,49 +1,91 @@
-def create_brazil_event_logs(project_root, trim_length, log_length):
+# the only columns of the Brazil CSV files used by the event logs, with their types. The IDs are read as strings so
+# that they are not parsed to floats when a value is missing
+BRAZIL_COLUMNS = {
+    'retweeted_status.id_str': 'str',
+    'user.id_str': 'str',
+    'timestamp_ms': 'Int64',
+    'botscore': 'float64',
+}
+
+
+def read_brazil_csv(file_path, chunksize=100000):
 
     """
-    This function converts a jsonlines file to an EventLog for the Brazil datasets. 
+    This function reads the columns of BRAZIL_COLUMNS from one Brazil CSV file in chunks, keeping only the rows in
+    the bot score bands of the event logs (>= 0.9 or <= 0.1) as each chunk is read.
+
+    Inputs:
+    file_path: path to the CSV file
+    chunksize: number of rows read at a time
+
+    Outputs:
+    df: a DataFrame with the kept rows, in the order of the file
+    """
+    import pandas as pd
+
+    chunks = []
+
+    for chunk in pd.read_csv(file_path, usecols=list(BRAZIL_COLUMNS), dtype=BRAZIL_COLUMNS, chunksize=chunksize):
+        chunks.append(chunk[(chunk['botscore'] >= 0.9) | (chunk['botscore'] <= 0.1)])
+
+    if not chunks:
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in BRAZIL_COLUMNS.items()})
+
+    return pd.concat(chunks)
+
+
+def read_brazil_files(folder_path, workers=1, chunksize=100000):
+
+    """
+    This function reads every CSV file of the brazil_elections-2018 dataset with read_brazil_csv, spreading the
+    files over a pool of processes.
 
     Inputs:
     folder_path: path to folder containing brazil_elections-2018 dataset
-    trim_length: length to trim each trace to
-    log_length: desired length of returned log
+    workers: number of processes reading files
+    chunksize: number of rows read at a time
 
     Outputs:
-    brazil_1_short_log: an event log for the users with a bot score of >= 0.9
-    brazil_2_short_log: an event log for the users with a bot score of <= 0.1
+    df: a DataFrame with the kept rows of all files, in the order the files are listed
     """
-    import pm4py
-    from pm4py.objects.conversion.log import converter as log_converter
-    from pm4py.filtering import filter_case_size
-    from pm4py.objects.log.obj import EventLog, Trace
     import os
     import pandas as pd
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
 
-    print("collecting files...")
+    file_paths = [os.path.join(folder_path, filename) for filename in os.listdir(folder_path) if filename.endswith(".csv")]
 
-    folder_path = os.path.join(project_root, "data/brazil_elections-2018")
+    read = partial(read_brazil_csv, chunksize=chunksize)
 
-    dataframes = []
+    if workers <= 1:
+        dataframes = [read(file_path) for file_path in file_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            dataframes = list(executor.map(read, file_paths))
 
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".csv"):
-            file_path = os.path.join(folder_path, filename)
-            df = pd.read_csv(file_path)
+    return pd.concat(dataframes, ignore_index=True)
 
-            dataframes.append(df)
 
-    data = pd.concat(dataframes, ignore_index=True)
+def format_brazil_events(df):
 
-    df = data.loc[:, ['retweeted_status.id_str', 'user.id_str', 'timestamp_ms', 'botscore']]
+    """
+    This function formats the rows read by read_brazil_files as events, sorted by time.
+
+    Inputs:
+    df: a DataFrame with the columns of BRAZIL_COLUMNS
+
+    Outputs:
+    df: a DataFrame with the columns retweet_tweetid, userid, tweet_time and botscore
+    """
+    import pandas as pd
+    from log_preprocessing import clean_user_ids
 
     df = df.rename(columns = {'retweeted_status.id_str': 'retweet_tweetid', 'user.id_str': 'userid', 'timestamp_ms': 'tweet_time'})
 
     # convert times to datetime format
     df['tweet_time'] = pd.to_datetime(df['tweet_time'], unit='ms')
     # remove problematic ID characters
-    df['userid'] = df['userid'].astype('str')
-    df['userid'] = df['userid'].str.replace('[+=]', '', regex=True)
-    df['userid'] = ['u' + id for id in df['userid']]
+    df['userid'] = clean_user_ids(df['userid'])
     # convert tweet ID to int
     df['retweet_tweetid'] = df['retweet_tweetid'].astype('Int64')
 
@@ -52,86 +94,81 @@ def create_brazil_event_logs(project_root, trim_length, log_length):
     df = df[df['retweet_tweetid'].isnull() == False]
     df = df[df['userid'].isnull() == False]
 
-    # split dataset using botscore - coordinated if botscore is >= 0.9 and uncoordinated if <= 0.1
-    brazil_1_df = df[df['botscore'] >= 0.9]
-    brazil_2_df = df[df['botscore'] <= 0.1]
+    return df
 
 
-    brazil_1_df = brazil_1_df.loc[:, ['retweet_tweetid', 'userid', 'tweet_time']]
-    brazil_2_df = brazil_2_df.loc[:, ['retweet_tweetid', 'userid', 'tweet_time']]
+def earliest_events(selected_df):
 
-    cols = ['case:concept:name', 'concept:name', 'time:timestamp']
-    brazil_1_df.columns = cols
-    brazil_2_df.columns = cols
+    """
+    This function keeps the earliest retweet of each user of each retweeted tweet, sorted by time.
 
-    selected_df = brazil_2_df
+    Inputs:
+    selected_df: a DataFrame with the columns case:concept:name, concept:name and time:timestamp
+
+    Outputs:
+    earliest_events_df: the rows of the earliest events
+    """
 
     idx = selected_df.groupby(['case:concept:name', 'concept:name'])['time:timestamp'].idxmin()
     earliest_events_df = selected_df.loc[idx].reset_index(drop=True)
     earliest_events_df.sort_values(by = 'time:timestamp', ascending=True, inplace=True)
 
-    length_df = earliest_events_df.groupby('case:concept:name').filter(lambda x: len(x) >= 2)
+    return earliest_events_df
 
 
-    brazil_2_log = log_converter.apply(length_df, variant=log_converter.Variants.TO_EVENT_LOG)
+def create_brazil_event_logs(project_root, trim_length, log_length, workers=1, chunksize=100000):
 
-    # trim each trace of log to length n
+    """
+    This function converts a jsonlines file to an EventLog for the Brazil datasets. 
 
-    brazil_2_trimmed_log = EventLog()
+    Inputs:
+    folder_path: path to folder containing brazil_elections-2018 dataset
+    trim_length: length to trim each trace to
+    log_length: desired length of returned log
+    workers: number of processes reading the CSV files
+    chunksize: number of rows of a CSV file read at a time
 
-    for trace in brazil_2_log:
-        if len(trace) > trim_length:
-            trimmed_trace = Trace()
-            for i in range(trim_length):
-                trimmed_trace.append(trace[i])
-            brazil_2_trimmed_log.append(trimmed_trace)
-        else:
-            brazil_2_trimmed_log.append(trace)
+    Outputs:
+    brazil_1_short_log: an event log for the users with a bot score of >= 0.9
+    brazil_2_short_log: an event log for the users with a bot score of <= 0.1
+    """
+    import pm4py
+    from log_preprocessing import dataframe_to_event_log
+    import os
 
-    # remove traces of length 1
-    brazil_2_filtered_log = filter_case_size(brazil_2_trimmed_log, 2, 1e6)
+    print("collecting files...")
 
-    # select the first x traces
-    brazil_2_short_log = EventLog()
+    folder_path = os.path.join(project_root, "data/brazil_elections-2018")
 
-    for i in range(log_length):
-        brazil_2_short_log.append(brazil_2_filtered_log[i])
+    df = read_brazil_files(folder_path, workers=workers, chunksize=chunksize)
 
+    df = format_brazil_events(df)
 
-    
-    selected_df = brazil_1_df
+    # split dataset using botscore - coordinated if botscore is >= 0.9 and uncoordinated if <= 0.1
+    brazil_1_df = df[df['botscore'] >= 0.9]
+    brazil_2_df = df[df['botscore'] <= 0.1]
 
-    idx = selected_df.groupby(['case:concept:name', 'concept:name'])['time:timestamp'].idxmin()
-    earliest_events_df = selected_df.loc[idx].reset_index(drop=True)
-    earliest_events_df.sort_values(by = 'time:timestamp', ascending=True, inplace=True)
 
-    length_df = earliest_events_df.groupby('case:concept:name').filter(lambda x: len(x) >= 2)
+    brazil_1_df = brazil_1_df.loc[:, ['retweet_tweetid', 'userid', 'tweet_time']]
+    brazil_2_df = brazil_2_df.loc[:, ['retweet_tweetid', 'userid', 'tweet_time']]
 
+    cols = ['case:concept:name', 'concept:name', 'time:timestamp']
+    brazil_1_df.columns = cols
+    brazil_2_df.columns = cols
 
-    brazil_1_log = log_converter.apply(length_df, variant=log_converter.Variants.TO_EVENT_LOG)
+    selected_df = brazil_2_df
 
-    # trim each trace of log to length n
+    earliest_events_df = earliest_events(selected_df)
 
-    brazil_1_trimmed_log = EventLog()
+    # trim each trace to length n, remove traces of length 1 and select the first x traces before converting to a log
+    brazil_2_short_log = dataframe_to_event_log(earliest_events_df, trim_length, log_length)
 
-    for trace in brazil_1_log:
-        if len(trace) > trim_length:
-            trimmed_trace = Trace()
-            trimmed_trace.attributes.update(trace.attributes)
-            for i in range(trim_length):
-                trimmed_trace.append(trace[i])
-            brazil_1_trimmed_log.append(trimmed_trace)
-        else:
-            brazil_1_trimmed_log.append(trace)
 
-    # remove traces of length 1
-    brazil_1_filtered_log = filter_case_size(brazil_1_trimmed_log, 2, 1e6)
+    selected_df = brazil_1_df
 
-    # select the first x traces
-    brazil_1_short_log = EventLog()
+    earliest_events_df = earliest_events(selected_df)
 
-    for i in range(log_length):
-        brazil_1_short_log.append(brazil_1_filtered_log[i])
+    brazil_1_short_log = dataframe_to_event_log(earliest_events_df, trim_length, log_length)
 
 
     pm4py.write_xes(brazil_2_short_log, os.path.join(project_root, "data/brazil_2.xes"))
@@ -139,12 +176,18 @@ def create_brazil_event_logs(project_root, trim_length, log_length):
 
 if __name__ == "__main__":
     from load_config import load_config
+    import argparse
 
     config = load_config()
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes reading the CSV files")
+    parser.add_argument("--chunksize", type=int, default=100000, help="Number of rows of a CSV file read at a time")
+    args = parser.parse_args()
+
     project_root = config['project_root']
 
-    create_brazil_event_logs(project_root, 10, 200)
+    create_brazil_event_logs(project_root, 10, 200, workers=args.workers, chunksize=args.chunksize)
 
 
     
@@ -2,28 +2,42 @@
 
 
 import pandas as pd
-from pm4py.objects.conversion.log import converter as log_converter
-from pm4py.filtering import filter_case_size
-from pm4py.objects.log.obj import EventLog, Trace
+from log_preprocessing import dataframe_to_event_log, clean_user_ids
 import pm4py
 
 
+# the columns of the raw datasets used by the event logs
+KEEP_COLUMNS = ['post_time', 'accountid', 'reposted_postid', 'is_control']
+
+
 def preprocess_df(df):
 
     # remove events that arent reposts
     df = df[df['is_repost'] == True]  
 
     # remove unneccessary columns
-    keep_columns = ['post_time', 'accountid', 'reposted_postid', 'is_control']
-    df = df[keep_columns]
+    df = df[KEEP_COLUMNS]
+
+    df = format_reposts(df)
+
+    # split the datasets on the is_control variable (True means uncoordinated)
+
+    uncoordinated_df = df[df['is_control'] == True]
+    coordinated_df = df[df['is_control'] == False]
+
+    uncoordinated_df = uncoordinated_df.drop(columns='is_control')
+    coordinated_df = coordinated_df.drop(columns = 'is_control')
+
+    return uncoordinated_df, coordinated_df
+
+
+def format_reposts(df):
 
     # convert time to datetime
     df['post_time'] = pd.to_datetime(df['post_time'], unit='ms')
 
     # remove problematic ID characters
-    df['accountid'] = df['accountid'].astype('str')
-    df['accountid'] = df['accountid'].str.replace('[+=]', '', regex=True)
-    df['accountid'] = ['u' + id for id in df['accountid']]
+    df['accountid'] = clean_user_ids(df['accountid'])
 
     # convert tweet ID to str
     df['reposted_postid'] = df['reposted_postid'].astype('str')
@@ -34,47 +48,48 @@ def preprocess_df(df):
     df = df[df['accountid'].isnull() == False]
 
     # rename df columns to conincide with event log standards
-    cols = ['time:timestamp', 'concept:name', 'case:concept:name', 'is_control']
+    cols = ['time:timestamp', 'concept:name', 'case:concept:name'] + list(df.columns[3:])
     df.columns = cols
 
-    # split the datasets on the is_control variable (True means uncoordinated)
+    return df
 
-    uncoordinated_df = df[df['is_control'] == True]
-    coordinated_df = df[df['is_control'] == False]
 
-    uncoordinated_df = uncoordinated_df.drop(columns='is_control')
-    coordinated_df = coordinated_df.drop(columns = 'is_control')
+def scan_reposts(dataset_paths):
 
-    return uncoordinated_df, coordinated_df
+    """
+    This function reads the reposts of the Spain or Thailand datasets with a pyarrow dataset scan. Only the columns
+    in KEEP_COLUMNS are read, the is_repost == True filter is applied while the files are scanned, and the files are
+    read in parallel by the pyarrow thread pool. The datasets are split on is_control as Arrow tables, so only the
+    reposts of each group are converted to DataFrames.
 
+    Inputs:
+    dataset_paths: a list of paths to the parquet files of a country
 
-def preprocess_log(df, log_length):
+    Outputs:
+    uncoordinated_df: the reposts with is_control True, formatted as in preprocess_df
+    coordinated_df: the reposts with is_control False, formatted as in preprocess_df
+    """
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
 
-    # convert df to an event log
-    log = log_converter.apply(df, variant=log_converter.Variants.TO_EVENT_LOG)
+    dataset = ds.dataset(dataset_paths, format='parquet')
 
-    # initialise new event log
-    trimmed_log = EventLog()
+    table = dataset.to_table(columns=KEEP_COLUMNS, filter=ds.field('is_repost') == True, use_threads=True)
 
-    # trim each trace in the event log so it is a max length of 10
-    for trace in log:
-        if len(trace) > 10:
-            trimmed_trace = Trace()
-            trimmed_trace.attributes.update(trace.attributes)
-            for i in range(10):
-                trimmed_trace.append(trace[i])
-            trimmed_log.append(trimmed_trace)
-        else:
-            trimmed_log.append(trace)
+    # split the datasets on the is_control variable (True means uncoordinated)
+    uncoordinated_table = table.filter(pc.equal(table['is_control'], True)).drop_columns(['is_control'])
+    coordinated_table = table.filter(pc.equal(table['is_control'], False)).drop_columns(['is_control'])
 
-    # remove traces of length 1
-    filtered_log = filter_case_size(trimmed_log, 2, 1e6)
+    uncoordinated_df = format_reposts(uncoordinated_table.to_pandas())
+    coordinated_df = format_reposts(coordinated_table.to_pandas())
 
-    # # select the first x traces
-    short_log = EventLog()
+    return uncoordinated_df, coordinated_df
 
-    for i in range(log_length):
-        short_log.append(filtered_log[i])
+
+def preprocess_log(df, log_length):
+
+    # trim each trace to a max length of 10 and select the first x traces before converting df to an event log
+    short_log = dataframe_to_event_log(df, 10, log_length)
 
     return short_log
 
@@ -93,18 +108,15 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     # Construct dataset path
-    dataset_paths = [str(p) for p in Path('data/raw_data').iterdir() if p.name.lower().startswith(args.country.lower()) and p.name.lower().endswith('.gzip.parquet')]
+    dataset_paths = [str(p) for p in Path(config["project_root"], 'data', 'raw_data').iterdir() if p.name.lower().startswith(args.country.lower()) and p.name.lower().endswith('.gzip.parquet')]
 
     # check if all paths exist
     for dataset_path in dataset_paths:
         if not os.path.exists(dataset_path):
             raise FileNotFoundError(f"Dataset not found: {dataset_path}")
     
-    # concatenate all files
-    df = pd.concat((pd.read_parquet(f, engine='pyarrow') for f in dataset_paths), ignore_index=True)
-
-    # preprocess the df
-    uncoordinated_df, coordinated_df = preprocess_df(df)
+    # read and preprocess the reposts of all files
+    uncoordinated_df, coordinated_df = scan_reposts(dataset_paths)
 
     # assign log_length for each country
 
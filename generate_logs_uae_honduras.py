@@ -1,69 +1,190 @@
-def create_event_log(file_path, trim_length, log_length):
+# the fields of the jsonlines files used by the event logs
+EVENT_FIELDS = ['tweet_time', 'userid', 'retweet_tweetid']
+
+
+def format_event_chunk(lines):
+
     """
-    This function converts a jsonlines file to an EventLog for the Honduras and UAE datasets. This function saves the outputted event log
-    to the same folder containing the input data.
+    This function converts a chunk of lines of a Honduras or UAE jsonlines file to the events of the event log,
+    cleaned as in create_event_log. Only the fields in EVENT_FIELDS are kept and the rows without a retweeted tweet
+    are removed. The tweet IDs are kept as exact integers.
 
     Inputs:
-    file_path: the path to a corresponding jsonlines file containing the data from the Honduras or UAE datasets (coordinated or uncoordinated)
+    lines: an iterable of lines of the jsonlines file, e.g. a list or an open file
+
+    Outputs:
+    df: a DataFrame with the columns tweet_time, userid and retweet_tweetid, in the order of the lines
+    """
+    import json
+    import pandas as pd
+    from log_preprocessing import clean_user_ids
+
+    columns = {field: [] for field in EVENT_FIELDS}
+    for line in lines:
+        if line.strip():
+            record = json.loads(line)
+            for field in EVENT_FIELDS:
+                columns[field].append(record.get(field))
+
+    # the tweet IDs are not put in a DataFrame column first, which would turn them to floats if any is missing
+    tweet_ids = pd.array(columns.pop('retweet_tweetid'), dtype='Int64')
+    df = pd.DataFrame(columns, columns=EVENT_FIELDS[:2])
+
+    # convert times to datetime format, the times are either in ms or date strings
+    if pd.api.types.is_numeric_dtype(df['tweet_time']):
+        df['tweet_time'] = pd.to_datetime(df['tweet_time'], unit='ms')
+    else:
+        df['tweet_time'] = pd.to_datetime(df['tweet_time'])
+    # remove problematic ID characters
+    df['userid'] = clean_user_ids(df['userid'])
+    # keep the tweet IDs as exact integers
+    df['retweet_tweetid'] = tweet_ids
+
+    return df[df['retweet_tweetid'].isnull() == False]
+
+
+def log_is_determined(case_counts, trim_length, log_length):
+
+    """
+    This function checks whether more events can still change the event log built from the events read so far, if
+    the remaining events are not earlier than the ones read. The traces are ordered by their first event, so the
+    log is determined once its last trace is known and every trace up to it, kept or not, already has trim_length
+    (and at least 2) events.
+
+    Inputs:
+    case_counts: a Series with the number of events of each case, in the order of the first event of each case
     trim_length: length to trim each trace to
     log_length: desired length of returned log
 
+    Outputs:
+    determined: True if the event log can no longer change
+    """
+    import numpy as np
+
+    counts = case_counts.to_numpy()
+
+    kept = np.cumsum(counts >= 2)
+    if len(kept) == 0 or kept[-1] < log_length:
+        return False
+
+    # the position of the last trace of the log
+    last = int(np.searchsorted(kept, log_length))
+
+    return bool((counts[:last + 1] >= max(trim_length, 2)).all())
+
+
+def read_events_streaming(file_path, trim_length, log_length, chunksize=100000, assume_sorted=False):
+
+    """
+    This function reads the events of a Honduras or UAE jsonlines file in chunks of lines, keeping only the fields
+    in EVENT_FIELDS. By default the whole file is read. With assume_sorted, the reading stops as soon as the event
+    log is determined (see log_is_determined), which is only correct if the whole file is sorted by time, as the
+    lines not read could hold earlier events. The reading continues to the end if the events read are found out of
+    order.
+
+    Inputs:
+    file_path: the path to a jsonlines file of the Honduras or UAE datasets
+    trim_length: length to trim each trace to
+    log_length: desired length of returned log
+    chunksize: number of lines read at a time
+    assume_sorted: whether the file is known to be sorted by time, so the reading can stop early
 
+    Outputs:
+    df: a DataFrame with the columns tweet_time, userid and retweet_tweetid, sorted by time
     """
-    from pm4py.objects.conversion.log import converter as log_converter
-    from pm4py.filtering import filter_case_size
-    from pm4py.objects.log.obj import EventLog, Trace
+    from itertools import islice
     import pandas as pd
 
-    print("reading in data...")
-    data = pd.read_json(file_path, lines = True)
+    chunks = []
+    case_counts = pd.Series(dtype='int64', index=pd.Index([], dtype='Int64'))
+    in_order = True
+    last_time = None
+    lines_read = 0
 
-    df = []
-    # select relevant columns in data
-    df = data.loc[:, ['tweet_time', 'userid', 'retweet_tweetid']]
+    with open(file_path) as f:
+        while True:
+            lines = list(islice(f, chunksize))
+            if not lines:
+                break
+            lines_read += len(lines)
 
-    # convert times to datetime format
-    df['tweet_time'] = pd.to_datetime(df['tweet_time'], unit='ms')
-    # remove problematic ID characters
-    df['userid'] = df['userid'].astype('str')
-    df['userid'] = df['userid'].str.replace('[+=]', '', regex=True)
-    df['userid'] = ['u' + id for id in df['userid']]
-    # convert tweet ID to int
-    df['retweet_tweetid'] = df['retweet_tweetid'].astype('Int64')
+            chunk = format_event_chunk(lines)
+            chunks.append(chunk)
 
-    # format dataframe
-    df.sort_values(by = 'tweet_time', ascending=True, inplace=True)
-    df = df[df['retweet_tweetid'].isnull() == False]
-    df = df[df['userid'].isnull() == False]
+            # without assume_sorted, the lines not read yet could hold earlier events, so the whole file is read
+            if not assume_sorted or not in_order or len(chunk) == 0:
+                continue
 
-    cols = ['time:timestamp', 'concept:name', 'case:concept:name']
-    df.columns = cols
+            times = chunk['tweet_time']
+            in_order = times.is_monotonic_increasing and not times.isnull().any() and (last_time is None or times.iloc[0] >= last_time)
+            last_time = times.iloc[-1]
+
+            if in_order:
+                # the counts of new cases are appended, so the cases stay in the order of their first event
+                chunk_counts = chunk.groupby('retweet_tweetid', sort=False).size()
+                new_cases = chunk_counts.index.difference(case_counts.index, sort=False)
+                case_counts = case_counts.reindex(case_counts.index.append(new_cases), fill_value=0)
+                case_counts[chunk_counts.index] += chunk_counts.to_numpy()
+                if log_is_determined(case_counts, trim_length, log_length):
+                    print("event log determined after", lines_read, "lines")
+                    break
+
+    df = pd.concat(chunks, ignore_index=True)
+
+    # a stable sort keeps the order of the file for events at the same time
+    return df.sort_values(by = 'tweet_time', ascending=True, kind='stable')
+
+
+def read_events(file_path):
+
+    """
+    This function reads the events of a Honduras or UAE jsonlines file, sorted by time. The lines are parsed with
+    format_event_chunk, as in read_events_streaming, so both keep the tweet IDs as exact integers. (The original
+    pd.read_json parsing turned the ID column to floats when a line had no retweeted tweet, rounding IDs above
+    2^53 to other tweets.)
+
+    Inputs:
+    file_path: the path to a jsonlines file of the Honduras or UAE datasets
+
+    Outputs:
+    df: a DataFrame with the columns tweet_time, userid and retweet_tweetid
+    """
+    print("reading in data...")
+    with open(file_path) as f:
+        df = format_event_chunk(f)
 
+    # a stable sort keeps the order of the file for events at the same time
+    return df.sort_values(by = 'tweet_time', ascending=True, kind='stable')
 
-    # convert df to log
-    log = log_converter.apply(df, variant=log_converter.Variants.TO_EVENT_LOG)
 
+def create_event_log(file_path, trim_length, log_length, stream=False, chunksize=100000, assume_sorted=False):
+    """
+    This function converts a jsonlines file to an EventLog for the Honduras and UAE datasets. This function saves the outputted event log
+    to the same folder containing the input data.
 
-    trimmed_log = EventLog()
+    Inputs:
+    file_path: the path to a corresponding jsonlines file containing the data from the Honduras or UAE datasets (coordinated or uncoordinated)
+    trim_length: length to trim each trace to
+    log_length: desired length of returned log
+    stream: whether to read the file in chunks with read_events_streaming, keeping only the fields used
+    chunksize: number of lines read at a time when stream is True
+    assume_sorted: whether the file is sorted by time, so that read_events_streaming stops once the event log is
+    determined
+    """
+    from log_preprocessing import dataframe_to_event_log
 
-    for trace in log:
-        if len(trace) > trim_length:
-            trimmed_trace = Trace()
-            trimmed_trace.attributes.update(trace.attributes)
-            for i in range(trim_length):
-                trimmed_trace.append(trace[i])
-            trimmed_log.append(trimmed_trace)
-        else:
-            trimmed_log.append(trace)
+    if stream:
+        print("streaming data...")
+        df = read_events_streaming(file_path, trim_length, log_length, chunksize=chunksize, assume_sorted=assume_sorted)
+    else:
+        df = read_events(file_path)
 
-    # remove traces of length 1
-    filtered_log = filter_case_size(trimmed_log, 2, 1e6)
+    cols = ['time:timestamp', 'concept:name', 'case:concept:name']
+    df.columns = cols
 
-    # select the first x traces
-    short_log = EventLog()
 
-    for i in range(log_length):
-        short_log.append(filtered_log[i])
+    # trim and truncate the traces before converting df to a log
+    short_log = dataframe_to_event_log(df, trim_length, log_length)
 
     return short_log
 
@@ -77,6 +198,9 @@ if __name__ == "__main__":
     config = load_config()
 
     parser = argparse.ArgumentParser(description="Run script on a dataset.")
+    parser.add_argument("--stream", action="store_true", help="Read the dataset in chunks, keeping only the fields used")
+    parser.add_argument("--chunksize", type=int, default=100000, help="Number of lines read at a time with --stream")
+    parser.add_argument("--assume-sorted", action="store_true", help="With --stream, stop reading once the event log is determined. Only correct if the whole file is sorted by time")
     parser.add_argument("--dataset", type=str, required=True, choices=["uae-good-anonymized", "uae-bad-anonymized", "honduras-good-anonymized", "honduras-bad-anonymized"], help="Dataset filename (relative to project root)")
     args = parser.parse_args()
 
@@ -99,6 +223,6 @@ if __name__ == "__main__":
         output_path = os.path.join(config["project_root"], "data/uae_uncoordinated.xes")
         log_length = 300
 
-    log = create_event_log(dataset_path, 10, log_length=log_length)
+    log = create_event_log(dataset_path, 10, log_length=log_length, stream=args.stream, chunksize=args.chunksize, assume_sorted=args.assume_sorted)
 
     pm4py.write_xes(log, output_path)
\ No newline at end of file
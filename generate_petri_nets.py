@@ -1,17 +1,56 @@
 # this file generates a petri net from the event logs
 
-def discover_petri_nets(file_path):
+def dataset_stems(project_root, country):
+    """
+    Returns the paths (without extension) of the uncoordinated and coordinated event logs of a dataset, which the
+    Petri nets and process trees discovered from them share. The Brazil logs are named by bot score band, _2
+    (uncoordinated) and _1 (coordinated), as read by the calculate scripts
+
+    Inputs:
+    project_root: the project root folder, containing the data folder
+    country: the name of the dataset
+
+    Outputs:
+    uncoordinated_stem: the path of the uncoordinated log without extension
+    coordinated_stem: the path of the coordinated log without extension
+    """
+    import os
+
+    if country == "brazil":
+        return os.path.join(project_root, "data", "brazil_2"), os.path.join(project_root, "data", "brazil_1")
+    return os.path.join(project_root, "data", country + "_uncoordinated"), os.path.join(project_root, "data", country + "_coordinated")
+
+
+def tree_path_for(path):
+    """
+    Returns the path of the process tree saved next to an event log or the Petri net discovered from it
+    """
+    import os
+
+    return os.path.splitext(path)[0] + ".ptml"
+
+
+def discover_petri_nets(file_path, tree_path=None):
     """
     Discovers a Petri net using the inductive miner and saves to a .pnml file in the same folder as the event log is located.
 
     Inputs:
     file_path: path to an event log 
+    tree_path: if given, the process tree the Petri net is converted from is saved to this .ptml file, so the
+    gate counts of calculate_constructs.py do not need to discover it again
     """
+    import os
     import pm4py
     print("loading event log...")
     log = pm4py.read_xes(file_path)
     print("discovering Petri net...")
-    net, im, fm = pm4py.discover_petri_net_inductive(log, noise_threshold=0.2, multi_processing=True)
+    # same as pm4py.discover_petri_net_inductive, keeping the intermediate process tree. pm4py starts
+    # cpu_count - 1 processes for multi-processing, which fails on a single core
+    tree = pm4py.discover_process_tree_inductive(log, noise_threshold=0.2, multi_processing=(os.cpu_count() or 1) > 1)
+    net, im, fm = pm4py.convert_to_petri_net(tree)
+
+    if tree_path is not None:
+        pm4py.write_ptml(tree, tree_path)
 
     return net, im, fm
 
@@ -25,20 +64,21 @@ if __name__ == "__main__":
     config = load_config()
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("--country", type=str, required=True, choices=["uae", "honduras", "brazil_1", "brazil_2", "thailand", "spain", "thailand_split", "spain_split", "brazil_2_split"], help="Name of the country to load event logs for")
+    parser.add_argument("--country", type=str, required=True, choices=["uae", "honduras", "brazil", "brazil_1", "brazil_2", "thailand", "spain", "thailand_split", "spain_split", "brazil_2_split"], help="Name of the country to load event logs for")
     args = parser.parse_args()
 
-    # Construct dataset path
-    uncoordinated_path = os.path.join(config["project_root"], "data", args.country + "_uncoordinated.xes")
-    coordinated_path = os.path.join(config["project_root"], "data", args.country + "_coordinated.xes")
+    # Construct dataset paths, the Petri nets and process trees are saved next to the event logs
+    uncoordinated_stem, coordinated_stem = dataset_stems(config["project_root"], args.country)
+    uncoordinated_path = uncoordinated_stem + ".xes"
+    coordinated_path = coordinated_stem + ".xes"
 
     # construct output paths
-    u_output_path = os.path.join(config["project_root"], "data", args.country + "_uncoordinated.pnml")
-    c_output_path = os.path.join(config["project_root"], "data", args.country + "_coordinated.pnml")
+    u_output_path = uncoordinated_stem + ".pnml"
+    c_output_path = coordinated_stem + ".pnml"
 
-    # discover petri net
-    net_u, im_u, fm_u = discover_petri_nets(uncoordinated_path)
-    net_c, im_c, fm_c = discover_petri_nets(coordinated_path)
+    # discover petri net, saving the process trees next to the Petri nets
+    net_u, im_u, fm_u = discover_petri_nets(uncoordinated_path, tree_path=tree_path_for(u_output_path))
+    net_c, im_c, fm_c = discover_petri_nets(coordinated_path, tree_path=tree_path_for(c_output_path))
 
     # save petri net
     pm4py.write_pnml(net_u, im_u, fm_u, u_output_path)
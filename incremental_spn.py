@@ -0,0 +1,207 @@
+import json
+import os
+import random
+from collections import Counter
+
+from columnar_log import ColumnarLog
+from free_choice_SPN import count_activated_transitions, normalise_P, find_all_previous_transitions, generate_F
+from petri_net_index import PetriNetIndex
+
+
+class IncrementalSPN:
+
+    """
+    An online estimator of the free-choice SPN parameters of a Petri net. It holds the transition firing counts and
+    running delay statistics of every trace seen so far as state, so that new traces can be added in time
+    proportional to their number instead of recomputing P and F over the full log. The state does not grow with
+    the number of delays: each transition keeps the count, sum and sum of squares of its delays and a uniform
+    reservoir sample of at most reservoir_size of them for F.
+
+    Every batch has to hold complete traces of new cases. A trace is replayed from the initial marking and its
+    delays are taken between its own events, so the events of a case cannot be split over several batches:
+    update raises a ValueError for a batch containing a case ID added before (traces without a case ID are not
+    checked).
+
+    Inputs:
+    net: the Petri net
+    im: the initial marking
+    fm: the final marking
+    workers: the number of processes used to replay each batch
+    reservoir_size: the maximum number of delays kept per transition for F
+    seed: the seed of the reservoir sampling
+
+    Attributes:
+    freq: a dictionary mapping each transition name to its number of activations
+    delay_stats: a dictionary mapping each transition name to the [count, sum, sum of squares] of its delays
+    reservoirs: a dictionary mapping each transition name to its sample of delays in seconds
+    case_ids: the set of case IDs added so far
+    n_traces: the number of traces added so far
+    """
+
+    def __init__(self, net, im, fm, workers=1, reservoir_size=10000, seed=0):
+        self.net = net
+        self.im = im
+        self.fm = fm
+        self.workers = workers
+        self.reservoir_size = reservoir_size
+        self.rng = random.Random(seed)
+
+        # the structure of the net does not change between batches, so it is only analysed once
+        self.index = PetriNetIndex(net)
+        self.previous_transitions_dict = find_all_previous_transitions(net, self.index)
+
+        names = [t.name for t in net.transitions]
+        self.freq = {name: 0 for name in names}
+        self.delay_stats = {name: [0, 0.0, 0.0] for name in names}
+        self.reservoirs = {name: [] for name in names}
+        self.case_ids = set()
+        self.n_traces = 0
+
+    def update(self, traces):
+        """
+        This function adds a batch of new traces to the running state.
+
+        Inputs:
+        traces: an EventLog, a list of traces or a ColumnarLog holding the complete traces of new cases
+        """
+        if not isinstance(traces, ColumnarLog):
+            traces = ColumnarLog.from_event_log(traces)
+
+        if len(traces) == 0:
+            return
+
+        batch_case_ids = Counter(case_id for case_id in traces.case_ids if case_id is not None)
+        repeated = self.case_ids.intersection(batch_case_ids) | {case_id for case_id, n in batch_case_ids.items() if n > 1}
+        if repeated:
+            raise ValueError(f"Every batch has to hold the whole traces of new cases, but the case IDs {sorted(repeated, key=str)[:10]} were added before")
+
+        batch_freq = count_activated_transitions(traces, self.net, self.im, self.fm, workers=self.workers)
+        for name, count in batch_freq.items():
+            self.freq[name] += count
+
+        batch_F = generate_F(self.net, traces, index=self.index, previous_transitions_dict=self.previous_transitions_dict)
+        for name, times in batch_F.items():
+            stats = self.delay_stats[name]
+            reservoir = self.reservoirs[name]
+            for t in times:
+                stats[0] += 1
+                stats[1] += t
+                stats[2] += t * t
+
+                # reservoir sampling: the n-th delay replaces a random sample with probability reservoir_size / n
+                if len(reservoir) < self.reservoir_size:
+                    reservoir.append(t)
+                else:
+                    j = self.rng.randrange(stats[0])
+                    if j < self.reservoir_size:
+                        reservoir[j] = t
+
+        self.case_ids.update(batch_case_ids)
+        self.n_traces += len(traces)
+
+    @property
+    def P(self):
+        """
+        The transition probabilities of all traces added so far, as returned by generate_P
+        """
+        return normalise_P(dict(self.freq), self.net, self.index)
+
+    @property
+    def F(self):
+        """
+        The delay distributions of all traces added so far, in the format returned by generate_F. They are exact
+        until a transition has more than reservoir_size delays, and a uniform sample of its delays from then on
+        """
+        return {name: list(times) for name, times in self.reservoirs.items()}
+
+    def mean_delays(self):
+        """
+        Returns a dictionary mapping each transition name with at least one delay to its mean delay in seconds
+        """
+        return {name: stats[1] / stats[0] for name, stats in self.delay_stats.items() if stats[0] > 0}
+
+    def save(self, file_path):
+        """
+        This function writes the running state to a JSON file.
+
+        Inputs:
+        file_path: the path to write the state to
+        """
+        state = {
+            "transitions": sorted(self.freq.keys()),
+            "freq": self.freq,
+            "delay_stats": self.delay_stats,
+            "reservoir_size": self.reservoir_size,
+            "reservoirs": self.reservoirs,
+            "rng_state": self.rng.getstate(),
+            "case_ids": sorted(self.case_ids, key=str),
+            "n_traces": self.n_traces,
+        }
+        # written to a temporary file first, so an interrupted save never leaves a half-written state behind
+        tmp_path = file_path + "." + str(os.getpid()) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path, net, im, fm, workers=1):
+        """
+        This function restores an estimator saved with save for the same Petri net.
+
+        Inputs:
+        file_path: the path of the saved state
+        net: the Petri net the state was computed for
+        im: the initial marking
+        fm: the final marking
+        workers: the number of processes used to replay each batch
+
+        Outputs:
+        estimator: the restored IncrementalSPN
+        """
+        with open(file_path, "r") as f:
+            state = json.load(f)
+
+        if "reservoirs" not in state:
+            raise ValueError(f"The state in {file_path} was saved by an older version keeping every delay, recreate it from the full log")
+
+        estimator = cls(net, im, fm, workers=workers, reservoir_size=state["reservoir_size"])
+
+        if state["transitions"] != sorted(estimator.freq.keys()):
+            raise ValueError(f"The state in {file_path} was computed for a different Petri net")
+
+        estimator.freq = state["freq"]
+        estimator.delay_stats = state["delay_stats"]
+        estimator.reservoirs = state["reservoirs"]
+        version, internal_state, gauss_next = state["rng_state"]
+        estimator.rng.setstate((version, tuple(internal_state), gauss_next))
+        estimator.case_ids = set(state["case_ids"])
+        estimator.n_traces = state["n_traces"]
+
+        return estimator
+
+
+if __name__ == "__main__":
+    import os
+    import argparse
+    import pm4py
+    from log_cache import load_columnar_log
+
+    parser = argparse.ArgumentParser(description="Add new traces to the saved free-choice SPN parameters of a Petri net.")
+    parser.add_argument("--pnml", type=str, required=True, help="Path to the Petri net")
+    parser.add_argument("--log", type=str, required=True, help="Path to an event log containing the new traces")
+    parser.add_argument("--state", type=str, required=True, help="Path to the saved estimator state, created if it does not exist")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes used to replay the new traces")
+    parser.add_argument("--reservoir-size", type=int, default=10000, help="Maximum number of delays kept per transition for F, when the state is created")
+    args = parser.parse_args()
+
+    net, im, fm = pm4py.read_pnml(args.pnml)
+
+    if os.path.exists(args.state):
+        estimator = IncrementalSPN.load(args.state, net, im, fm, workers=args.workers)
+    else:
+        estimator = IncrementalSPN(net, im, fm, workers=args.workers, reservoir_size=args.reservoir_size)
+
+    estimator.update(load_columnar_log(args.log))
+    estimator.save(args.state)
+
+    print("Number of traces:", estimator.n_traces)
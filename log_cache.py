@@ -0,0 +1,119 @@
+import json
+import os
+
+import numpy as np
+
+from columnar_log import ColumnarLog
+
+# bump when the layout of the cached arrays changes so old caches are rebuilt
+CACHE_VERSION = 1
+
+
+def cache_dir_for(file_path):
+    """
+    Returns the folder holding the binary cache of an XES file, next to the file itself
+    """
+    return file_path + ".cache"
+
+
+def cache_key(file_path):
+    """
+    Returns the key a cache must match to be valid for an XES file: its path, modification time and size
+    """
+    stat = os.stat(file_path)
+    return {
+        "path": os.path.abspath(file_path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "version": CACHE_VERSION,
+    }
+
+
+def write_cache(log, file_path):
+    """
+    This function stores a columnar log as the binary cache of an XES file.
+
+    Inputs:
+    log: the ColumnarLog parsed from the XES file
+    file_path: the path to the XES file
+    """
+    cache_dir = cache_dir_for(file_path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    meta_path = os.path.join(cache_dir, "meta.json")
+
+    # invalidate the old cache before overwriting its arrays
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    # each array is written to a temporary file per process and moved into place, so processes caching the same
+    # file at the same time do not write into each other's arrays
+    arrays = {
+        "case_offsets": np.asarray(log.case_offsets, dtype=np.int64),
+        "activities": np.asarray(log.activities, dtype=np.int32),
+        "timestamps": np.asarray(log.timestamps, dtype=np.int64),
+    }
+    for name, array in arrays.items():
+        tmp_path = os.path.join(cache_dir, name + "." + str(os.getpid()) + ".tmp.npy")
+        np.save(tmp_path, array)
+        os.replace(tmp_path, os.path.join(cache_dir, name + ".npy"))
+
+    meta = {"key": cache_key(file_path), "case_ids": list(log.case_ids), "labels": list(log.labels)}
+
+    # the metadata is written last, so a cache is only valid once all of its arrays are complete
+    tmp_path = meta_path + "." + str(os.getpid()) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def read_cache(file_path):
+    """
+    This function memory-maps the binary cache of an XES file.
+
+    Inputs:
+    file_path: the path to the XES file
+
+    Outputs:
+    log: the cached ColumnarLog, or None if there is no cache or it is out of date
+    """
+    cache_dir = cache_dir_for(file_path)
+    meta_path = os.path.join(cache_dir, "meta.json")
+
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+
+    if meta["key"] != cache_key(file_path):
+        return None
+
+    case_offsets = np.load(os.path.join(cache_dir, "case_offsets.npy"), mmap_mode="r")
+    activities = np.load(os.path.join(cache_dir, "activities.npy"), mmap_mode="r")
+    timestamps = np.load(os.path.join(cache_dir, "timestamps.npy"), mmap_mode="r")
+
+    return ColumnarLog(meta["case_ids"], case_offsets, activities, timestamps, meta["labels"])
+
+
+def load_columnar_log(file_path):
+    """
+    This function loads an XES file as a ColumnarLog sorted by timestamp, using the binary cache next to the file.
+    The XES file is only parsed when the cache is missing or the file changed since it was written. Only the case
+    IDs, activity labels and timestamps are kept, which is all the numeric analyses (P, F, KS entropy, waiting
+    times) use: scripts that discover models from a log or write a log out parse the XES file with pm4py instead.
+
+    Inputs:
+    file_path: the path to the XES file
+
+    Outputs:
+    log: the ColumnarLog
+    """
+    log = read_cache(file_path)
+
+    if log is None:
+        log = ColumnarLog.from_xes(file_path)
+        write_cache(log, file_path)
+
+    return log
+
@@ -0,0 +1,95 @@
+def clean_user_ids(ids):
+
+    """
+    This function turns the user IDs of a dataset into activity names, removing the problematic ID characters + and =
+    and adding the prefix u.
+
+    Inputs:
+    ids: a Series with the user IDs
+
+    Outputs:
+    names: a list with the activity name of each user ID
+    """
+
+    ids = ids.astype('str')
+    ids = ids.str.replace('[+=]', '', regex=True)
+    return ['u' + id for id in ids]
+
+
+def trim_event_dataframe(df, trim_length, log_length, case_column='case:concept:name'):
+
+    """
+    This function trims and truncates an event DataFrame before it is converted to an event log. It keeps the
+    traces that converting the whole DataFrame, trimming each trace to trim_length events, removing the traces of
+    length 1 and selecting the first log_length traces would keep, so only the surviving events are converted.
+    The converter orders the traces by the first row of each case and the events of a trace by row, which is the
+    order used here.
+
+    Inputs:
+    df: a DataFrame with one event per row, in the order of the event log
+    trim_length: length to trim each trace to
+    log_length: desired length of returned log
+    case_column: the column with the case of each event
+
+    Outputs:
+    short_df: the rows of the kept events, in the order of df
+    """
+    import pandas as pd
+
+    # trim each trace to its first trim_length events
+    trimmed_df = df[df.groupby(case_column, sort=False).cumcount() < trim_length]
+
+    # remove traces of length 1
+    case_sizes = trimmed_df.groupby(case_column, sort=False)[case_column].transform('size')
+    filtered_df = trimmed_df[case_sizes >= 2]
+
+    # select the first x traces
+    cases = pd.unique(filtered_df[case_column])
+    if len(cases) < log_length:
+        raise IndexError(f"Only {len(cases)} traces with at least 2 events, expected {log_length}")
+
+    return filtered_df[filtered_df[case_column].isin(cases[:log_length])]
+
+
+def dataframe_to_event_log(df, trim_length, log_length, case_column='case:concept:name'):
+
+    """
+    This function converts the traces of an event DataFrame kept by trim_event_dataframe to an EventLog.
+
+    Inputs:
+    df: a DataFrame with one event per row, in the order of the event log
+    trim_length: length to trim each trace to
+    log_length: desired length of returned log
+    case_column: the column with the case of each event
+
+    Outputs:
+    short_log: an event log with the first log_length traces of at least 2 events, trimmed to trim_length
+    """
+    short_df = trim_event_dataframe(df, trim_length, log_length, case_column=case_column)
+
+    return convert_event_dataframe(short_df)
+
+
+def convert_event_dataframe(df):
+
+    """
+    This function converts an event DataFrame to an EventLog, with one trace per case in the order of the first
+    event of each case.
+
+    Inputs:
+    df: a DataFrame with one event per row, in the order of the event log
+
+    Outputs:
+    short_log: the event log of df
+    """
+    from pm4py.objects.conversion.log import converter as log_converter
+    from pm4py.objects.log.obj import EventLog
+
+    log = log_converter.apply(df, variant=log_converter.Variants.TO_EVENT_LOG)
+
+    # a new EventLog, as the logs were built before, so the log attributes of the converter are not exported
+    short_log = EventLog()
+    for trace in log:
+        short_log.append(trace)
+
+    return short_log
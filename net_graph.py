@@ -0,0 +1,168 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+
+class NetGraph:
+
+    """
+    A compressed sparse row (CSR) adjacency of the directed graph formed by the places, transitions and arcs
+    of a Petri net
+
+    Inputs:
+    names: a list of node names, places first and then transitions
+    indptr: an int64 array of length len(names) + 1 where the successors of node i are indices[indptr[i]:indptr[i+1]]
+    indices: an int64 array with the successor of each arc
+
+    Attributes:
+    n_places: the number of places, which are the nodes 0 to n_places - 1
+    """
+
+    def __init__(self, names, indptr, indices, n_places=0):
+        self.names = names
+        self.indptr = indptr
+        self.indices = indices
+        self.n_places = n_places
+
+    @classmethod
+    def from_net(cls, net):
+        """
+        Builds the CSR adjacency of a Petri net directly from its arcs
+        """
+        places = list(net.places)
+        transitions = list(net.transitions)
+        nodes = places + transitions
+        position = {node: i for i, node in enumerate(nodes)}
+
+        sources = np.fromiter((position[arc.source] for arc in net.arcs), dtype=np.int64, count=len(net.arcs))
+        targets = np.fromiter((position[arc.target] for arc in net.arcs), dtype=np.int64, count=len(net.arcs))
+
+        return cls.from_edges([node.name for node in nodes], sources, targets, n_places=len(places))
+
+    @classmethod
+    def from_edges(cls, names, sources, targets, n_places=0):
+        """
+        Builds the CSR adjacency from arrays of edge sources and targets
+        """
+        order = np.argsort(sources, kind='stable')
+        indptr = np.zeros(len(names) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(sources, minlength=len(names)))
+
+        return cls(names, indptr, np.asarray(targets, dtype=np.int64)[order], n_places=n_places)
+
+    @property
+    def n_nodes(self):
+        return len(self.names)
+
+    @property
+    def n_edges(self):
+        return len(self.indices)
+
+    def reverse(self):
+        """
+        Returns the graph with every edge reversed
+        """
+        sources = np.repeat(np.arange(self.n_nodes, dtype=np.int64), np.diff(self.indptr))
+        return NetGraph.from_edges(self.names, self.indices, sources, n_places=self.n_places)
+
+    def successors(self, frontier):
+        """
+        Returns the successors of all nodes of an array, concatenated
+        """
+        starts = self.indptr[frontier]
+        counts = self.indptr[frontier + 1] - starts
+        total = counts.sum()
+
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # the arc positions of each node, laid out back to back
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        return self.indices[offsets]
+
+
+def bfs_distances(graph, source, dist=None):
+    """
+    This function runs a breadth-first search from a node, expanding one level at a time with array operations.
+
+    Inputs:
+    graph: a NetGraph
+    source: the index of the start node
+    dist: an optional int64 array of length graph.n_nodes reused as working memory
+
+    Outputs:
+    dist: the distance of each node from source, or -1 if it is not reachable
+    eccentricity: the largest distance from source to a reachable node
+    """
+    if dist is None:
+        dist = np.empty(graph.n_nodes, dtype=np.int64)
+    dist.fill(-1)
+    dist[source] = 0
+
+    frontier = np.array([source], dtype=np.int64)
+    level = 0
+
+    while True:
+        successors = graph.successors(frontier)
+        successors = np.unique(successors[dist[successors] < 0])
+        if len(successors) == 0:
+            break
+        level += 1
+        dist[successors] = level
+        frontier = successors
+
+    return dist, level
+
+
+def source_eccentricities(graph, sources):
+    """
+    Returns the eccentricity of each source node, reusing one distance array for all searches
+    """
+    dist = np.empty(graph.n_nodes, dtype=np.int64)
+    eccentricities = np.zeros(len(sources), dtype=np.int64)
+
+    for i, source in enumerate(sources):
+        eccentricities[i] = bfs_distances(graph, source, dist)[1]
+
+    return eccentricities
+
+
+# the graph searched by the worker processes of eccentricities, set once per worker by init_graph_worker
+worker_graph = None
+
+
+def init_graph_worker(graph):
+    """
+    Stores the graph in a worker process so it is only sent to it once
+    """
+    global worker_graph
+    worker_graph = graph
+
+
+def worker_eccentricities(sources):
+    """
+    Returns the eccentricities of a chunk of sources in the graph stored by init_graph_worker
+    """
+    return source_eccentricities(worker_graph, sources)
+
+
+def eccentricities(graph, workers=1):
+    """
+    This function finds the eccentricity of every node of a graph (the largest shortest path distance to a node
+    reachable from it) by running one breadth-first search per node, keeping only O(V) working memory per search.
+
+    Inputs:
+    graph: a NetGraph
+    workers: the number of processes to spread the searches over
+
+    Outputs:
+    eccentricities: an int64 array with the eccentricity of each node
+    """
+    sources = np.arange(graph.n_nodes, dtype=np.int64)
+
+    if workers <= 1 or graph.n_nodes < 2:
+        return source_eccentricities(graph, sources)
+
+    chunks = np.array_split(sources, min(graph.n_nodes, workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_graph_worker, initargs=(graph,)) as executor:
+        return np.concatenate(list(executor.map(worker_eccentricities, chunks)))
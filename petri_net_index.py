@@ -0,0 +1,69 @@
+class PetriNetIndex:
+
+    """
+    An adjacency index of a Petri net, built once with a single pass over its arcs so that preset, postset and
+    label lookups do not need to scan net.arcs or net.transitions
+
+    Inputs:
+    net: a Petri net
+
+    Attributes:
+    net: the indexed Petri net
+    preset: a dictionary mapping each place and transition to the list of its input nodes
+    postset: a dictionary mapping each place and transition to the list of its output nodes
+    transitions_by_label: a dictionary mapping each visible label to the list of transitions carrying it
+    single_place_by_label: a dictionary mapping each visible label to the only input place of its first transition,
+    or None if that transition has several input places
+    """
+
+    def __init__(self, net):
+        self.net = net
+
+        self.preset = {}
+        self.postset = {}
+        for node in list(net.places) + list(net.transitions):
+            self.preset[node] = []
+            self.postset[node] = []
+
+        # the lists keep the order of net.arcs so results match a scan over the arcs
+        for arc in net.arcs:
+            self.postset[arc.source].append(arc.target)
+            self.preset[arc.target].append(arc.source)
+
+        self.transitions_by_label = {}
+        for transition in net.transitions:
+            if transition.label is not None:
+                self.transitions_by_label.setdefault(transition.label, []).append(transition)
+
+        self.single_place_by_label = {}
+        for label in self.transitions_by_label:
+            places = self.preset[self.transition_by_label(label)]
+            self.single_place_by_label[label] = places[0] if len(places) == 1 else None
+
+    def input_nodes(self, node):
+        """
+        Returns the list of input nodes (preset) of a place or transition
+        """
+        return self.preset.get(node, [])
+
+    def output_nodes(self, node):
+        """
+        Returns the list of output nodes (postset) of a place or transition
+        """
+        return self.postset.get(node, [])
+
+    def transition_by_label(self, label):
+        """
+        Returns the first transition with the given label, or None if no transition carries it
+        """
+        transitions = self.transitions_by_label.get(label)
+        if transitions is None:
+            return None
+        return transitions[0]
+
+    def single_input_place(self, label):
+        """
+        Returns the only input place of the first transition with the given label, or None if the label is not in
+        the net or its transition has several input places
+        """
+        return self.single_place_by_label.get(label)
@@ -0,0 +1,408 @@
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from generate_petri_nets import dataset_stems as petri_net_stems, tree_path_for
+from spn_cache import file_hash
+
+# the countries of the README workflow
+COUNTRIES = ["uae", "honduras", "spain", "thailand", "brazil"]
+
+# the folder containing the scripts of the workflow
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Step:
+
+    """
+    One step of the pipeline: a function that builds its output files from its input files
+
+    Inputs:
+    name: a unique name for the step
+    function: a module-level function running the step, so it can be sent to a worker process
+    args: the arguments of function
+    inputs: the paths of the files the step reads. The scripts implementing the step are included so that a code
+    change also rebuilds its outputs
+    outputs: the paths of the files the step writes
+    """
+
+    def __init__(self, name, function, args, inputs, outputs):
+        self.name = name
+        self.function = function
+        self.args = args
+        self.inputs = inputs
+        self.outputs = outputs
+
+
+def local_imports(path):
+    """
+    Returns the file names of the modules of the workflow imported anywhere in a script, including the imports
+    inside functions
+    """
+    import ast
+
+    with open(path, "r") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module is not None and node.level == 0:
+            modules.add(node.module.split(".")[0])
+
+    return sorted(module + ".py" for module in modules if os.path.exists(os.path.join(CODE_DIR, module + ".py")))
+
+
+def code_files(*names):
+    """
+    Returns the paths of scripts of the workflow together with the modules of the workflow they import, directly
+    or through other modules, so that a change to a helper module also rebuilds the outputs of the steps using it
+    """
+    files = []
+    queue = list(names)
+    while queue:
+        name = queue.pop(0)
+        if name in files:
+            continue
+        files.append(name)
+        queue.extend(local_imports(os.path.join(CODE_DIR, name)))
+    return [os.path.join(CODE_DIR, name) for name in files]
+
+
+def dataset_stems(data_dir, name):
+    """
+    Returns the paths (without extension) of the coordinated and uncoordinated event logs and Petri nets of a
+    dataset, named as in generate_petri_nets.py. The Brazil logs are named by bot score band, _1 (coordinated) and
+    _2 (uncoordinated)
+    """
+    u_stem, c_stem = petri_net_stems(os.path.dirname(data_dir), name)
+    return c_stem, u_stem
+
+
+def split_name(country):
+    """
+    Returns the dataset name of the behaviours split from the uncoordinated log of a country, as used by the
+    calculate scripts (brazil_2_split for the Brazil _2 log)
+    """
+    if country == "brazil":
+        return "brazil_2_split"
+    return country + "_split"
+
+
+def run_script(script, args):
+    """
+    Runs one of the scripts of the workflow in a separate Python process
+    """
+    subprocess.run([sys.executable, os.path.join(CODE_DIR, script)] + args, check=True)
+
+
+def discover_net(log_path, pn_path):
+    """
+    Discovers the Petri net of an event log and saves it, with its process tree next to it
+    """
+    import pm4py
+    from generate_petri_nets import discover_petri_nets
+
+    net, im, fm = discover_petri_nets(log_path, tree_path=tree_path_for(pn_path))
+    pm4py.write_pnml(net, im, fm, pn_path)
+
+
+def split_dataset(log_path, pn_path, output_prefix):
+    """
+    Splits the behaviours of an event log with split_logs_behaviours.py
+    """
+    from split_logs_behaviours import split_behaviours
+
+    split_behaviours(log_path, pn_path, output_prefix)
+
+
+def structural_metrics(c_stem, u_stem, output_path):
+    """
+    Calculates the structural measures of the coordinated and uncoordinated Petri nets of a dataset
+    """
+    from calculate_structural_metrics import calculate_structural_metrics, write_records
+
+    records = calculate_structural_metrics([u_stem + ".pnml", c_stem + ".pnml"], log_paths=[u_stem + ".xes", c_stem + ".xes"])
+    for record, behaviour in zip(records, ["uncoordinated", "coordinated"]):
+        record["behaviour"] = behaviour
+
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    write_records(records, output_path)
+
+
+def ks_entropy_metrics(c_stem, u_stem, output_path):
+    """
+    Calculates the KS entropy of the coordinated and uncoordinated Petri nets of a dataset
+    """
+    from calculate_ks_entropy import calculate_ks_entropy
+
+    results = {
+        "uncoordinated": calculate_ks_entropy(u_stem + ".pnml", u_stem + ".xes"),
+        "coordinated": calculate_ks_entropy(c_stem + ".pnml", c_stem + ".xes"),
+    }
+
+    with open(output_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def waiting_time_metrics(name, project_root, output_dir):
+    """
+    Compares the mean waiting times of the coordinated and uncoordinated behaviours of a dataset
+    """
+    from calculate_mean_waiting_time import run_batch_country
+
+    run_batch_country(name, project_root, output_dir)
+
+
+def metric_steps(name, data_dir, results_dir, project_root):
+    """
+    Returns the steps calculating all measures of a dataset from its event logs and Petri nets
+    """
+    c_stem, u_stem = dataset_stems(data_dir, name)
+    output_dir = os.path.join(results_dir, name)
+    nets = [c_stem + ".pnml", u_stem + ".pnml"]
+    logs = [c_stem + ".xes", u_stem + ".xes"]
+
+    return [
+        Step(name + ":structural", structural_metrics, (c_stem, u_stem, os.path.join(output_dir, "structural_metrics.jsonl")),
+             nets + logs + code_files("calculate_structural_metrics.py", "calculate_centrality.py", "calculate_constructs.py", "net_graph.py"),
+             [os.path.join(output_dir, "structural_metrics.jsonl")]),
+        Step(name + ":ks_entropy", ks_entropy_metrics, (c_stem, u_stem, os.path.join(output_dir, "ks_entropy.json")),
+             nets + logs + code_files("calculate_ks_entropy.py", "free_choice_SPN.py"),
+             [os.path.join(output_dir, "ks_entropy.json")]),
+        Step(name + ":waiting_time", waiting_time_metrics, (name, project_root, output_dir),
+             nets + logs + code_files("calculate_mean_waiting_time.py", "free_choice_SPN.py"),
+             [os.path.join(output_dir, name + suffix) for suffix in ["_waiting_times.npz", "_waiting_times.png", "_ks_2samp.json"]]),
+    ]
+
+
+def country_steps(country, project_root, results_dir):
+    """
+    This function lists the steps of the README workflow for one country: generating the event logs, discovering
+    the Petri nets, calculating the measures, splitting the behaviours of the uncoordinated log and calculating
+    the measures of the split behaviours.
+
+    Inputs:
+    country: the name of the country
+    project_root: the project root folder, containing the data folder
+    results_dir: the folder the measures are written to
+
+    Outputs:
+    steps: a list of Steps
+    """
+    data_dir = os.path.join(project_root, "data")
+    c_stem, u_stem = dataset_stems(data_dir, country)
+
+    steps = []
+
+    # event logs
+    if country in ["uae", "honduras"]:
+        for dataset, stem in [(country + "-bad-anonymized", c_stem), (country + "-good-anonymized", u_stem)]:
+            steps.append(Step(country + ":log:" + dataset, run_script, ("generate_logs_uae_honduras.py", ["--dataset", dataset]),
+                              [os.path.join(data_dir, dataset)] + code_files("generate_logs_uae_honduras.py"), [stem + ".xes"]))
+    elif country in ["spain", "thailand"]:
+        raw_files = sorted(p for p in glob.glob(os.path.join(data_dir, "raw_data", "*")) if os.path.basename(p).lower().startswith(country) and p.lower().endswith(".gzip.parquet"))
+        steps.append(Step(country + ":logs", run_script, ("generate_logs_spain_thailand.py", ["--country", country]),
+                          raw_files + code_files("generate_logs_spain_thailand.py"), [c_stem + ".xes", u_stem + ".xes"]))
+    elif country == "brazil":
+        raw_files = sorted(glob.glob(os.path.join(data_dir, "brazil_elections-2018", "*.csv")))
+        steps.append(Step(country + ":logs", run_script, ("generate_logs_brazil.py", []),
+                          raw_files + code_files("generate_logs_brazil.py"), [c_stem + ".xes", u_stem + ".xes"]))
+
+    # Petri nets
+    for stem in [c_stem, u_stem]:
+        steps.append(Step(country + ":net:" + os.path.basename(stem), discover_net, (stem + ".xes", stem + ".pnml"),
+                          [stem + ".xes"] + code_files("generate_petri_nets.py"), [stem + ".pnml", tree_path_for(stem + ".pnml")]))
+
+    steps.extend(metric_steps(country, data_dir, results_dir, project_root))
+
+    # split behaviours of the uncoordinated log
+    split = split_name(country)
+    split_c_stem, split_u_stem = dataset_stems(data_dir, split)
+    steps.append(Step(country + ":split", split_dataset, (u_stem + ".xes", u_stem + ".pnml", os.path.join(data_dir, split)),
+                      [u_stem + ".xes", u_stem + ".pnml"] + code_files("split_logs_behaviours.py"),
+                      [stem + extension for stem in [split_c_stem, split_u_stem] for extension in [".xes", ".pnml", ".ptml"]]))
+
+    steps.extend(metric_steps(split, data_dir, results_dir, project_root))
+
+    return steps
+
+
+def load_state(state_path):
+    """
+    Returns the saved state of the pipeline: for each step, the hashes of its inputs when it last succeeded and
+    its duration
+    """
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, "r") as f:
+        return json.load(f)
+
+
+def save_state(state, state_path):
+    """
+    Writes the state of the pipeline, replacing the old file only once the new one is complete
+    """
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+def run_step(step):
+    """
+    Runs a step in a worker process and returns its duration in seconds
+    """
+    for output in step.outputs:
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    start = time.perf_counter()
+    step.function(*step.args)
+    return time.perf_counter() - start
+
+
+def run_pipeline(steps, state_path, workers=1, force=False, dry_run=False):
+    """
+    This function runs a set of steps as a graph of file dependencies: a step starts once the steps producing its
+    inputs are finished, and independent steps run in parallel. A step is skipped when its outputs exist and its
+    inputs have the same content hashes as when it last ran. If the inputs of a step are missing but its outputs
+    exist (e.g. the raw datasets were removed after generating the event logs), the existing outputs are used.
+
+    Inputs:
+    steps: a list of Steps
+    state_path: the JSON file keeping the input hashes and durations of the steps
+    workers: the number of steps run at the same time
+    force: whether to run every step, even if it is up to date
+    dry_run: whether to only report which steps would run
+
+    Outputs:
+    status: a dictionary mapping each step name to "up to date", "ran", "would run" or "failed"
+    """
+    state = load_state(state_path)
+
+    producers = {output: step.name for step in steps for output in step.outputs}
+    dependencies = {step.name: {producers[path] for path in step.inputs if path in producers} for step in steps}
+
+    status = {}
+    pending = list(steps)
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            scheduled = False
+            for step in list(pending):
+                if not all(dependency in status for dependency in dependencies[step.name]):
+                    continue
+                pending.remove(step)
+                scheduled = True
+
+                dependency_status = [status[dependency] for dependency in dependencies[step.name]]
+
+                if "failed" in dependency_status:
+                    print("skipping", step.name, "(a step it depends on failed)")
+                    status[step.name] = "failed"
+                    continue
+
+                if dry_run and "would run" in dependency_status:
+                    print("would run:", step.name)
+                    status[step.name] = "would run"
+                    continue
+
+                missing_inputs = [path for path in step.inputs if not os.path.exists(path)]
+                outputs_exist = all(os.path.exists(path) for path in step.outputs)
+
+                if missing_inputs:
+                    if outputs_exist:
+                        print("up to date:", step.name, "(inputs missing, using the existing outputs)")
+                        status[step.name] = "up to date"
+                    else:
+                        print("cannot run", step.name, "- missing inputs:", ", ".join(missing_inputs))
+                        status[step.name] = "failed"
+                    continue
+
+                # a rebuilt input with the same content as before does not make the step outdated
+                input_hashes = {path: file_hash(path) for path in step.inputs}
+
+                if not force and outputs_exist and state.get(step.name, {}).get("inputs") == input_hashes:
+                    print("up to date:", step.name)
+                    status[step.name] = "up to date"
+                elif dry_run:
+                    print("would run:", step.name)
+                    status[step.name] = "would run"
+                else:
+                    print("running:", step.name)
+                    running[executor.submit(run_step, step)] = (step, input_hashes)
+
+            if not running:
+                if not scheduled:
+                    # the remaining steps wait on each other (a cycle, or a step reading its own output), so
+                    # none of them can ever start
+                    for step in pending:
+                        print("cannot run", step.name, "- it depends on itself through", ", ".join(sorted(dependencies[step.name])))
+                        status[step.name] = "failed"
+                    pending = []
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                step, input_hashes = running.pop(future)
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    print("failed:", step.name, "-", repr(e))
+                    status[step.name] = "failed"
+                    continue
+
+                print("finished:", step.name, "in", round(seconds, 1), "seconds")
+                status[step.name] = "ran"
+                state[step.name] = {"inputs": input_hashes, "seconds": seconds, "finished": time.time()}
+                save_state(state, state_path)
+
+    return status
+
+
+if __name__ == "__main__":
+    from load_config import load_config
+    import argparse
+
+    config = load_config()
+
+    parser = argparse.ArgumentParser(description="Run the full workflow, rebuilding only the outdated event logs, Petri nets and measures.")
+    parser.add_argument("--countries", type=str, nargs="+", choices=COUNTRIES, default=COUNTRIES, help="Countries to run the workflow for")
+    parser.add_argument("--workers", type=int, default=1, help="Number of steps run at the same time")
+    parser.add_argument("--results-dir", type=str, default=None, help="Folder the measures are written to (default: <project_root>/results)")
+    parser.add_argument("--state", type=str, default=None, help="State file of the pipeline (default: <project_root>/data/.pipeline_state.json)")
+    parser.add_argument("--force", action="store_true", help="Run every step, even if it is up to date")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the steps that would run")
+    args = parser.parse_args()
+
+    results_dir = args.results_dir
+    if results_dir is None:
+        results_dir = os.path.join(config["project_root"], "results")
+
+    state_path = args.state
+    if state_path is None:
+        state_path = os.path.join(config["project_root"], "data", ".pipeline_state.json")
+
+    steps = []
+    for country in args.countries:
+        steps.extend(country_steps(country, config["project_root"], results_dir))
+
+    status = run_pipeline(steps, state_path, workers=args.workers, force=args.force, dry_run=args.dry_run)
+
+    # report the duration of the steps that ran, from the saved state
+    state = load_state(state_path)
+    print()
+    for step in steps:
+        seconds = state.get(step.name, {}).get("seconds")
+        duration = "" if seconds is None or status[step.name] != "ran" else " (" + str(round(seconds, 1)) + " s)"
+        print(step.name + ":", status[step.name] + duration)
+
+    if "failed" in status.values():
+        sys.exit(1)
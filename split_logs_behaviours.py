@@ -6,15 +6,19 @@ def log_split(log, net):
     This function splits an event log into its coordinated and uncoordinated components by removing any flower patterns
 
     Inputs:
-    log: the event log to split into coordinated and uncoordinated components
+    log: the event log to split into coordinated and uncoordinated components, or a ColumnarLog of it
     net: the petri net discovered from the event log to split
 
     Outputs:
     c_log: the event log corresponding to the coordinated component of log
     u_log: the event log corresponding to the uncoordinated component of log
+    (both are ColumnarLogs if log is a ColumnarLog)
     '''
     
     from pm4py.objects.log.obj import EventLog
+    from petri_net_index import PetriNetIndex
+    from columnar_log import ColumnarLog
+    import numpy as np
     
 
     # initialise split logs
@@ -22,13 +26,15 @@ def log_split(log, net):
     c_log = EventLog()
     u_log = EventLog()
 
+    index = PetriNetIndex(net)
+
     # find the transition that begins the loop in the petri net
 
     loop_t = [t for t in net.transitions if 'init_loop_' in t.name]
 
     # find the place immediately after the loop transition
 
-    loop_place = [arc.target for arc in net.arcs if arc.source in loop_t]
+    loop_place = [p for t in loop_t for p in index.output_nodes(t)]
 
     # code to only choose loops that constitute a flower
 
@@ -36,17 +42,23 @@ def log_split(log, net):
 
     for p in loop_place:
         count = 0
-        for arc in net.arcs:
-            if arc.source == p and arc.target.label is not None:
+        for t in index.output_nodes(p):
+            if t.label is not None:
                 count+=1
         if count >=20:
             flower_places.append(p)
 
     # find all transitions that occur after this loop place
 
-    flower_users = [arc.target.label for arc in net.arcs if arc.source in flower_places and arc.target.label is not None]
+    flower_users = {t.label for p in flower_places for t in index.output_nodes(p) if t.label is not None}
 
     # remove all traces that contain any if the flower users
+    if isinstance(log, ColumnarLog):
+        flower_codes = [log.code_of(label) for label in flower_users if log.code_of(label) >= 0]
+        is_flower_event = np.isin(log.activities, flower_codes)
+        is_coordinated = np.bincount(log.case_index()[is_flower_event], minlength=len(log)) > 0
+        return log.select_cases(is_coordinated), log.select_cases(~is_coordinated)
+
     for trace in log:
         if any(event['concept:name'] in flower_users for event in trace):
             c_log.append(trace)
@@ -58,31 +70,24 @@ def log_split(log, net):
     return c_log, u_log
 
 
-if __name__ == "__main__":
-    import pm4py
-
-    from load_config import load_config
-    import os
-    import argparse
-    from pm4py.objects.log.importer.xes import importer as xes_importer
+def split_behaviours(log_path, pn_path, output_prefix):
 
-    config = load_config()
+    '''
+    This function splits an event log with its Petri net into coordinated and uncoordinated behaviors, discovers a
+    Petri net for each and saves the event logs, Petri nets and process trees as <output_prefix>_coordinated and
+    <output_prefix>_uncoordinated (.xes, .pnml and .ptml)
 
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--country", type=str, required=True, choices=["brazil", "uae", "spain", "honduras", "thailand"], help="Name of the country to split mixed behaviors from")
-    args = parser.parse_args()
+    Inputs:
+    log_path: the path to the event log to split
+    pn_path: the path to the Petri net discovered from the event log
+    output_prefix: the path prefix of the saved files
+    '''
 
-    if args.country == "brazil":
-        log_path = os.path.join(config["project_root"], "data", args.country.lower() + "_2.xes")
-        pn_path = os.path.join(config["project_root"], "data", args.country.lower() + "_2.pnml")
-    else:
-        log_path = os.path.join(config["project_root"], "data", args.country.lower() + "_uncoordinated.xes")
-        pn_path = os.path.join(config["project_root"], "data", args.country.lower() + "_uncoordinated.pnml")
+    import pm4py
+    from pm4py.objects.log.importer.xes import importer as xes_importer
 
-    
-    # load petri net and event log
+    # load petri net and event log, keeping every attribute as the split event logs are written out
 
-    
     variant = xes_importer.Variants.ITERPARSE
     parameters = {variant.value.Parameters.TIMESTAMP_SORT: True}
     log = xes_importer.apply(log_path, variant=variant, parameters=parameters)
@@ -92,14 +97,41 @@ if __name__ == "__main__":
 
     c_log, u_log = log_split(log, net)
 
+    # discover the process trees and convert them, as pm4py.discover_petri_net_inductive does
     print('discover uncoordinated petri net...')
-    u_net, u_im, u_fm = pm4py.discover_petri_net_inductive(u_log, noise_threshold=0.2)
+    u_tree = pm4py.discover_process_tree_inductive(u_log, noise_threshold=0.2)
+    u_net, u_im, u_fm = pm4py.convert_to_petri_net(u_tree)
     print('discover coordinated petri net...')
-    c_net, c_im, c_fm = pm4py.discover_petri_net_inductive(c_log, noise_threshold=0.2)
+    c_tree = pm4py.discover_process_tree_inductive(c_log, noise_threshold=0.2)
+    c_net, c_im, c_fm = pm4py.convert_to_petri_net(c_tree)
+
+
+    pm4py.write_xes(u_log, output_prefix + "_uncoordinated.xes")
+    pm4py.write_xes(c_log, output_prefix + "_coordinated.xes")
+    pm4py.write_pnml(u_net, u_im, u_fm, output_prefix + "_uncoordinated.pnml")
+    pm4py.write_pnml(c_net, c_im, c_fm, output_prefix + "_coordinated.pnml")
+
+    # the process trees are saved after the event logs, so calculate_constructs.py sees them as up to date
+    pm4py.write_ptml(u_tree, output_prefix + "_uncoordinated.ptml")
+    pm4py.write_ptml(c_tree, output_prefix + "_coordinated.ptml")
 
 
-    pm4py.write_xes(u_log, os.path.join(config["project_root"], "data", args.country.lower() + "_split_uncoordinated.xes"))
-    pm4py.write_xes(c_log, os.path.join(config["project_root"], "data", args.country.lower() + "_split_coordinated.xes"))
-    pm4py.write_pnml(u_net, u_im, u_fm, os.path.join(config["project_root"], "data", args.country.lower() + "_split_uncoordinated.pnml"))
-    pm4py.write_pnml(c_net, c_im, c_fm, os.path.join(config["project_root"], "data", args.country.lower() + "_split_coordinated.pnml"))
+if __name__ == "__main__":
+    from load_config import load_config
+    import os
+    import argparse
+
+    config = load_config()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--country", type=str, required=True, choices=["brazil", "uae", "spain", "honduras", "thailand"], help="Name of the country to split mixed behaviors from")
+    args = parser.parse_args()
+
+    if args.country == "brazil":
+        log_path = os.path.join(config["project_root"], "data", args.country.lower() + "_2.xes")
+        pn_path = os.path.join(config["project_root"], "data", args.country.lower() + "_2.pnml")
+    else:
+        log_path = os.path.join(config["project_root"], "data", args.country.lower() + "_uncoordinated.xes")
+        pn_path = os.path.join(config["project_root"], "data", args.country.lower() + "_uncoordinated.pnml")
 
+    split_behaviours(log_path, pn_path, os.path.join(config["project_root"], "data", args.country.lower() + "_split"))
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+
+# bump when generate_P or generate_F change their output so old entries are not reused
+CACHE_VERSION = 3
+
+# the cache is trimmed back under this size, dropping the least recently used entries first
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def file_hash(file_path):
+    """
+    Returns the SHA-256 hex digest of the contents of a file
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_cache_dir(log_path):
+    """
+    Returns the shared cache folder used for the logs in the same folder as log_path
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(log_path)), ".spn_cache")
+
+
+def touch(entry_path):
+    """
+    Marks a cache entry as recently used, unless another process has evicted it since it was read
+    """
+    try:
+        os.utime(entry_path)
+    except FileNotFoundError:
+        pass
+
+
+def evict(cache_dir, max_bytes):
+    """
+    This function deletes the least recently used cache entries until the cache is at most max_bytes in size.
+
+    Inputs:
+    cache_dir: the cache folder
+    max_bytes: the maximum total size of the entries
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        # temporary files are still being written by another process
+        if name.endswith((".json", ".ptml")) and ".tmp" not in name:
+            path = os.path.join(cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # evicted by another process since the folder was listed
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        total -= size
+
+
+def cached_parameters(kind, log_path, pn_path, compute, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    This function returns stochastic parameters (P or F) of a log/net pair from a cache keyed by the content
+    hashes of the event log and the Petri net, computing and storing them if they are not cached yet.
+    Changing either file changes the key, so stale entries are never returned.
+
+    Inputs:
+    kind: the name of the parameters, e.g. "P" or "F"
+    log_path: the path to the event log (.xes)
+    pn_path: the path to the Petri net (.pnml)
+    compute: a function without arguments returning the parameters as a dictionary keyed by transition name
+    cache_dir: the cache folder, by default a .spn_cache folder next to the event log
+    max_bytes: the maximum total size of the cache
+
+    Outputs:
+    parameters: the dictionary returned by compute, or its cached copy
+    """
+    if cache_dir is None:
+        cache_dir = default_cache_dir(log_path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    key = hashlib.sha256("|".join([str(CACHE_VERSION), kind, file_hash(log_path), file_hash(pn_path)]).encode()).hexdigest()
+    entry_path = os.path.join(cache_dir, kind + "_" + key + ".json")
+
+    try:
+        with open(entry_path, "r") as f:
+            parameters = json.load(f)
+    except FileNotFoundError:
+        # not cached yet, or evicted by another process
+        parameters = None
+
+    if parameters is not None:
+        touch(entry_path)
+        return parameters
+
+    parameters = compute()
+
+    # a temporary file per process, so processes computing the same entry at the same time do not collide
+    tmp_path = entry_path + "." + str(os.getpid()) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(parameters, f)
+    os.replace(tmp_path, entry_path)
+
+    evict(cache_dir, max_bytes)
+
+    return parameters
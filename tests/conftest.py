@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+# the scripts are imported as top-level modules, as when they are run from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# the synthetic datasets the tests are run on: (seed, coordinated fraction, group)
+SYNTHETIC_CASES = [(seed, fraction, group) for seed in (0, 4) for fraction in (0.2, 0.5) for group in ("uncoordinated", "coordinated")]
+
+
+def write_synthetic_log(df, log_path):
+    """
+    Writes the event log of every trace of df with at least 2 events, as generate_logs_spain_thailand.py does
+    """
+    import pm4py
+    from generate_logs_spain_thailand import preprocess_log
+
+    log_length = int((df["case:concept:name"].value_counts() >= 2).sum())
+    pm4py.write_xes(preprocess_log(df, log_length), log_path)
+
+
+@pytest.fixture(scope="session", params=SYNTHETIC_CASES, ids=lambda case: "seed%d-%s-%s" % case)
+def synthetic_net(request, tmp_path_factory):
+    """
+    A synthetic event log of benchmark.py and the Petri net discovered from it as in the original
+    generate_petri_nets.py, saved as files
+
+    Outputs:
+    log_path: the path to the event log (.xes)
+    pn_path: the path to the Petri net (.pnml)
+    """
+    import pm4py
+    from benchmark import generate_retweet_dataframe
+    from generate_logs_spain_thailand import preprocess_df
+
+    seed, fraction, group = request.param
+
+    df = generate_retweet_dataframe(n_users=40, n_posts=100, trace_length=6, coordinated_fraction=fraction, seed=seed)
+    uncoordinated_df, coordinated_df = preprocess_df(df)
+
+    folder = tmp_path_factory.mktemp("synthetic")
+    log_path = str(folder / (group + ".xes"))
+    pn_path = str(folder / (group + ".pnml"))
+
+    write_synthetic_log(uncoordinated_df if group == "uncoordinated" else coordinated_df, log_path)
+
+    net, im, fm = pm4py.discover_petri_net_inductive(pm4py.read_xes(log_path), noise_threshold=0.2)
+    pm4py.write_pnml(net, im, fm, pn_path)
+
+    return log_path, pn_path
@@ -0,0 +1,503 @@
+# the implementations of the original scripts, kept unchanged as the reference the optimised code is tested against
+
+import numpy as np
+
+
+def find_previous_transitions(net, current_transition, visited_transitions=None, visited_places=None):
+
+    """
+    Finds the previous possible non-silent transitions from some starting transition
+
+    Inputs:
+    net: a Petri net
+    current_transition: the transition to find all previous transitions from
+
+    Outputs:
+    transition_list: a list of previous possible transitions
+    """
+    if visited_transitions is None:
+        visited_transitions = set()
+    if visited_places is None:
+        visited_places = set()
+
+    visited_transitions.add(current_transition)
+
+    transition_list = []
+
+    while len(transition_list) == 0:
+        # find associated places for the current transition
+        places = [arc.source for arc in net.arcs if arc.target == current_transition]
+
+        # break while loop if no more previous transitions
+        if len(places) == 0 or places[0].name == 'source':
+            break
+
+        # handle synchronised transitions (multiple places)
+        if len(places) > 1:
+            synchronised_transitions = []
+            for place in places:
+                input_transitions = [arc.source for arc in net.arcs if arc.target == place]
+
+                for t in input_transitions:
+                    visited_transitions.add(t)
+                visited_places.add(place)
+
+                for t in input_transitions:
+                    if t.label is not None:
+                        synchronised_transitions.append(t)
+                    else:
+                        synchronised_transitions.extend(find_previous_transitions(net, t, visited_transitions, visited_places))
+
+            flat_synchronised_transitions = [item for sublist in synchronised_transitions for item in (sublist if isinstance(sublist, list) else [sublist])]
+
+            transition_list.append(flat_synchronised_transitions)
+            break
+
+        # explore previous transitions
+        found_transition = False
+        for place in places:
+            if place in visited_places:
+                continue  # skip if the place has already been visited
+
+            visited_places.add(place)  # mark the place as visited
+
+            input_transitions = [arc.source for arc in net.arcs if arc.target == place]
+
+            for input_transition in input_transitions:
+                if input_transition in visited_transitions:
+                    continue  # skip if the transition has already been visited
+
+                visited_transitions.add(input_transition)  # mark the transition as visited
+
+                if input_transition.label is not None:
+                    transition_list.append([input_transition])
+                    found_transition = True
+
+                if input_transition.label is None:
+                    transition_list.extend(find_previous_transitions(net, input_transition, visited_transitions, visited_places))
+
+        # if no transition was found, break the loop
+        if not found_transition:
+            break
+
+    return transition_list
+
+def generate_F(net, log):
+
+    """
+    Finds a dictionary of pdfs associated with each transitions in the net
+
+    Inputs:
+    net: the Petri net
+    log: the event log the Petri net was discovered from
+
+    Outputs:
+    F: a dictionary containing pdfs for each key (transition in the Petri net)
+    """
+
+    transitions = [t for t in net.transitions if t.label is not None]
+
+    previous_transitions_dict = {t: 0 for t in transitions}
+
+    # generate a dictionary of previous possible transitions
+    for t in transitions:
+        previous_transitions_dict[t] = find_previous_transitions(net, t)
+
+
+    # initialise time delay dict
+    delay_time_dict = {k: 0 for k in previous_transitions_dict.keys()}
+
+    for key in previous_transitions_dict.keys():
+        delay_time = []
+        for t_list in previous_transitions_dict[key]:
+            if len(t_list) == 1: # if only one possible transition, search log and add time delay
+                transition = t_list[0]
+
+                for trace in log:
+                    for i in range(1, len(trace)):
+                        curr_event = trace[i]
+                        prev_event = trace[i-1]
+
+                        if curr_event['concept:name'] == key.label and prev_event['concept:name'] == transition.label:
+                            delay_time.append((curr_event['time:timestamp'] - prev_event['time:timestamp']).total_seconds())
+
+            else: # if multiple possible transitions (synchronised events), search log and add the minimum time delay
+
+                t_list_names = [t.label for t in t_list]
+                for trace in log:
+                    trace_event_names = {event['concept:name'] for event in trace}
+                    timestamp_b = None
+                    timestamp_a = None
+
+                    if any(t_list_name in trace_event_names for t_list_name in t_list_names) and key.label in trace_event_names:
+                        for event in trace:
+                            if event['concept:name'] == key.label:
+                                timestamp_b = event['time:timestamp']
+                        delay_time_single = np.inf
+                        for event in trace:
+                            if event['concept:name'] in t_list_names:
+                                timestamp_a = event['time:timestamp']
+                                delta = (timestamp_b - timestamp_a).total_seconds()
+
+                                if delta < delay_time_single and delta >= 0:
+                                    delay_time_single = delta
+                        if delay_time_single != np.inf:
+                            delay_time.append(delay_time_single)
+
+        delay_time_dict[key] = delay_time
+
+    name_keys = [t.name for t in net.transitions]
+
+    label_time_differences = {key: [] for key in name_keys}
+
+    for key in delay_time_dict.keys():
+        label_time_differences[key.name] = delay_time_dict[key]
+
+
+    F = {key: 0 for key in name_keys}
+
+    for label in label_time_differences.keys():
+        times = label_time_differences[label]
+        F[label] = times
+
+    return F
+
+
+def mean_waiting_times(F):
+
+    """
+    The mean delays of calculate_mean_waiting_times, computed from the delays F of one Petri net
+    """
+
+    mean_times = []
+
+    for f in F:
+        sum = 0
+        cnt = 0
+        for t in F[f]:
+            sum+=t/1000
+            cnt+=1
+        if sum > 0:
+            avg = sum/cnt
+            mean_times.append(avg)
+
+    return np.array(mean_times)
+
+
+def read_log(file_path):
+
+    """
+    Reads an event log as the original analysis scripts did, with the ITERPARSE importer sorting each trace by time
+    """
+    from pm4py.objects.log.importer.xes import importer as xes_importer
+
+    variant = xes_importer.Variants.ITERPARSE
+    parameters = {variant.value.Parameters.TIMESTAMP_SORT: True}
+
+    return xes_importer.apply(file_path, variant=variant, parameters=parameters)
+
+
+def generate_P(log, net, im, fm):
+
+    """
+    Generates the dictionary P containing probabilities of transitioning to some transition
+
+    Inputs:
+    log: the event log
+    net: the Petri net discovered from the event log
+    im: the initial marking
+    fm: the final marking
+
+    Outputs:
+    P: the dictionary containing transition probabilities
+    """
+    from pm4py.algo.conformance.tokenreplay import algorithm as token_replay
+    from pm4py.objects.log.obj import EventLog
+
+    keys = [t.name for t in net.transitions]
+
+    # initialise the frequency dict
+    freq = {key: 0 for key in keys}
+
+    for trace in log:
+        # find fitness of trace to petri net
+        trace_log = EventLog()
+        trace_log.append(trace)
+        fitness = token_replay.apply(trace_log, net, im, fm)
+
+        if fitness[0]['trace_fitness'] == 1.0:
+            # if trace is in net, get the activated transitions required to achieve this trace in net
+            activated_transitions = fitness[0]['activated_transitions']
+
+            # update frequencies
+            for transition in activated_transitions:
+                label = transition.name
+                freq[label] += 1
+
+
+    places = [p for p in net.places]
+
+    P = freq
+
+    for place in places:
+        outgoing_transitions = [arc.target for arc in net.arcs if arc.source == place]
+
+        # find number of output transitions per place
+        total = 0
+        for t in outgoing_transitions:
+            total = total + freq[t.name]
+
+        if total == 0:
+            for t in outgoing_transitions:
+                P[t.name] = 0.0
+        else:
+            # divide freq for place by total for place
+            for t in outgoing_transitions:
+                P[t.name] = freq[t.name]/total
+
+    return P
+
+
+def get_transition_by_name(transitions, name):
+    for transition in transitions:
+        if transition.label == name:
+            return transition
+    return None
+
+
+def calculate_ks_entropy(pn_file_path, log_file_path):
+
+    """
+    The KS entropy of calculate_ks_entropy.py
+    """
+    import pm4py
+
+    net, im, fm = pm4py.read_pnml(pn_file_path)
+    log = read_log(log_file_path)
+
+    freq_of_places = {}
+
+
+    for trace in log:
+        for activity in trace:
+            name = activity["concept:name"]
+            transition = get_transition_by_name(net.transitions, name)
+            places = [arc.source for arc in net.arcs if arc.target == transition]
+            if len(places) == 1:
+                place = places[0]
+                if place not in freq_of_places:
+                    freq_of_places[place] = 1
+                else:
+                    freq_of_places[place] += 1
+
+    total = sum(freq_of_places.values())
+
+    mu = {k: v / total for k, v in freq_of_places.items()}
+
+    P = generate_P(log, net, im, fm)
+
+    ks = 0
+    for place in mu:
+        transitions = [arc.target for arc in net.arcs if arc.source == place]
+        total_sum = 0
+        for transition in transitions:
+            if P[transition.name] > 0:
+                total_sum += -(P[transition.name])*np.log2(P[transition.name])
+        total_sum*=mu[place]
+        ks+=total_sum
+    return ks
+
+
+def networkx_graph(file_path):
+
+    """
+    The directed graph of a Petri net built by calculate_diameter.py
+    """
+    import networkx as nx
+    import pm4py
+
+    # read in the petri net path
+    net, im, fm = pm4py.read_pnml(file_path)
+
+    # initialise a directed graph
+    G = nx.DiGraph()
+
+    # add the places from the net as nodes to G
+    for place in net.places:
+        G.add_node(place.name, type="place")
+
+    # add transitions from the net as nodes to G
+    for transition in net.transitions:
+        label = transition.label if transition.label else transition.name
+        G.add_node(transition.name, type="transition", label=label)
+
+    # add the arcs from the net as edges in G
+    for arc in net.arcs:
+        G.add_edge(arc.source.name, arc.target.name)
+
+    return G
+
+
+def find_petri_net_diameter(file_path):
+
+    """
+    The diameter of calculate_diameter.py
+    """
+    import networkx as nx
+
+    G = networkx_graph(file_path)
+
+    # find the shortest path length between all nodes in G
+    lengths = dict(nx.all_pairs_shortest_path_length(G))
+
+    # find the longest shortest path
+    diameter = 0
+    for source in lengths:
+        for target in lengths[source]:
+            diameter = max(diameter, lengths[source][target])
+
+    return diameter
+
+
+def calculate_centrality(file_path):
+
+    """
+    The average centralities of calculate_centrality.py
+    """
+    import pm4py
+    import networkx as nx
+    from pm4py.objects.petri_net.utils.networkx_graph import create_networkx_directed_graph
+
+    net, im, fm = pm4py.read_pnml(file_path)
+
+    G, id = create_networkx_directed_graph(net)
+    cc = nx.closeness_centrality(G)
+
+    eigen = nx.eigenvector_centrality(G, max_iter=1000)
+    between = nx.betweenness_centrality(G)
+    average_cc = sum(cc.values())/len(cc)
+    average_between = sum(between.values())/len(between)
+    average_eigen = sum(eigen.values())/len(eigen)
+
+    return average_cc, average_between, average_eigen
+
+
+def trim_log(log, trim_length, log_length):
+
+    """
+    Trims each trace of an event log, removes the traces of length 1 and keeps the first log_length traces, as the
+    original log generation scripts did
+    """
+    from pm4py.filtering import filter_case_size
+    from pm4py.objects.log.obj import EventLog, Trace
+
+    trimmed_log = EventLog()
+
+    for trace in log:
+        if len(trace) > trim_length:
+            trimmed_trace = Trace()
+            trimmed_trace.attributes.update(trace.attributes)
+            for i in range(trim_length):
+                trimmed_trace.append(trace[i])
+            trimmed_log.append(trimmed_trace)
+        else:
+            trimmed_log.append(trace)
+
+    # remove traces of length 1
+    filtered_log = filter_case_size(trimmed_log, 2, 1e6)
+
+    # select the first x traces
+    short_log = EventLog()
+
+    for i in range(log_length):
+        short_log.append(filtered_log[i])
+
+    return short_log
+
+
+def create_uae_honduras_log(file_path, trim_length, log_length):
+
+    """
+    The event log of a UAE or Honduras jsonlines file built by generate_logs_uae_honduras.py
+    """
+    from pm4py.objects.conversion.log import converter as log_converter
+    import pandas as pd
+
+    data = pd.read_json(file_path, lines = True)
+
+    df = []
+    # select relevant columns in data
+    df = data.loc[:, ['tweet_time', 'userid', 'retweet_tweetid']]
+
+    # convert times to datetime format
+    df['tweet_time'] = pd.to_datetime(df['tweet_time'], unit='ms')
+    # remove problematic ID characters
+    df['userid'] = df['userid'].astype('str')
+    df['userid'] = df['userid'].str.replace('[+=]', '', regex=True)
+    df['userid'] = ['u' + id for id in df['userid']]
+    # convert tweet ID to int
+    df['retweet_tweetid'] = df['retweet_tweetid'].astype('Int64')
+
+    # format dataframe
+    df.sort_values(by = 'tweet_time', ascending=True, inplace=True)
+    df = df[df['retweet_tweetid'].isnull() == False]
+    df = df[df['userid'].isnull() == False]
+
+    cols = ['time:timestamp', 'concept:name', 'case:concept:name']
+    df.columns = cols
+
+    # convert df to log
+    log = log_converter.apply(df, variant=log_converter.Variants.TO_EVENT_LOG)
+
+    return trim_log(log, trim_length, log_length)
+
+
+def create_spain_thailand_logs(dataset_paths, log_length):
+
+    """
+    The uncoordinated and coordinated event logs of the Spain or Thailand parquet files built by
+    generate_logs_spain_thailand.py
+    """
+    from pm4py.objects.conversion.log import converter as log_converter
+    import pandas as pd
+
+    # concatenate all files
+    df = pd.concat((pd.read_parquet(f, engine='pyarrow') for f in dataset_paths), ignore_index=True)
+
+    # remove events that arent reposts
+    df = df[df['is_repost'] == True]
+
+    # remove unneccessary columns
+    keep_columns = ['post_time', 'accountid', 'reposted_postid', 'is_control']
+    df = df[keep_columns]
+
+    # convert time to datetime
+    df['post_time'] = pd.to_datetime(df['post_time'], unit='ms')
+
+    # remove problematic ID characters
+    df['accountid'] = df['accountid'].astype('str')
+    df['accountid'] = df['accountid'].str.replace('[+=]', '', regex=True)
+    df['accountid'] = ['u' + id for id in df['accountid']]
+
+    # convert tweet ID to str
+    df['reposted_postid'] = df['reposted_postid'].astype('str')
+
+    # format dataframe
+    df.sort_values(by = 'post_time', ascending=True, inplace=True)
+    df = df[df['reposted_postid'].isnull() == False]
+    df = df[df['accountid'].isnull() == False]
+
+    # rename df columns to conincide with event log standards
+    cols = ['time:timestamp', 'concept:name', 'case:concept:name', 'is_control']
+    df.columns = cols
+
+    # split the datasets on the is_control variable (True means uncoordinated)
+    uncoordinated_df = df[df['is_control'] == True].drop(columns='is_control')
+    coordinated_df = df[df['is_control'] == False].drop(columns = 'is_control')
+
+    logs = []
+    for group_df in (uncoordinated_df, coordinated_df):
+        log = log_converter.apply(group_df, variant=log_converter.Variants.TO_EVENT_LOG)
+        logs.append(trim_log(log, 10, log_length))
+
+    return logs
@@ -0,0 +1,43 @@
+import pm4py
+import pytest
+
+import reference
+from calculate_centrality import calculate_centrality, graph_centrality
+from net_graph import NetGraph
+
+
+def test_centrality_matches_reference(synthetic_net):
+    log_path, pn_path = synthetic_net
+
+    assert calculate_centrality(pn_path) == pytest.approx(reference.calculate_centrality(pn_path), rel=1e-9, abs=1e-12)
+
+
+def test_approximate_centrality_with_every_pivot_is_exact(synthetic_net):
+    log_path, pn_path = synthetic_net
+    net, im, fm = pm4py.read_pnml(pn_path)
+    graph = NetGraph.from_net(net)
+
+    average_cc, average_between, average_eigen = reference.calculate_centrality(pn_path)
+
+    estimate_cc, estimate_between, estimate_eigen, intervals = graph_centrality(graph, approximate=True, samples=graph.n_nodes)
+
+    assert intervals["samples"] == graph.n_nodes
+    assert estimate_cc == pytest.approx(average_cc, rel=1e-9)
+    assert estimate_between == pytest.approx(average_between, rel=1e-9, abs=1e-12)
+    assert estimate_eigen == pytest.approx(average_eigen, rel=1e-6)
+    # every node is a pivot, so the intervals have no width
+    assert intervals["closeness"] == pytest.approx((estimate_cc, estimate_cc))
+    assert intervals["betweenness"] == pytest.approx((estimate_between, estimate_between))
+
+
+def test_approximate_centrality_intervals(synthetic_net):
+    log_path, pn_path = synthetic_net
+    net, im, fm = pm4py.read_pnml(pn_path)
+    graph = NetGraph.from_net(net)
+
+    estimate_cc, estimate_between, estimate_eigen, intervals = graph_centrality(graph, approximate=True, samples=graph.n_nodes // 2, seed=1)
+
+    for name, estimate in (("closeness", estimate_cc), ("betweenness", estimate_between)):
+        low, high = intervals[name]
+        assert 0 <= estimate <= 1
+        assert low <= estimate <= high
@@ -0,0 +1,22 @@
+import networkx as nx
+import pytest
+
+import reference
+from calculate_diameter import find_petri_net_diameter
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_diameter_matches_reference(synthetic_net, workers):
+    log_path, pn_path = synthetic_net
+
+    assert find_petri_net_diameter(pn_path, workers=workers) == reference.find_petri_net_diameter(pn_path)
+
+
+def test_eccentricities_match_networkx(synthetic_net):
+    log_path, pn_path = synthetic_net
+
+    diameter, eccentricity = find_petri_net_diameter(pn_path, return_eccentricity=True)
+
+    lengths = dict(nx.all_pairs_shortest_path_length(reference.networkx_graph(pn_path)))
+    assert eccentricity == {source: max(lengths[source].values()) for source in lengths}
+    assert diameter == max(eccentricity.values())
@@ -0,0 +1,87 @@
+import numpy as np
+import pm4py
+import pytest
+
+import reference
+from calculate_ks_entropy import calculate_ks_entropy
+
+# the Petri nets read by same_net
+NETS = {}
+
+
+@pytest.fixture
+def same_net(synthetic_net, monkeypatch):
+    """
+    Makes every pm4py.read_pnml of the synthetic Petri net return the same objects. P normalises the counts in
+    place in the order of the set net.places, so in nets that are not free-choice (a place whose output
+    transitions also have other input places) its values depend on that order, which differs between two reads
+    of a .pnml file, and the cached P is shared by the tests
+    """
+    log_path, pn_path = synthetic_net
+    # one net per file for the whole session, as the cached P of one test is read by the next
+    if pn_path not in NETS:
+        NETS[pn_path] = pm4py.read_pnml(pn_path)
+    net, im, fm = NETS[pn_path]
+    read_pnml = pm4py.read_pnml
+    monkeypatch.setattr(pm4py, "read_pnml", lambda file_path, *args, **kwargs: (net, im, fm) if file_path == pn_path else read_pnml(file_path, *args, **kwargs))
+    return log_path, pn_path
+
+
+def fused_ks_entropy(pn_file_path, log_file_path):
+    """
+    The KS entropy of the fused mode written with the per-trace token replay of the original generate_P: every
+    firing of a transition in a fitting trace activates the input place of the transition with the smallest name
+    """
+    from pm4py.algo.conformance.tokenreplay import algorithm as token_replay
+    from pm4py.objects.log.obj import EventLog
+
+    net, im, fm = pm4py.read_pnml(pn_file_path)
+    log = reference.read_log(log_file_path)
+
+    freq_of_places = {}
+    excluded = 0
+    for trace in log:
+        trace_log = EventLog()
+        trace_log.append(trace)
+        fitness = token_replay.apply(trace_log, net, im, fm)[0]
+        if fitness["trace_fitness"] != 1.0:
+            excluded += 1
+            continue
+        for transition in fitness["activated_transitions"]:
+            places = [arc.source for arc in net.arcs if arc.target == transition]
+            if places:
+                place = min(places, key=lambda p: p.name)
+                freq_of_places[place] = freq_of_places.get(place, 0) + 1
+
+    P = reference.generate_P(log, net, im, fm)
+
+    total = sum(freq_of_places.values())
+    ks = 0
+    for place, count in freq_of_places.items():
+        for transition in [arc.target for arc in net.arcs if arc.source == place]:
+            if P[transition.name] > 0:
+                ks += -(count / total) * P[transition.name] * np.log2(P[transition.name])
+    return ks, excluded
+
+
+@pytest.mark.parametrize("columnar, use_cache", [(False, False), (True, False), (False, True)])
+def test_ks_entropy_matches_reference(same_net, columnar, use_cache):
+    log_path, pn_path = same_net
+
+    expected = reference.calculate_ks_entropy(pn_path, log_path)
+
+    assert calculate_ks_entropy(pn_path, log_path, columnar=columnar, use_cache=use_cache) == pytest.approx(expected, rel=1e-12)
+    # a second call reads the cached parameters
+    assert calculate_ks_entropy(pn_path, log_path, columnar=columnar, use_cache=use_cache) == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize("columnar, use_cache", [(False, False), (True, False), (True, True)])
+def test_fused_ks_entropy_matches_reference(same_net, columnar, use_cache):
+    log_path, pn_path = same_net
+
+    expected, expected_excluded = fused_ks_entropy(pn_path, log_path)
+
+    ks, excluded = calculate_ks_entropy(pn_path, log_path, columnar=columnar, use_cache=use_cache, fused=True, return_excluded=True)
+
+    assert ks == pytest.approx(expected, rel=1e-12)
+    assert excluded == expected_excluded
@@ -0,0 +1,50 @@
+import os
+
+import pandas as pd
+
+import reference
+from columnar_log import ColumnarLog
+from log_cache import cache_dir_for, load_columnar_log, read_cache
+
+
+def signature(log):
+    """
+    The case IDs, labels and UTC timestamps (naive timestamps taken as UTC, as in ColumnarLog) of the traces of an
+    EventLog
+    """
+    return [(trace.attributes["concept:name"], [(event["concept:name"], pd.to_datetime(event["time:timestamp"], utc=True)) for event in trace]) for trace in log]
+
+
+def test_columnar_log_matches_reference(synthetic_net):
+    log_path, pn_path = synthetic_net
+    log = reference.read_log(log_path)
+    expected = signature(log)
+
+    columnar_log = ColumnarLog.from_event_log(log)
+
+    assert len(columnar_log) == len(log)
+    assert list(columnar_log.traces()) == [tuple(label for label, time in events) for case_id, events in expected]
+    assert signature(columnar_log.to_event_log()) == expected
+    assert signature(ColumnarLog.from_xes(log_path).to_event_log()) == expected
+
+
+def test_cached_log_matches_reference(synthetic_net, tmp_path):
+    log_path, pn_path = synthetic_net
+    # a copy, so the cache is written by this test
+    copy_path = str(tmp_path / "log.xes")
+    with open(log_path, "rb") as source, open(copy_path, "wb") as target:
+        target.write(source.read())
+
+    expected = signature(reference.read_log(copy_path))
+
+    assert read_cache(copy_path) is None
+    assert signature(load_columnar_log(copy_path).to_event_log()) == expected
+
+    # the second load is read from the memory-mapped cache
+    assert os.path.exists(os.path.join(cache_dir_for(copy_path), "meta.json"))
+    assert signature(read_cache(copy_path).to_event_log()) == expected
+    assert signature(load_columnar_log(copy_path).to_event_log()) == expected
+
+    # a changed file invalidates the cache
+    os.utime(copy_path, ns=(os.stat(copy_path).st_mtime_ns + 10**9,) * 2)
+    assert read_cache(copy_path) is None
@@ -0,0 +1,54 @@
+import numpy as np
+import pm4py
+import pytest
+
+import reference
+from calculate_mean_waiting_time import transition_mean_times
+from free_choice_SPN import find_all_previous_transitions, generate_F, generate_P
+from log_cache import load_columnar_log
+
+
+def names(transition_list):
+    return [[t.name for t in group] for group in transition_list]
+
+
+def test_previous_transitions_match_reference(synthetic_net):
+    log_path, pn_path = synthetic_net
+    net, im, fm = pm4py.read_pnml(pn_path)
+
+    previous_transitions_dict = find_all_previous_transitions(net)
+
+    assert [t.name for t in previous_transitions_dict] == [t.name for t in net.transitions if t.label is not None]
+    for transition, transition_list in previous_transitions_dict.items():
+        assert names(transition_list) == names(reference.find_previous_transitions(net, transition))
+
+
+def test_generate_F_matches_reference(synthetic_net):
+    log_path, pn_path = synthetic_net
+    net, im, fm = pm4py.read_pnml(pn_path)
+
+    F = reference.generate_F(net, reference.read_log(log_path))
+
+    assert generate_F(net, reference.read_log(log_path)) == F
+    assert generate_F(net, load_columnar_log(log_path).to_event_log()) == F
+    assert generate_F(net, load_columnar_log(log_path)) == F
+
+
+def test_mean_waiting_times_match_reference(synthetic_net):
+    log_path, pn_path = synthetic_net
+    net, im, fm = pm4py.read_pnml(pn_path)
+
+    F = generate_F(net, load_columnar_log(log_path))
+
+    assert np.array_equal(transition_mean_times(F), reference.mean_waiting_times(reference.generate_F(net, reference.read_log(log_path))))
+
+
+@pytest.mark.parametrize("replay_variants, workers", [(True, 1), (False, 1), (True, 2)])
+def test_generate_P_matches_reference(synthetic_net, replay_variants, workers):
+    log_path, pn_path = synthetic_net
+    net, im, fm = pm4py.read_pnml(pn_path)
+
+    P = reference.generate_P(reference.read_log(log_path), net, im, fm)
+
+    assert generate_P(reference.read_log(log_path), net, im, fm, replay_variants=replay_variants, workers=workers) == P
+    assert generate_P(load_columnar_log(log_path), net, im, fm, replay_variants=replay_variants, workers=workers) == P
@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+import pytest
+
+from dataset_adapters import DatasetAdapter, event_frame
+from generate_event_logs import generate_event_logs
+
+
+class SyntheticAdapter(DatasetAdapter):
+
+    def __init__(self, country, n_sources):
+        super().__init__(country, log_length=3, trim_length=10)
+        self.n_sources = n_sources
+
+    def sources(self, project_root):
+        return list(range(self.n_sources))
+
+    def read_source(self, source):
+        df = pd.DataFrame({
+            "post": [p for p in range(6) for _ in range(3)],
+            "user": ["u%d" % (source * 10 + u) for _ in range(6) for u in range(3)],
+            "time": pd.to_datetime("2020-01-01") + pd.to_timedelta([60 * (p + u) for p in range(6) for u in range(3)], unit="s"),
+        })
+        return event_frame(df, "post", "user", "time", ["coordinated" if p % 2 else "uncoordinated" for p in df["post"]])
+
+
+def test_adapters_without_sources_are_skipped(tmp_path, capsys):
+    os.makedirs(str(tmp_path / "data"))
+
+    results = generate_event_logs([SyntheticAdapter("empty", 0), SyntheticAdapter("full", 2)], str(tmp_path), workers=2)
+
+    assert sorted(os.path.basename(path) for path, n_traces in results) == ["full_coordinated.xes", "full_uncoordinated.xes"]
+    assert all(n_traces == 3 for path, n_traces in results)
+    assert "no sources found for empty" in capsys.readouterr().out
+
+
+def test_adapters_must_implement_sources_and_read_source():
+    class Incomplete(DatasetAdapter):
+        def sources(self, project_root):
+            return []
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete", 10)
@@ -0,0 +1,36 @@
+import pytest
+
+import reference
+from benchmark import generate_retweet_dataframe
+from generate_logs_spain_thailand import preprocess_log, scan_reposts
+
+
+def signature(log):
+    """
+    The case IDs, labels and timestamps of the traces of an EventLog
+    """
+    return [(trace.attributes["concept:name"], [(event["concept:name"], event["time:timestamp"]) for event in trace]) for trace in log]
+
+
+@pytest.mark.parametrize("seed", [0, 4])
+def test_event_logs_match_reference(tmp_path, seed):
+    # the post times are distinct, so the order of the events does not depend on the sort algorithm
+    df = generate_retweet_dataframe(n_users=40, n_posts=100, trace_length=6, coordinated_fraction=0.3, seed=seed)
+
+    # the dataset is split over several parquet files, as the Spain and Thailand datasets are
+    dataset_paths = []
+    for i in range(3):
+        dataset_path = str(tmp_path / ("spain_%d.gzip.parquet" % i))
+        df.iloc[i::3].to_parquet(dataset_path, engine="pyarrow", compression="gzip")
+        dataset_paths.append(dataset_path)
+
+    # the number of traces with at least 2 reposts in the smaller group
+    reposts = df[df["is_repost"]]
+    log_length = min(int((reposts[reposts["is_control"] == group]["reposted_postid"].value_counts() >= 2).sum()) for group in (True, False))
+
+    uncoordinated_log, coordinated_log = reference.create_spain_thailand_logs(dataset_paths, log_length)
+
+    uncoordinated_df, coordinated_df = scan_reposts(dataset_paths)
+
+    assert signature(preprocess_log(uncoordinated_df, log_length)) == signature(uncoordinated_log)
+    assert signature(preprocess_log(coordinated_df, log_length)) == signature(coordinated_log)
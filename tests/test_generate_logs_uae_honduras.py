@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+import reference
+from benchmark import generate_retweet_dataframe
+from generate_logs_uae_honduras import create_event_log, read_events, read_events_streaming
+
+
+def signature(log):
+    """
+    The case IDs, labels and timestamps of the traces of an EventLog
+    """
+    return [(trace.attributes["concept:name"], [(event["concept:name"], event["time:timestamp"]) for event in trace]) for trace in log]
+
+
+def write_jsonlines(df, file_path, sort):
+    """
+    Writes the reposts of a synthetic dataset of benchmark.py as a UAE/Honduras jsonlines file, where posts that
+    are not reposts have no retweeted tweet
+    """
+    if sort:
+        df = df.sort_values(by="post_time")
+    with open(file_path, "w") as f:
+        for row in df.itertuples():
+            f.write(json.dumps({"tweet_time": int(row.post_time), "userid": "a+" + row.accountid + "=",
+                                "retweet_tweetid": int(row.reposted_postid) if row.is_repost else None}) + "\n")
+
+
+def test_readers_keep_exact_tweet_ids(tmp_path):
+    # IDs above 2^53, which floats cannot hold exactly, and a retweet without a retweeted tweet
+    records = [{"tweet_time": 1546300800000 + 1000 * (i % 4), "userid": "a+b=%d" % (i % 3),
+                "retweet_tweetid": None if i == 2 else 1234567890123456789 + i % 3} for i in range(12)]
+    file_path = str(tmp_path / "tweets.jsonl")
+    with open(file_path, "w") as f:
+        f.write("\n".join(json.dumps(record) for record in records) + "\n")
+
+    df = read_events(file_path)
+
+    assert str(df["retweet_tweetid"].dtype) == "Int64"
+    assert sorted(df["retweet_tweetid"].tolist()) == sorted(r["retweet_tweetid"] for r in records if r["retweet_tweetid"] is not None)
+
+    for chunksize in (1, 5, 100):
+        streamed = read_events_streaming(file_path, 10, 100, chunksize=chunksize)
+        assert streamed.reset_index(drop=True).equals(df.reset_index(drop=True))
+
+
+@pytest.mark.parametrize("seed", [0, 4])
+@pytest.mark.parametrize("log_length", [10, 40])
+def test_event_logs_match_reference(tmp_path, seed, log_length):
+    # the post times are distinct, so the order of the events does not depend on the sort algorithm
+    df = generate_retweet_dataframe(n_users=40, n_posts=100, trace_length=6, coordinated_fraction=0.3, seed=seed)
+
+    for sort in (False, True):
+        file_path = str(tmp_path / ("tweets_%s.jsonl" % sort))
+        write_jsonlines(df, file_path, sort)
+
+        expected = signature(reference.create_uae_honduras_log(file_path, 3, log_length))
+
+        assert signature(create_event_log(file_path, 3, log_length)) == expected
+        for chunksize in (7, 1000):
+            assert signature(create_event_log(file_path, 3, log_length, stream=True, chunksize=chunksize)) == expected
+            # stopping early is only correct for a file sorted by time
+            if sort:
+                assert signature(create_event_log(file_path, 3, log_length, stream=True, chunksize=chunksize, assume_sorted=True)) == expected
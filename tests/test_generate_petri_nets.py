@@ -0,0 +1,46 @@
+import os
+import shutil
+
+import pm4py
+import pytest
+
+import calculate_constructs
+from generate_petri_nets import dataset_stems, discover_petri_nets, tree_path_for
+
+
+def test_discovered_tree_matches_reference(synthetic_net, tmp_path):
+    log_path, pn_path = synthetic_net
+    tree_path = str(tmp_path / "net.ptml")
+
+    net, im, fm = discover_petri_nets(log_path, tree_path=tree_path)
+
+    # the original generate_petri_nets.py discovered the Petri net from the DataFrame of pm4py.read_xes
+    reference_tree = pm4py.discover_process_tree_inductive(pm4py.read_xes(log_path), noise_threshold=0.2)
+    reference_net, reference_im, reference_fm = pm4py.discover_petri_net_inductive(pm4py.read_xes(log_path), noise_threshold=0.2)
+
+    # the trees are compared after the same .ptml round trip, which changes the order of some children
+    reference_tree_path = str(tmp_path / "reference.ptml")
+    pm4py.write_ptml(reference_tree, reference_tree_path)
+
+    assert str(pm4py.read_ptml(tree_path)) == str(pm4py.read_ptml(reference_tree_path))
+    assert sorted(str(t.label) for t in net.transitions) == sorted(str(t.label) for t in reference_net.transitions)
+    assert (len(net.places), len(net.arcs)) == (len(reference_net.places), len(reference_net.arcs))
+
+
+@pytest.mark.parametrize("country", ["brazil", "uae", "brazil_2_split"])
+def test_constructs_reuse_saved_trees(synthetic_net, tmp_path, monkeypatch, country):
+    log_path, pn_path = synthetic_net
+    os.makedirs(str(tmp_path / "data"))
+
+    # the Petri nets are discovered and saved as generate_petri_nets.py does for the country
+    for stem in dataset_stems(str(tmp_path), country):
+        shutil.copy(log_path, stem + ".xes")
+        net, im, fm = discover_petri_nets(stem + ".xes", tree_path=tree_path_for(stem + ".pnml"))
+
+    def discover_again(file_path):
+        raise AssertionError("the process tree of " + file_path + " was discovered again")
+
+    monkeypatch.setattr(calculate_constructs, "discover_process_tree", discover_again)
+
+    for stem in dataset_stems(str(tmp_path), country):
+        assert str(calculate_constructs.load_process_tree(stem + ".xes")) == str(pm4py.read_ptml(tree_path_for(stem + ".pnml")))
@@ -0,0 +1,74 @@
+import numpy as np
+import pm4py
+import pytest
+
+from free_choice_SPN import generate_F, generate_P
+from incremental_spn import IncrementalSPN
+from log_cache import load_columnar_log
+
+
+def batches(log, n_batches):
+    return [log.select_cases(selection) for selection in np.array_split(np.arange(len(log)), n_batches)]
+
+
+def test_batches_match_full_log(synthetic_net, tmp_path):
+    log_path, pn_path = synthetic_net
+    net, im, fm = pm4py.read_pnml(pn_path)
+    log = load_columnar_log(log_path)
+
+    estimator = IncrementalSPN(net, im, fm)
+    first, second, third = batches(log, 3)
+    estimator.update(first)
+    estimator.save(str(tmp_path / "state.json"))
+    estimator = IncrementalSPN.load(str(tmp_path / "state.json"), net, im, fm)
+    estimator.update(second)
+    estimator.update(third)
+
+    F = generate_F(net, log)
+
+    assert estimator.n_traces == len(log)
+    assert estimator.P == generate_P(log, net, im, fm)
+    # every delay fits in the reservoir, so F holds the same delays, ordered by batch
+    assert {name: sorted(times) for name, times in estimator.F.items()} == {name: sorted(times) for name, times in F.items()}
+    for name, mean in estimator.mean_delays().items():
+        assert mean == pytest.approx(np.mean(F[name]))
+
+
+def test_reservoir_is_bounded(synthetic_net, tmp_path):
+    log_path, pn_path = synthetic_net
+    net, im, fm = pm4py.read_pnml(pn_path)
+    log = load_columnar_log(log_path)
+
+    estimator = IncrementalSPN(net, im, fm, reservoir_size=3)
+    for batch in batches(log, 4):
+        estimator.update(batch)
+
+    F = generate_F(net, log)
+
+    for name, times in estimator.F.items():
+        assert len(times) == min(3, len(F[name]))
+        assert set(times) <= set(F[name])
+        assert estimator.delay_stats[name][0] == len(F[name])
+
+    # the sampling carries on from the saved state
+    estimator.save(str(tmp_path / "state.json"))
+    restored = IncrementalSPN.load(str(tmp_path / "state.json"), net, im, fm)
+    assert restored.F == estimator.F
+    assert restored.rng.random() == estimator.rng.random()
+
+
+def test_repeated_cases_are_rejected(synthetic_net):
+    log_path, pn_path = synthetic_net
+    net, im, fm = pm4py.read_pnml(pn_path)
+    log = load_columnar_log(log_path)
+
+    estimator = IncrementalSPN(net, im, fm)
+    first, second = batches(log, 2)
+    estimator.update(first)
+
+    with pytest.raises(ValueError):
+        estimator.update(first.select_cases([0]))
+
+    # the rejected batch leaves the state unchanged
+    estimator.update(second)
+    assert estimator.P == generate_P(log, net, im, fm)
@@ -0,0 +1,24 @@
+import pm4py
+
+from petri_net_index import PetriNetIndex
+
+
+def test_index_matches_arc_scans(synthetic_net):
+    log_path, pn_path = synthetic_net
+    net, im, fm = pm4py.read_pnml(pn_path)
+
+    index = PetriNetIndex(net)
+
+    for node in list(net.places) + list(net.transitions):
+        # the same nodes in the same order as the scans over net.arcs of the original scripts
+        assert index.input_nodes(node) == [arc.source for arc in net.arcs if arc.target == node]
+        assert index.output_nodes(node) == [arc.target for arc in net.arcs if arc.source == node]
+
+    for label in {t.label for t in net.transitions if t.label is not None}:
+        transition = next(t for t in net.transitions if t.label == label)
+        places = [arc.source for arc in net.arcs if arc.target == transition]
+        assert index.transition_by_label(label) is transition
+        assert index.single_input_place(label) == (places[0] if len(places) == 1 else None)
+
+    assert index.transition_by_label("not in the net") is None
+    assert index.single_input_place("not in the net") is None
@@ -0,0 +1,33 @@
+import os
+
+import run_pipeline
+from run_pipeline import Step
+
+
+def write_file(path):
+    with open(path, "w") as f:
+        f.write(os.path.basename(path))
+
+
+def test_cyclic_steps_fail_instead_of_waiting(tmp_path):
+    a, b, c, d = (str(tmp_path / name) for name in ["a.txt", "b.txt", "c.txt", "d.txt"])
+    steps = [
+        Step("a", write_file, (a,), [b], [a]),
+        Step("b", write_file, (b,), [a], [b]),
+        Step("c", write_file, (c,), [c], [c]),
+        Step("d", write_file, (d,), [], [d]),
+    ]
+
+    status = run_pipeline.run_pipeline(steps, str(tmp_path / "state.json"))
+
+    assert status == {"a": "failed", "b": "failed", "c": "failed", "d": "ran"}
+    assert os.path.exists(d)
+
+
+def test_code_files_include_imported_modules():
+    names = [os.path.basename(path) for path in run_pipeline.code_files("calculate_ks_entropy.py")]
+
+    assert names[0] == "calculate_ks_entropy.py"
+    # imported directly, inside functions and through other modules
+    for module in ["free_choice_SPN.py", "petri_net_index.py", "log_cache.py", "columnar_log.py", "spn_cache.py"]:
+        assert module in names
@@ -0,0 +1,28 @@
+import pm4py
+
+import reference
+from split_logs_behaviours import split_behaviours
+
+
+def test_split_logs_keep_every_attribute(synthetic_net, tmp_path):
+    log_path, pn_path = synthetic_net
+
+    # a log with trace and event attributes besides the case IDs, activities and timestamps
+    log = reference.read_log(log_path)
+    for trace in log:
+        trace.attributes['source'] = 'synthetic'
+        for position, event in enumerate(trace):
+            event['org:resource'] = 'r' + str(position)
+    full_log_path = str(tmp_path / "full.xes")
+    pm4py.write_xes(log, full_log_path)
+
+    split_behaviours(full_log_path, pn_path, str(tmp_path / "split"))
+
+    n_traces = 0
+    for group in ("coordinated", "uncoordinated"):
+        for trace in reference.read_log(str(tmp_path / ("split_" + group + ".xes"))):
+            assert trace.attributes['source'] == 'synthetic'
+            assert [event['org:resource'] for event in trace] == ['r' + str(position) for position in range(len(trace))]
+            n_traces += 1
+
+    assert n_traces == len(log)
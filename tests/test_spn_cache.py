@@ -0,0 +1,64 @@
+import os
+
+import spn_cache
+
+
+def write_entry(path, size, mtime_ns):
+    with open(path, "wb") as f:
+        f.write(b"0" * size)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_evict_drops_least_recently_used_entries(tmp_path):
+    for i in range(4):
+        write_entry(str(tmp_path / ("P_%d.json" % i)), 100, (i + 1) * 10**9)
+    write_entry(str(tmp_path / "P_4.json.123.tmp"), 1000, 1)
+
+    spn_cache.evict(str(tmp_path), 250)
+
+    # the temporary file of a concurrent writer is left alone
+    assert sorted(os.listdir(tmp_path)) == ["P_2.json", "P_3.json", "P_4.json.123.tmp"]
+
+
+def test_evict_skips_entries_removed_by_another_process(tmp_path, monkeypatch):
+    for i in range(3):
+        write_entry(str(tmp_path / ("F_%d.json" % i)), 100, (i + 1) * 10**9)
+
+    listdir = os.listdir
+
+    # another process evicts F_0.json after this one has listed the folder
+    def racing_listdir(path):
+        names = listdir(path)
+        os.remove(os.path.join(path, "F_0.json"))
+        return names + ["tree_3_gone.ptml"]
+
+    monkeypatch.setattr(spn_cache.os, "listdir", racing_listdir)
+
+    spn_cache.evict(str(tmp_path), 100)
+
+    assert listdir(tmp_path) == ["F_2.json"]
+
+
+def test_cached_parameters_recomputes_evicted_entry(tmp_path):
+    log_path = tmp_path / "log.xes"
+    pn_path = tmp_path / "net.pnml"
+    log_path.write_text("log")
+    pn_path.write_text("net")
+    cache_dir = str(tmp_path / "cache")
+
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"t1": 0.5}
+
+    assert spn_cache.cached_parameters("P", str(log_path), str(pn_path), compute, cache_dir=cache_dir) == {"t1": 0.5}
+    assert spn_cache.cached_parameters("P", str(log_path), str(pn_path), compute, cache_dir=cache_dir) == {"t1": 0.5}
+    assert len(calls) == 1
+
+    for name in os.listdir(cache_dir):
+        os.remove(os.path.join(cache_dir, name))
+
+    assert spn_cache.cached_parameters("P", str(log_path), str(pn_path), compute, cache_dir=cache_dir) == {"t1": 0.5}
+    assert len(calls) == 2
+    assert not any(name.endswith(".tmp") for name in os.listdir(cache_dir))